@@ -0,0 +1,78 @@
+"""
+Общие помощники нагрузочного стенда: модели задержек, перцентили, синтетическое аудио.
+"""
+
+import asyncio
+import math
+import random
+import struct
+from typing import Dict, List, Optional, Sequence
+
+from src.services.audio_splitter import write_stream
+
+
+class LatencyModel:
+    """Логнормальное распределение задержек: медиана и разброс (sigma)"""
+
+    def __init__(self, median: float = 0.0, sigma: float = 0.0, seed: Optional[int] = None):
+        self.median = median
+        self.sigma = sigma
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencyModel":
+        """Разбор строки "медиана[:sigma]" в секундах, например "0.8:0.5" """
+        median, _, sigma = value.partition(":")
+        return cls(float(median), float(sigma or 0.0))
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.median
+        return self._random.lognormvariate(math.log(self.median), self.sigma)
+
+    async def wait(self):
+        """Пауза на случайную задержку"""
+        delay = self.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def __repr__(self) -> str:
+        return f"{self.median}:{self.sigma}"
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Перцентиль (q от 0 до 1) методом ближайшего ранга"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """Сводка по задержкам в секундах"""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values) if values else None,
+    }
+
+
+def make_voice_note(seconds: float, pause_every: float = 10.0) -> bytes:
+    """Синтетическое голосовое Ogg/Opus: "речь" с короткими паузами (для проверки разбиения)"""
+    head = b"OpusHead" + struct.pack("<BBHIhB", 1, 1, 312, 48000, 0, 0)
+    tags = b"OpusTags" + struct.pack("<I", 5) + b"bench" + struct.pack("<I", 0)
+    toc = bytes([19 << 3])  # CELT 20 мс
+
+    audio = []
+    frames = int(seconds * 50)
+    pause_frames = int(pause_every * 50)
+    for index in range(frames):
+        silent = pause_frames and index % pause_frames >= pause_frames - 25
+        audio.append(toc + (b"\x00" * 2 if silent else bytes([index % 251]) * 79))
+    return write_stream(0x5EED, head, tags, audio)
@@ -0,0 +1,210 @@
+"""
+Поддельный OpenAI-совместимый API для нагрузочного стенда.
+
+Обслуживает /v1/chat/completions (обычные и потоковые ответы),
+/v1/audio/transcriptions и Batch API (/v1/files, /v1/batches) с настраиваемыми
+распределениями задержек.
+"""
+
+import asyncio
+import json
+import time
+from collections import Counter
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from typing import Dict, Optional, Set
+
+from benchmarks.common import LatencyModel
+from src.bot.http_server import HTTPRequest, HTTPResponse, HTTPServer
+
+RATE_LIMIT_HEADERS = {
+    "x-ratelimit-limit-requests": "1000000",
+    "x-ratelimit-remaining-requests": "1000000",
+    "x-ratelimit-limit-tokens": "100000000",
+    "x-ratelimit-remaining-tokens": "100000000",
+}
+
+
+class FakeOpenAI:
+    """Стенд OpenAI API на встроенном HTTP-сервере"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 chat_latency: Optional[LatencyModel] = None,
+                 transcribe_latency: Optional[LatencyModel] = None,
+                 classify_latency: Optional[LatencyModel] = None,
+                 batch_latency: Optional[LatencyModel] = None,
+                 stream_chunks: int = 20):
+        self.chat_latency = chat_latency or LatencyModel()
+        self.batch_latency = batch_latency or LatencyModel()
+        self.transcribe_latency = transcribe_latency or LatencyModel()
+        self.classify_latency = classify_latency or LatencyModel()
+        self.stream_chunks = stream_chunks
+        self.calls: Counter = Counter()
+        self.server = HTTPServer(host, port, max_body_size=25 * 1024 * 1024)
+        self.server.add_route("POST", "/v1/chat/completions", self._chat)
+        self.server.add_route("POST", "/v1/audio/transcriptions", self._transcribe)
+        self.server.add_route("POST", "/v1/files", self._upload_file)
+        self.server.add_route("POST", "/v1/batches", self._create_batch)
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, dict] = {}
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server.host}:{self.server.bound_port}/v1"
+
+    async def start(self):
+        await self.server.start()
+
+    async def stop(self):
+        for task in self._batch_tasks:
+            task.cancel()
+        await self.server.stop()
+
+    @staticmethod
+    def _json(payload: dict) -> HTTPResponse:
+        return HTTPResponse(
+            200, json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            content_type="application/json", headers=dict(RATE_LIMIT_HEADERS)
+        )
+
+    @staticmethod
+    def _is_classification(body: dict) -> bool:
+        # Классификация типа текста запрашивается с очень малым max_tokens
+        return body.get("max_tokens", 0) <= 10
+
+    @staticmethod
+    def _content(body: dict) -> str:
+        text = body["messages"][-1]["content"]
+        if FakeOpenAI._is_classification(body):
+            return "prompt" if "напиши" in text.lower() else "text"
+        return f"Улучшенный вариант: {text}"
+
+    @staticmethod
+    def _completion(body: dict, content: str, created: int) -> dict:
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 3
+        completion_tokens = len(content) // 3
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def _chat(self, request: HTTPRequest) -> HTTPResponse:
+        body = json.loads(request.body)
+
+        if self._is_classification(body):
+            self.calls["classify"] += 1
+            await self.classify_latency.wait()
+        else:
+            self.calls["enhance"] += 1
+            await self.chat_latency.wait()
+        content = self._content(body)
+
+        created = int(time.time())
+        if body.get("stream"):
+            return self._stream(body["model"], content, created)
+        return self._json(self._completion(body, content, created))
+
+    def _stream(self, model: str, content: str, created: int) -> HTTPResponse:
+        """Потоковый ответ в формате SSE (отдается целиком после задержки)"""
+        size = max(1, len(content) // self.stream_chunks)
+        events = []
+        for start in range(0, len(content), size):
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + size]},
+                             "finish_reason": None}],
+            }
+            events.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+        events.append("data: [DONE]\n\n")
+        return HTTPResponse(
+            200, "".join(events).encode("utf-8"),
+            content_type="text/event-stream", headers=dict(RATE_LIMIT_HEADERS)
+        )
+
+    # Batch API: файлы и пакеты живут в памяти, маршруты для них добавляются при создании
+
+    async def _upload_file(self, request: HTTPRequest) -> HTTPResponse:
+        self.calls["files"] += 1
+        message = BytesParser(policy=email_policy).parsebytes(
+            f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode("utf-8") + request.body
+        )
+        data = next(
+            part.get_payload(decode=True) for part in message.iter_parts()
+            if part.get_param("name", header="content-disposition") == "file"
+        )
+        file_id = self._store_file(data)
+        return self._json({"id": file_id, "object": "file", "bytes": len(data), "purpose": "batch"})
+
+    def _store_file(self, data: bytes) -> str:
+        file_id = f"file-{len(self.files) + 1}"
+        self.files[file_id] = data
+
+        async def content(request: HTTPRequest) -> HTTPResponse:
+            return HTTPResponse(200, self.files[file_id], content_type="application/jsonl")
+
+        self.server.add_route("GET", f"/v1/files/{file_id}/content", content)
+        return file_id
+
+    async def _create_batch(self, request: HTTPRequest) -> HTTPResponse:
+        self.calls["batches"] += 1
+        body = json.loads(request.body)
+        batch_id = f"batch-{len(self.batches) + 1}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"],
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        self.batches[batch_id] = batch
+        self._batch_tasks.add(asyncio.create_task(self._run_batch(batch)))
+
+        async def retrieve(request: HTTPRequest) -> HTTPResponse:
+            return self._json(self.batches[batch_id])
+
+        self.server.add_route("GET", f"/v1/batches/{batch_id}", retrieve)
+        return self._json(batch)
+
+    async def _run_batch(self, batch: dict):
+        """Выполнение пакета целиком после задержки batch_latency"""
+        await self.batch_latency.wait()
+        created = int(time.time())
+        lines = [json.loads(line) for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines() if line]
+        output = []
+        for line in lines:
+            self.calls["batch_requests"] += 1
+            completion = self._completion(line["body"], self._content(line["body"]), created)
+            output.append(json.dumps({
+                "id": f"response-{line['custom_id']}",
+                "custom_id": line["custom_id"],
+                "response": {"status_code": 200, "body": completion},
+                "error": None,
+            }, ensure_ascii=False))
+        batch["output_file_id"] = self._store_file(("\n".join(output) + "\n").encode("utf-8"))
+        batch["request_counts"] = {"total": len(lines), "completed": len(lines), "failed": 0}
+        batch["status"] = "completed"
+
+    async def _transcribe(self, request: HTTPRequest) -> HTTPResponse:
+        self.calls["transcribe"] += 1
+        await self.transcribe_latency.wait()
+        return self._json({"text": "Напиши краткое резюме голосового сообщения"})
@@ -0,0 +1,214 @@
+"""
+Поддельный Bot API для нагрузочного стенда.
+
+Отвечает на вызовы, которые делает бот (getUpdates, sendMessage, editMessageText,
+getFile и т.д.), отдает синтетические обновления через long polling и сообщает
+драйверу нагрузки о сообщениях, отправленных ботом в конкретный чат.
+"""
+
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from benchmarks.common import LatencyModel
+from src.bot.http_server import HTTPRequest, HTTPResponse, HTTPServer
+
+MessagePredicate = Callable[[dict], bool]
+
+VOICE_FILE_PATH = "voice/note.ogg"
+
+
+class FakeBotAPI:
+    """Стенд Bot API на встроенном HTTP-сервере"""
+
+    METHODS = (
+        "getMe", "deleteWebhook", "setWebhook", "getUpdates", "sendMessage", "editMessageText",
+        "deleteMessage", "answerCallbackQuery", "getFile", "sendChatAction", "setMyCommands",
+    )
+
+    def __init__(self, token: str, voice_note: bytes, host: str = "127.0.0.1", port: int = 0,
+                 latency: Optional[LatencyModel] = None):
+        self.token = token
+        self.voice_note = voice_note
+        self.latency = latency or LatencyModel()
+        self.server = HTTPServer(host, port, max_body_size=10 * 1024 * 1024)
+        self.calls: Counter = Counter()
+        self.polling = asyncio.Event()
+
+        self._updates: Deque[dict] = deque()
+        self._update_id = 0
+        self._message_id = 0
+        self._has_updates = asyncio.Condition()
+        self._waiters: Dict[int, List[Tuple[MessagePredicate, asyncio.Future]]] = {}
+
+        for method in self.METHODS:
+            self.server.add_route("POST", f"/bot{token}/{method}", self._make_handler(method))
+        self.server.add_route("GET", f"/file/bot{token}/{VOICE_FILE_PATH}", self._download)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server.host}:{self.server.bound_port}/bot"
+
+    @property
+    def base_file_url(self) -> str:
+        return f"http://{self.server.host}:{self.server.bound_port}/file/bot"
+
+    async def start(self):
+        await self.server.start()
+
+    async def stop(self):
+        # Освобождаем висящие getUpdates
+        async with self._has_updates:
+            self._has_updates.notify_all()
+        await self.server.stop()
+
+    # Синтетические обновления
+
+    async def push_update(self, payload: dict) -> int:
+        """Постановка обновления в очередь getUpdates"""
+        self._update_id += 1
+        payload = {"update_id": self._update_id, **payload}
+        async with self._has_updates:
+            self._updates.append(payload)
+            self._has_updates.notify_all()
+        return self._update_id
+
+    def next_message_id(self) -> int:
+        self._message_id += 1
+        return self._message_id
+
+    def expect(self, chat_id: int, predicate: MessagePredicate) -> asyncio.Future:
+        """Ожидание сообщения бота в чате, удовлетворяющего условию"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(chat_id, []).append((predicate, future))
+        return future
+
+    def _notify(self, chat_id: int, message: dict):
+        waiters = self._waiters.get(chat_id)
+        if not waiters:
+            return
+        remaining = []
+        for predicate, future in waiters:
+            if future.done():
+                continue
+            if predicate(message):
+                future.set_result(message)
+            else:
+                remaining.append((predicate, future))
+        if remaining:
+            self._waiters[chat_id] = remaining
+        else:
+            del self._waiters[chat_id]
+
+    # Обработчики Bot API
+
+    @staticmethod
+    def _params(request: HTTPRequest) -> dict:
+        """Параметры запроса: form-urlencoded (как шлет PTB) или JSON"""
+        if not request.body:
+            return {}
+        if request.headers.get("content-type", "").startswith("application/json"):
+            return json.loads(request.body)
+        return {name: values[-1] for name, values in parse_qs(request.body.decode("utf-8")).items()}
+
+    @staticmethod
+    def _ok(result) -> HTTPResponse:
+        return HTTPResponse(
+            200, json.dumps({"ok": True, "result": result}, ensure_ascii=False).encode("utf-8"),
+            content_type="application/json"
+        )
+
+    def _make_handler(self, method: str):
+        async def handler(request: HTTPRequest) -> HTTPResponse:
+            self.calls[method] += 1
+            params = self._params(request)
+            if method == "getUpdates":
+                return self._ok(await self._get_updates(params))
+            await self.latency.wait()
+            return self._ok(self._result(method, params))
+        return handler
+
+    async def _get_updates(self, params: dict) -> list:
+        """Long polling: подтверждение по offset и ожидание новых обновлений"""
+        self.polling.set()
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        async with self._has_updates:
+            while self._updates and self._updates[0]["update_id"] < offset:
+                self._updates.popleft()
+            if not self._updates and timeout > 0:
+                try:
+                    await asyncio.wait_for(self._has_updates.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return [update for _, update in zip(range(limit), self._updates)]
+
+    def _message(self, params: dict, message_id: Optional[int] = None) -> dict:
+        chat_id = int(params["chat_id"])
+        message = {
+            "message_id": message_id or self.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Bench bot", "username": "bench_bot"},
+            "text": params.get("text", ""),
+        }
+        if params.get("reply_markup"):
+            message["reply_markup"] = json.loads(params["reply_markup"])
+        return message
+
+    def _result(self, method: str, params: dict):
+        if method == "getMe":
+            return {
+                "id": 1, "is_bot": True, "first_name": "Bench bot", "username": "bench_bot",
+                "can_join_groups": False, "can_read_all_group_messages": False,
+                "supports_inline_queries": False,
+            }
+        if method in ("sendMessage", "editMessageText"):
+            message_id = int(params["message_id"]) if method == "editMessageText" else None
+            message = self._message(params, message_id)
+            self._notify(message["chat"]["id"], message)
+            return message
+        if method == "getFile":
+            return {
+                "file_id": params.get("file_id", "voice"),
+                "file_unique_id": "voice",
+                "file_size": len(self.voice_note),
+                "file_path": VOICE_FILE_PATH,
+            }
+        return True
+
+    async def _download(self, request: HTTPRequest) -> HTTPResponse:
+        self.calls["download"] += 1
+        await self.latency.wait()
+        return HTTPResponse(200, self.voice_note, content_type="audio/ogg")
+
+
+def user_payload(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+
+
+def message_payload(bot_api: FakeBotAPI, user_id: int, **content) -> dict:
+    """Обновление с входящим сообщением пользователя"""
+    return {"message": {
+        "message_id": bot_api.next_message_id(),
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": user_payload(user_id),
+        **content,
+    }}
+
+
+def callback_payload(user_id: int, message: dict, data: str) -> dict:
+    """Обновление с нажатием кнопки под сообщением бота"""
+    return {"callback_query": {
+        "id": f"{user_id}-{message['message_id']}",
+        "from": user_payload(user_id),
+        "chat_instance": str(user_id),
+        "message": message,
+        "data": data,
+    }}
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест бота на стенде из поддельных Bot API и OpenAI.
+
+Запускает настоящий PromptEnhancerBot (polling), направленный на локальные
+стенды, и прогоняет синтетических пользователей через сценарии: текст →
+клавиатура, нажатие кнопки → улучшенный текст, голосовое → клавиатура.
+Выводит обновления в секунду, p50/p95/p99 сквозной задержки по сценариям
+и потребление памяти.
+
+Пример:
+    python -m benchmarks.load_test --users 2000 --concurrency 200 --chat-latency 0.8:0.4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# Добавляем корневую директорию в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import LatencyModel, make_voice_note, summarize
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.fake_telegram import FakeBotAPI, callback_payload, message_payload
+
+TOKEN = "123456:BENCHMARK"
+SCENARIOS = ("text", "callback", "voice")
+
+TEXTS = (
+    "напиши функцию на python для сортировки списка словарей по ключу",
+    "ну короче я хотел сказать что завтра встреча переносится на вечер",
+    "напиши промпт для генерации логотипа кофейни в минималистичном стиле",
+    "вобщем отчет готов но там есть пару ошибок которые надо поправить",
+)
+
+
+def is_error(message: dict) -> bool:
+    return message.get("text", "").startswith("❌")
+
+
+def has_keyboard(message: dict) -> bool:
+    if is_error(message):
+        return True
+    rows = message.get("reply_markup", {}).get("inline_keyboard", [])
+    return any(button.get("callback_data", "").startswith("enhance:") for row in rows for button in row)
+
+
+def is_final(message: dict) -> bool:
+    return "Улучшенный текст" in message.get("text", "") or is_error(message)
+
+
+def max_rss_mb() -> float:
+    """Пиковое потребление памяти процессом (Linux: ru_maxrss в КБ)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class LoadDriver:
+    """Синтетические пользователи, проходящие сценарии бота"""
+
+    def __init__(self, bot_api: FakeBotAPI, scenarios: List[str], step_timeout: float,
+                 think_time: LatencyModel):
+        self.bot_api = bot_api
+        self.scenarios = scenarios
+        self.step_timeout = step_timeout
+        self.think_time = think_time
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.timeouts: Dict[str, int] = defaultdict(int)
+        self.updates = 0
+
+    async def _step(self, scenario: str, user_id: int, payload: dict, predicate):
+        """Отправка обновления и ожидание итогового ответа бота"""
+        waiter = self.bot_api.expect(user_id, predicate)
+        started = time.monotonic()
+        await self.bot_api.push_update(payload)
+        self.updates += 1
+        try:
+            message = await asyncio.wait_for(waiter, self.step_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[scenario] += 1
+            return None
+        self.latencies[scenario].append(time.monotonic() - started)
+        if is_error(message):
+            self.errors[scenario] += 1
+            return None
+        return message
+
+    async def run_user(self, user_id: int):
+        """Сценарий одного пользователя"""
+        text = TEXTS[user_id % len(TEXTS)]
+        keyboard_message = None
+
+        if "text" in self.scenarios:
+            keyboard_message = await self._step(
+                "text", user_id, message_payload(self.bot_api, user_id, text=text), has_keyboard
+            )
+            await self.think_time.wait()
+
+        if "callback" in self.scenarios and keyboard_message is not None:
+            data = keyboard_message["reply_markup"]["inline_keyboard"][0][0]["callback_data"]
+            await self._step("callback", user_id, callback_payload(user_id, keyboard_message, data), is_final)
+            await self.think_time.wait()
+
+        if "voice" in self.scenarios:
+            voice = {
+                "file_id": f"voice-{user_id}",
+                "file_unique_id": f"voice-{user_id}",
+                "duration": 20,
+                "mime_type": "audio/ogg",
+                "file_size": len(self.bot_api.voice_note),
+            }
+            await self._step("voice", user_id, message_payload(self.bot_api, user_id, voice=voice), has_keyboard)
+
+
+def configure_environment(bot_api: FakeBotAPI, fake_openai: FakeOpenAI, data_dir: str,
+                          llm_backend: str = "http", chat_latency: Optional[LatencyModel] = None):
+    """Настройки бота для стенда (явно заданные переменные окружения не перекрываются)"""
+    if llm_backend == "stub":
+        # Заглушка в процессе: без HTTP к OpenAI, задержка — как у улучшения текста
+        chat_latency = chat_latency or LatencyModel()
+        os.environ.update({
+            "LLM_BACKEND": "stub",
+            "LLM_STUB_LATENCY": str(chat_latency.median),
+            "LLM_STUB_LATENCY_SIGMA": str(chat_latency.sigma),
+        })
+    os.environ.update({
+        "TELEGRAM_TOKEN": TOKEN,
+        "TELEGRAM_BASE_URL": bot_api.base_url,
+        "TELEGRAM_BASE_FILE_URL": bot_api.base_file_url,
+        "OPENAI_API_KEY": "sk-benchmark",
+        "OPENAI_BASE_URL": fake_openai.base_url,
+    })
+    defaults = {
+        "USER_STORAGE_FILE": os.path.join(data_dir, "users.db"),
+        "METRICS_ENABLED": "false",
+        "CACHE_ENABLED": "false",
+        # Бюджеты RPM/TPM настоящего API на стенде только мешают измерению
+        "OPENAI_REQUESTS_PER_MINUTE": "0",
+        "OPENAI_TOKENS_PER_MINUTE": "0",
+        "OPENAI_AUDIO_REQUESTS_PER_MINUTE": "0",
+        "OPENAI_MAX_CONCURRENT": "256",
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+async def run(args) -> dict:
+    """Прогон нагрузки, возвращает отчет"""
+    bot_api = FakeBotAPI(TOKEN, make_voice_note(args.voice_seconds),
+                         latency=LatencyModel.parse(args.telegram_latency))
+    fake_openai = FakeOpenAI(
+        chat_latency=LatencyModel.parse(args.chat_latency),
+        classify_latency=LatencyModel.parse(args.classify_latency),
+        transcribe_latency=LatencyModel.parse(args.transcribe_latency)
+    )
+    await bot_api.start()
+    await fake_openai.start()
+
+    data_dir = tempfile.mkdtemp(prefix="bench-")
+    configure_environment(bot_api, fake_openai, data_dir, args.llm_backend, LatencyModel.parse(args.chat_latency))
+
+    # Импорт после настройки окружения: настройки читаются при импорте
+    from src.bot.bot import PromptEnhancerBot
+
+    bot = PromptEnhancerBot()
+    bot_task = asyncio.create_task(bot.start())
+    await asyncio.wait_for(bot_api.polling.wait(), 30)
+    rss_before = max_rss_mb()
+
+    driver = LoadDriver(bot_api, args.scenarios, args.step_timeout, LatencyModel.parse(args.think_time))
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def user(user_id: int):
+        async with semaphore:
+            await driver.run_user(user_id)
+
+    started = time.monotonic()
+    await asyncio.gather(*(user(user_id) for user_id in range(1, args.users + 1)))
+    elapsed = time.monotonic() - started
+
+    openai_calls = dict(fake_openai.calls)
+    if args.llm_backend == "stub":
+        openai_calls = dict(bot.handlers.openai_service.backend.calls)
+
+    bot._stop_event.set()
+    await bot_task
+    await bot.stop()
+    await fake_openai.stop()
+    await bot_api.stop()
+
+    return {
+        "users": args.users,
+        "llm_backend": args.llm_backend,
+        "concurrency": args.concurrency,
+        "scenarios": args.scenarios,
+        "latency_models": {
+            "telegram": args.telegram_latency,
+            "chat": args.chat_latency,
+            "classify": args.classify_latency,
+            "transcribe": args.transcribe_latency,
+        },
+        "elapsed_seconds": elapsed,
+        "updates": driver.updates,
+        "updates_per_second": driver.updates / elapsed if elapsed else None,
+        "latency": {scenario: summarize(driver.latencies[scenario]) for scenario in args.scenarios},
+        "errors": dict(driver.errors),
+        "timeouts": dict(driver.timeouts),
+        "telegram_calls": dict(bot_api.calls),
+        "openai_calls": openai_calls,
+        "memory_mb": {"before_load": rss_before, "peak": max_rss_mb()},
+    }
+
+
+def print_report(report: dict):
+    """Вывод отчета в читаемом виде"""
+    print(f"Пользователи: {report['users']} (параллельно {report['concurrency']})")
+    print(f"Обновления: {report['updates']} за {report['elapsed_seconds']:.1f} с "
+          f"— {report['updates_per_second']:.1f} обновлений/с")
+    print(f"{'Сценарий':<10} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for scenario, stats in report["latency"].items():
+        if not stats["count"]:
+            print(f"{scenario:<10} {0:>6}")
+            continue
+        print(f"{scenario:<10} {stats['count']:>6} {stats['p50']:>8.3f} {stats['p95']:>8.3f} "
+              f"{stats['p99']:>8.3f} {stats['max']:>8.3f}")
+    print(f"Ошибки: {report['errors'] or 0}, таймауты: {report['timeouts'] or 0}")
+    print(f"Вызовы Bot API: {report['telegram_calls']}")
+    print(f"Вызовы OpenAI: {report['openai_calls']}")
+    print(f"Память: {report['memory_mb']['before_load']:.1f} МБ до нагрузки, "
+          f"{report['memory_mb']['peak']:.1f} МБ пик")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бота на поддельных Bot API и OpenAI")
+    parser.add_argument("--users", type=int, default=1000, help="Число синтетических пользователей")
+    parser.add_argument("--concurrency", type=int, default=100, help="Сколько пользователей активны одновременно")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="Сценарии через запятую: text, callback, voice")
+    parser.add_argument("--telegram-latency", default="0.02:0.3", help="Задержка Bot API: медиана[:sigma], с")
+    parser.add_argument("--chat-latency", default="0.8:0.4", help="Задержка улучшения текста")
+    parser.add_argument("--classify-latency", default="0.3:0.3", help="Задержка классификации через LLM")
+    parser.add_argument("--transcribe-latency", default="1.5:0.4", help="Задержка распознавания одной части")
+    parser.add_argument("--llm-backend", default="http", choices=("http", "stub"),
+                        help="http — поддельный OpenAI по HTTP, stub — заглушка в процессе бота")
+    parser.add_argument("--think-time", default="0", help="Пауза пользователя между шагами")
+    parser.add_argument("--voice-seconds", type=float, default=20.0, help="Длительность голосового")
+    parser.add_argument("--step-timeout", type=float, default=120.0, help="Таймаут ожидания ответа бота")
+    parser.add_argument("--json", dest="json_path", help="Сохранить отчет в JSON-файл")
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк хранения пользователей (UserService и его хранилища).
+
+Для каждого размера базы и бэкенда (sqlite, json) заполняет хранилище
+синтетическими пользователями с кастомными улучшателями и измеряет время
+запуска (открытие хранилища и первые обращения), задержку add_custom_enhancer
+и remove_custom_enhancer, резидентную память и размер файла. Каждый случай
+выполняется в отдельном процессе, чтобы замеры памяти не смешивались.
+
+Пример:
+    python -m benchmarks.user_service_bench --sizes 10000,100000 --json users.json
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List
+
+# Добавляем корневую директорию в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import summarize
+from src.models.enhancement import CustomEnhancer, UserSettings
+from src.services.user_service import UserService
+from src.services.user_storage import create_user_storage
+
+BACKENDS = {"sqlite": "users.db", "json": "users.json"}
+DEFAULT_SIZES = "10000,100000,1000000"
+POPULATE_BATCH = 10000
+
+# Типичные пользовательские промпты: у многих пользователей они совпадают дословно
+PROMPTS = (
+    "Перепиши текст в деловом стиле: убери разговорные обороты, сделай формулировки точными "
+    "и вежливыми, сохрани смысл и все факты, не добавляй ничего от себя.",
+    "Сократи текст до трех-четырех предложений, оставив только главное. Пиши простым языком, "
+    "без канцелярита и повторов.",
+    "Переведи текст на английский язык, сохранив тон и стиль оригинала. Имена собственные "
+    "и термины оставь без изменений.",
+    "Сделай из текста пост для Telegram-канала: добавь цепляющий заголовок, разбей на абзацы, "
+    "используй уместные эмодзи и закончи призывом к действию.",
+    "Преврати текст в подробный промпт для генерации изображения: опиши объект, стиль, "
+    "освещение, композицию и настроение, перечисли детали через запятую.",
+)
+
+
+def current_rss_mb() -> float:
+    """Текущая резидентная память процесса (Linux: /proc/self/statm, иначе пиковая)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def file_size_mb(storage_file: str) -> float:
+    """Размер хранилища на диске вместе с журналом SQLite"""
+    size = 0
+    for path in (storage_file, f"{storage_file}-wal", f"{storage_file}-shm"):
+        if os.path.exists(path):
+            size += os.path.getsize(path)
+    return size / (1024 * 1024)
+
+
+def enhancer_count(user_id: int, ratio: float) -> int:
+    """Детерминированное число улучшателей у синтетического пользователя"""
+    rng = random.Random(user_id)
+    if rng.random() >= ratio:
+        return 0
+    return rng.randint(1, 3)
+
+
+def synthetic_users(size: int, ratio: float) -> Iterator[UserSettings]:
+    """Синтетические пользователи с id от 1 до size"""
+    for user_id in range(1, size + 1):
+        enhancers = [
+            CustomEnhancer(
+                id=f"custom_{index + 1}",
+                name=f"Стиль {index + 1}",
+                prompt=PROMPTS[(user_id + index) % len(PROMPTS)],
+                description="Пользовательский улучшатель" if index == 0 else None
+            )
+            for index in range(enhancer_count(user_id, ratio))
+        ]
+        yield UserSettings(user_id=user_id, custom_enhancers=enhancers)
+
+
+def populate(backend: str, storage_file: str, size: int, ratio: float):
+    """Заполнение хранилища синтетическими пользователями"""
+    if backend == "json":
+        # save_many JSON-хранилища перезаписывает весь файл, поэтому пишем файл сразу в его формате
+        data = {str(user.user_id): user.model_dump() for user in synthetic_users(size, ratio)}
+        with open(storage_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return
+
+    storage = create_user_storage(storage_file)
+    batch: List[UserSettings] = []
+    for user in synthetic_users(size, ratio):
+        batch.append(user)
+        if len(batch) >= POPULATE_BATCH:
+            storage.save_many(batch)
+            batch.clear()
+    if batch:
+        storage.save_many(batch)
+    storage.close()
+
+
+def run_case(backend: str, size: int, options: Dict) -> Dict:
+    """Один случай: бэкенд и размер базы"""
+    rng = random.Random(options["seed"])
+    with tempfile.TemporaryDirectory(prefix="users-bench-") as data_dir:
+        storage_file = os.path.join(data_dir, BACKENDS[backend])
+
+        started = time.perf_counter()
+        populate(backend, storage_file, size, options["enhancer_ratio"])
+        populate_seconds = time.perf_counter() - started
+        gc.collect()
+
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        service = UserService(storage_file)
+        startup_seconds = time.perf_counter() - started
+        rss_after_startup = current_rss_mb()
+
+        # Первые обращения к пользователям: загрузка из хранилища в память сервиса
+        touched = min(size, options["touch"])
+        first_access: List[float] = []
+        for user_id in rng.sample(range(1, size + 1), touched):
+            started = time.perf_counter()
+            service.get_user_settings(user_id)
+            first_access.append(time.perf_counter() - started)
+        gc.collect()
+        rss_after_touch = current_rss_mb()
+
+        # Изменения с немедленным сохранением, как в синхронном UserService
+        candidates = [user_id for user_id in range(1, size + 1)
+                      if enhancer_count(user_id, options["enhancer_ratio"]) < 3]
+        add_latency: List[float] = []
+        remove_latency: List[float] = []
+        budget_started = time.perf_counter()
+        for _ in range(options["mutations"]):
+            if time.perf_counter() - budget_started > options["mutation_budget"]:
+                break
+            user_id = rng.choice(candidates)
+
+            started = time.perf_counter()
+            service.add_custom_enhancer(user_id, "Бенчмарк", PROMPTS[0])
+            add_latency.append(time.perf_counter() - started)
+
+            enhancer_id = service.list_custom_enhancers(user_id)[-1].id
+            started = time.perf_counter()
+            service.remove_custom_enhancer(user_id, enhancer_id)
+            remove_latency.append(time.perf_counter() - started)
+
+        service.close()
+        return {
+            "backend": backend,
+            "users": size,
+            "populate_seconds": populate_seconds,
+            "startup_seconds": startup_seconds,
+            "first_access": summarize(first_access),
+            "add_custom_enhancer": summarize(add_latency),
+            "remove_custom_enhancer": summarize(remove_latency),
+            "memory_mb": {
+                "before_startup": rss_before,
+                "after_startup": rss_after_startup,
+                "after_touch": rss_after_touch,
+                "touched_users": touched,
+                "per_touched_user_kb": (rss_after_touch - rss_after_startup) * 1024 / touched if touched else None,
+            },
+            "file_size_mb": file_size_mb(storage_file),
+        }
+
+
+def run(args) -> Dict:
+    """Прогон всех случаев, каждый в отдельном процессе"""
+    options = {
+        "enhancer_ratio": args.enhancer_ratio,
+        "touch": args.touch,
+        "mutations": args.mutations,
+        "mutation_budget": args.mutation_budget,
+        "seed": args.seed,
+    }
+    context = multiprocessing.get_context("spawn")
+    cases = []
+    for size in args.sizes:
+        for backend in args.backends:
+            print(f"⏱ {backend}: {size} пользователей...", file=sys.stderr)
+            with context.Pool(1) as pool:
+                cases.append(pool.apply(run_case, (backend, size, options)))
+    return {
+        "benchmark": "user_service",
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "options": options,
+        "cases": cases,
+    }
+
+
+def print_report(report: Dict):
+    """Вывод отчета в читаемом виде (задержки в миллисекундах)"""
+    print(f"{'Бэкенд':<7} {'Польз.':>8} {'Старт,с':>8} {'Чтение p50':>11} {'add p50':>8} {'add p99':>8} "
+          f"{'remove p50':>11} {'RSS,МБ':>8} {'КБ/польз.':>10} {'Файл,МБ':>8}")
+    for case in report["cases"]:
+        def ms(stats: Dict, key: str) -> str:
+            return f"{stats[key] * 1000:.2f}" if stats[key] is not None else "-"
+
+        memory = case["memory_mb"]
+        per_user = memory["per_touched_user_kb"]
+        print(f"{case['backend']:<7} {case['users']:>8} {case['startup_seconds']:>8.2f} "
+              f"{ms(case['first_access'], 'p50'):>11} {ms(case['add_custom_enhancer'], 'p50'):>8} "
+              f"{ms(case['add_custom_enhancer'], 'p99'):>8} {ms(case['remove_custom_enhancer'], 'p50'):>11} "
+              f"{memory['after_touch']:>8.1f} {per_user if per_user is not None else 0:>10.2f} "
+              f"{case['file_size_mb']:>8.1f}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Микробенчмарк хранения пользователей")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Размеры базы через запятую")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Бэкенды через запятую: sqlite, json")
+    parser.add_argument("--enhancer-ratio", type=float, default=0.3,
+                        help="Доля пользователей с кастомными улучшателями")
+    parser.add_argument("--touch", type=int, default=100000,
+                        help="Сколько пользователей загрузить в память сервиса")
+    parser.add_argument("--mutations", type=int, default=1000, help="Число пар add/remove улучшателя")
+    parser.add_argument("--mutation-budget", type=float, default=60.0,
+                        help="Предел времени на изменения в одном случае, с")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора случайных чисел")
+    parser.add_argument("--json", dest="json_path", help="Сохранить отчет в JSON-файл (иначе в stdout)")
+    return parser
+
+
+def main(argv: List[str] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    args.sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    args.backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = set(args.backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"Неизвестные бэкенды: {', '.join(sorted(unknown))}")
+
+    report = run(args)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
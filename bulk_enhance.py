@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Пакетное улучшение текстов из JSONL вне Telegram
+
+Каждая строка входного файла: {"id": "...", "text": "...", "type": "grammar", "prompt": "..."}
+(type и prompt необязательны). Результаты дописываются в выходной JSONL по мере готовности;
+повторный запуск с тем же выходным файлом продолжает с места остановки.
+
+Примеры:
+    python bulk_enhance.py prompts.jsonl enhanced.jsonl --type prompt_enhancement --concurrency 16
+    python bulk_enhance.py prompts.jsonl enhanced.jsonl --batch --poll-interval 60
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import os
+
+# Добавляем корневую директорию в путь
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.models.enhancement import EnhancementType
+from src.services.bulk_enhancer import (
+    BatchBulkRunner, LocalBulkRunner, ResultWriter, load_checkpoint, read_items
+)
+
+
+async def run(args):
+    """Обработка файла локально или через Batch API"""
+    # Настройки требуют переменных окружения: импорт здесь, чтобы --help работал и без них
+    from src.services.openai_service import OpenAIService
+
+    done = load_checkpoint(args.output, retry_failed=args.retry_failed)
+    invalid = []
+    items = (
+        item for item in read_items(args.input, EnhancementType(args.type), args.prompt, errors=invalid)
+        if item.id not in done
+    )
+
+    service = OpenAIService()
+    writer = ResultWriter(args.output)
+    try:
+        if args.batch:
+            if service.backend.name == "stub":
+                raise SystemExit("Batch API недоступен для LLM_BACKEND=stub")
+            runner = BatchBulkRunner(
+                service.http_clients.client("openai_batch", read_timeout=300),
+                service.backend.base_url,
+                service.backend.api_key,
+                service.enhancement_requests,
+                state_path=f"{args.output}.batches.json",
+                batch_size=args.batch_size,
+                poll_interval=args.poll_interval
+            )
+        else:
+            runner = LocalBulkRunner(service.enhance_text, concurrency=args.concurrency)
+        await runner.run(items, writer)
+
+        for record in invalid:
+            if record["id"] not in done:
+                writer.write(record["id"], error=record["error"])
+    finally:
+        writer.close()
+        await service.close()
+
+    print(f"Готово: {writer.written} записей, ошибок {writer.failed}, пропущено как готовые {len(done)}")
+    return writer.failed == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетное улучшение текстов из JSONL")
+    parser.add_argument("input", help="Входной JSONL с текстами")
+    parser.add_argument("output", help="Выходной JSONL (дописывается, служит контрольной точкой)")
+    parser.add_argument("--type", default=EnhancementType.GRAMMAR.value,
+                        choices=[t.value for t in EnhancementType],
+                        help="Тип улучшения для строк без поля type")
+    parser.add_argument("--prompt", help="Кастомный промпт для строк без поля prompt")
+    parser.add_argument("--concurrency", type=int, default=8, help="Одновременных запросов в локальном режиме")
+    parser.add_argument("--retry-failed", action="store_true", help="Повторить тексты, завершившиеся ошибкой")
+    parser.add_argument("--batch", action="store_true", help="Отправить через Batch API вместо локальных запросов")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Запросов (частей текстов) в одном пакете")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="Интервал опроса пакета, с")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+    # Каждый HTTP-запрос в лог не нужен: прогресс видно по файлу результатов
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    try:
+        success = asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\nОстановлено: повторный запуск продолжит с места остановки")
+        success = False
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,18 +8,121 @@ class Settings(BaseSettings):
     
     # Telegram Bot
     telegram_token: str = Field(..., env="TELEGRAM_TOKEN")
+    telegram_base_url: Optional[str] = Field(default=None, env="TELEGRAM_BASE_URL")  # свой Bot API сервер или стенд
+    telegram_base_file_url: Optional[str] = Field(default=None, env="TELEGRAM_BASE_FILE_URL")
     
     # OpenAI
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4o", env="OPENAI_MODEL")
+    openai_base_url: Optional[str] = Field(default=None, env="OPENAI_BASE_URL")  # совместимый API или стенд
+    
+    # Бэкенд LLM: openai, compatible (свой сервер на OPENAI_BASE_URL) или stub (заглушка без сети)
+    llm_backend: str = Field(default="openai", env="LLM_BACKEND")
+    llm_stub_latency: float = Field(default=0.0, env="LLM_STUB_LATENCY")  # медиана задержки, секунды
+    llm_stub_latency_sigma: float = Field(default=0.0, env="LLM_STUB_LATENCY_SIGMA")  # разброс (логнормальный)
+    llm_stub_error_rate: float = Field(default=0.0, env="LLM_STUB_ERROR_RATE")  # доля сетевых ошибок
+    llm_stub_seed: int = Field(default=0, env="LLM_STUB_SEED")
+    
+    # Маршруты моделей: task[:макс. входных токенов]=model[|запасная][@бюджет, с] через запятую;
+    # задачи classify, grammar, prompt_enhancement, custom; без маршрута — OPENAI_MODEL
+    openai_model_routes: str = Field(default="", env="OPENAI_MODEL_ROUTES")
+    openai_fallback_model: Optional[str] = Field(default=None, env="OPENAI_FALLBACK_MODEL")  # запасная для маршрутов без своей
+    openai_latency_budget: float = Field(default=0.0, env="OPENAI_LATENCY_BUDGET")  # секунды, 0 — без бюджета
+    
+    # Лимиты OpenAI (0 — без ограничения бюджета)
+    openai_max_concurrent: int = Field(default=16, env="OPENAI_MAX_CONCURRENT")
+    openai_requests_per_minute: int = Field(default=500, env="OPENAI_REQUESTS_PER_MINUTE")
+    openai_tokens_per_minute: int = Field(default=30000, env="OPENAI_TOKENS_PER_MINUTE")
+    openai_audio_requests_per_minute: int = Field(default=50, env="OPENAI_AUDIO_REQUESTS_PER_MINUTE")
+    
+    # Таймауты, повторы и дублирование запросов к OpenAI (секунды)
+    openai_timeout: float = Field(default=60.0, env="OPENAI_TIMEOUT")  # на одну попытку
+    openai_deadline: float = Field(default=120.0, env="OPENAI_DEADLINE")  # на запрос вместе с повторами
+    openai_max_retries: int = Field(default=2, env="OPENAI_MAX_RETRIES")
+    openai_backoff_base: float = Field(default=0.5, env="OPENAI_BACKOFF_BASE")
+    openai_backoff_max: float = Field(default=8.0, env="OPENAI_BACKOFF_MAX")
+    openai_hedge_enabled: bool = Field(default=False, env="OPENAI_HEDGE_ENABLED")
+    openai_hedge_delay: float = Field(default=0.0, env="OPENAI_HEDGE_DELAY")  # 0 — по p95 латентности
+    
+    # Общие HTTP-клиенты (OpenAI и Bot API): пулы соединений, keep-alive и таймауты
+    http_pool_size: int = Field(default=100, env="HTTP_POOL_SIZE")  # соединений к OpenAI
+    http_keepalive_connections: int = Field(default=32, env="HTTP_KEEPALIVE_CONNECTIONS")
+    http_keepalive_expiry: float = Field(default=30.0, env="HTTP_KEEPALIVE_EXPIRY")  # секунды
+    http_connect_timeout: float = Field(default=5.0, env="HTTP_CONNECT_TIMEOUT")  # секунды
+    http_read_timeout: float = Field(default=10.0, env="HTTP_READ_TIMEOUT")  # для Bot API, у OpenAI — OPENAI_TIMEOUT
+    http2_enabled: bool = Field(default=True, env="HTTP2_ENABLED")  # если установлен пакет h2
+    http_warmup_connections: int = Field(default=2, env="HTTP_WARMUP_CONNECTIONS")  # 0 — без прогрева
+    telegram_pool_size: int = Field(default=128, env="TELEGRAM_POOL_SIZE")
+    
+    # Бюджет токенов улучшения: max_tokens по типу и длине текста, длинные тексты — по частям
+    enhance_min_output_tokens: int = Field(default=256, env="ENHANCE_MIN_OUTPUT_TOKENS")
+    enhance_max_output_tokens: int = Field(default=4000, env="ENHANCE_MAX_OUTPUT_TOKENS")
+    enhance_chunk_threshold_tokens: int = Field(default=1000, env="ENHANCE_CHUNK_THRESHOLD_TOKENS")  # длиннее — по частям
+    enhance_chunk_target_tokens: int = Field(default=500, env="ENHANCE_CHUNK_TARGET_TOKENS")
+    enhance_chunk_max_parallel: int = Field(default=4, env="ENHANCE_CHUNK_MAX_PARALLEL")
     
     # Настройки бота
     max_message_length: int = Field(default=4096, env="MAX_MESSAGE_LENGTH")
-    max_audio_duration: int = Field(default=60, env="MAX_AUDIO_DURATION")  # секунды
+    max_audio_duration: int = Field(default=600, env="MAX_AUDIO_DURATION")  # секунды
+    max_voice_file_size: int = Field(default=20 * 1024 * 1024, env="MAX_VOICE_FILE_SIZE")  # байты, лимит Bot API
+    voice_spool_threshold: int = Field(default=4 * 1024 * 1024, env="VOICE_SPOOL_THRESHOLD")  # крупнее — во временный файл
+    
+    # Длинные голосовые режутся по паузам и распознаются параллельно (секунды)
+    transcription_chunk_duration: float = Field(default=30.0, env="TRANSCRIPTION_CHUNK_DURATION")
+    transcription_max_chunk_duration: float = Field(default=45.0, env="TRANSCRIPTION_MAX_CHUNK_DURATION")
+    transcription_max_parallel: int = Field(default=4, env="TRANSCRIPTION_MAX_PARALLEL")
+    
+    # Режим работы: polling или webhook
+    bot_mode: str = Field(default="polling", env="BOT_MODE")
+    webhook_url: Optional[str] = Field(default=None, env="WEBHOOK_URL")  # публичный https URL вебхука
+    webhook_path: str = Field(default="/telegram", env="WEBHOOK_PATH")
+    webhook_secret: Optional[str] = Field(default=None, env="WEBHOOK_SECRET")
+    webhook_max_connections: int = Field(default=40, env="WEBHOOK_MAX_CONNECTIONS")
+    http_host: str = Field(default="0.0.0.0", env="HTTP_HOST")
+    http_port: int = Field(default=8000, env="HTTP_PORT")
+    metrics_enabled: bool = Field(default=False, env="METRICS_ENABLED")  # GET /metrics на HTTP_PORT (и в режиме polling) без авторизации
+    metrics_path: str = Field(default="/metrics", env="METRICS_PATH")
+    concurrent_updates: int = Field(default=64, env="CONCURRENT_UPDATES")  # одновременно выполняемые обновления
+    max_pending_updates_per_user: int = Field(default=3, env="MAX_PENDING_UPDATES_PER_USER")
+    max_queued_updates: int = Field(default=1024, env="MAX_QUEUED_UPDATES")
+    update_overflow_wait: float = Field(default=10.0, env="UPDATE_OVERFLOW_WAIT")  # секунды ожидания места сверх лимита
     
     # Кастомные улучшатели
     max_custom_enhancers: int = Field(default=3, env="MAX_CUSTOM_ENHANCERS")
     
+    # Хранилище пользователей (.json — старый формат, иначе SQLite)
+    user_storage_file: str = Field(default="data/users.db", env="USER_STORAGE_FILE")
+    user_flush_delay: float = Field(default=0.5, env="USER_FLUSH_DELAY")  # секунды до пакетного сохранения
+    max_hot_users: int = Field(default=10000, env="MAX_HOT_USERS")  # пользователей в памяти, остальные в хранилище
+    
+    # Кэш результатов OpenAI
+    cache_enabled: bool = Field(default=True, env="CACHE_ENABLED")
+    cache_max_entries: int = Field(default=1024, env="CACHE_MAX_ENTRIES")
+    cache_ttl: int = Field(default=86400, env="CACHE_TTL")  # секунды
+    cache_disk_path: Optional[str] = Field(default=None, env="CACHE_DISK_PATH")  # например data/cache.db
+    cache_disk_max_entries: int = Field(default=100000, env="CACHE_DISK_MAX_ENTRIES")
+    
+    # Классификатор типа текста: local, llm или hybrid
+    classifier_mode: str = Field(default="hybrid", env="CLASSIFIER_MODE")
+    classifier_confidence_threshold: float = Field(default=0.75, env="CLASSIFIER_CONFIDENCE_THRESHOLD")
+    
+    # Тексты, ожидающие выбора улучшения
+    pending_ttl: int = Field(default=86400, env="PENDING_TTL")  # секунды
+    pending_max_entries: int = Field(default=10000, env="PENDING_MAX_ENTRIES")
+    pending_max_bytes: int = Field(default=64 * 1024 * 1024, env="PENDING_MAX_BYTES")
+    pending_store_path: Optional[str] = Field(default=None, env="PENDING_STORE_PATH")  # общий SQLite для реплик
+    pending_preview_length: int = Field(default=300, env="PENDING_PREVIEW_LENGTH")
+    
+    # Потоковая выдача улучшений
+    streaming_enabled: bool = Field(default=True, env="STREAMING_ENABLED")
+    stream_edit_interval: float = Field(default=1.0, env="STREAM_EDIT_INTERVAL")  # секунды между правками
+    
+    # Упреждающее улучшение вероятного варианта, пока пользователь выбирает кнопку
+    speculation_enabled: bool = Field(default=False, env="SPECULATION_ENABLED")
+    speculation_ttl: float = Field(default=120.0, env="SPECULATION_TTL")  # секунды до отмены неиспользованного
+    speculation_max_in_flight: int = Field(default=8, env="SPECULATION_MAX_IN_FLIGHT")
+    speculation_max_text_length: int = Field(default=2000, env="SPECULATION_MAX_TEXT_LENGTH")
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -61,8 +61,26 @@ def run_specific_test(test_file):
         return False
 
 
+def run_benchmarks(bench_args):
+    """Запуск микробенчмарка хранения пользователей (отчет в JSON)"""
+    print("⏱ Запуск бенчмарка UserService...")
+    
+    bench_command = [sys.executable, "-m", "benchmarks.user_service_bench", *bench_args]
+    
+    try:
+        subprocess.run(bench_command, check=True)
+        print("✅ Бенчмарк завершен!")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Бенчмарк завершился с ошибками (код: {e.returncode})")
+        return False
+
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        # Бенчмарк: python run_tests.py --bench [--sizes 10000 --json users.json]
+        success = run_benchmarks(sys.argv[2:])
+    elif len(sys.argv) > 1:
         # Запуск конкретного теста
         test_file = sys.argv[1]
         success = run_specific_test(test_file)
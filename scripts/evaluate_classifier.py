@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Оценка локального классификатора типа текста.
+
+Сравнивает метки локальной модели с живой разметкой analyze_text_type
+(--reference llm, по умолчанию) или, без доступа к OpenAI, с сохраненным
+в корпусе снимком LLM-разметки (--reference corpus).
+
+По умолчанию оценка идет k-кратной перекрестной проверкой: модель каждого
+прохода обучается без своей части корпуса и проверяется только на ней, так что
+цифры показывают качество на незнакомых текстах. --in-sample оценивает файл
+--model на всем корпусе; если модель обучалась на нем же, это завышенная оценка.
+С --train заново обучает модель на всем корпусе.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+
+# Добавляем корневую директорию в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.text_classifier import DEFAULT_MODEL_PATH, LocalTextClassifier, extract_features
+
+
+DEFAULT_CORPUS = os.path.join("tests", "fixtures", "text_type_corpus.jsonl")
+
+
+def load_corpus(path: str) -> list:
+    """Загрузка корпуса в формате JSONL: {"text": ..., "label": "prompt"|"text"}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def label_with_llm(corpus: list) -> list:
+    """Разметка корпуса через OpenAIService.analyze_text_type"""
+    from src.services.openai_service import OpenAIService
+
+    service = OpenAIService()
+    return await asyncio.gather(*(service.analyze_text_type(item["text"]) for item in corpus))
+
+
+def train(corpus: list, epochs: int = 2000, learning_rate: float = 0.1,
+          l2: float = 0.01) -> dict:
+    """Обучение логистической регрессии градиентным спуском"""
+    samples = [(extract_features(item["text"]), 1.0 if item["label"] == "prompt" else 0.0)
+               for item in corpus]
+    names = sorted(samples[0][0])
+    weights = {name: 0.0 for name in names}
+    bias = 0.0
+
+    for _ in range(epochs):
+        grad_w = {name: 0.0 for name in names}
+        grad_b = 0.0
+        for features, target in samples:
+            score = bias + sum(weights[name] * features[name] for name in names)
+            error = 1.0 / (1.0 + math.exp(-score)) - target
+            for name in names:
+                grad_w[name] += error * features[name]
+            grad_b += error
+        for name in names:
+            weights[name] -= learning_rate * (grad_w[name] / len(samples) + l2 * weights[name])
+        bias -= learning_rate * grad_b / len(samples)
+
+    return {
+        "version": 1,
+        "bias": round(bias, 4),
+        "weights": {name: round(value, 4) for name, value in weights.items()}
+    }
+
+
+def folds(size: int, k: int, seed: int = 0) -> list:
+    """Разбиение индексов корпуса на k частей после перемешивания"""
+    indices = list(range(size))
+    random.Random(seed).shuffle(indices)
+    return [sorted(indices[fold::k]) for fold in range(k)]
+
+
+def predict(classifier: LocalTextClassifier, texts: list) -> tuple:
+    """Предсказания и время классификации"""
+    started = time.perf_counter()
+    predictions = [classifier.classify(text) for text in texts]
+    return predictions, time.perf_counter() - started
+
+
+def cross_validate(corpus: list, k: int, seed: int = 0) -> tuple:
+    """Предсказания для каждого текста моделью, обученной без его части корпуса (обучение не хронометрируется)"""
+    predictions = [None] * len(corpus)
+    elapsed = 0.0
+    for held_out in folds(len(corpus), k, seed):
+        held = set(held_out)
+        classifier = LocalTextClassifier(
+            model=train([item for index, item in enumerate(corpus) if index not in held])
+        )
+        fold_predictions, fold_elapsed = predict(classifier, [corpus[index]["text"] for index in held_out])
+        elapsed += fold_elapsed
+        for index, prediction in zip(held_out, fold_predictions):
+            predictions[index] = prediction
+    return predictions, elapsed
+
+
+def evaluate(predictions: list, reference: list, threshold: float, elapsed: float) -> dict:
+    """Согласие предсказаний локальной модели с эталонной разметкой"""
+    agree = 0
+    confident = 0
+    confident_agree = 0
+    confusion = {"prompt": {"prompt": 0, "text": 0}, "text": {"prompt": 0, "text": 0}}
+
+    for (label, confidence), expected in zip(predictions, reference):
+        confusion[expected][label] += 1
+        if label == expected:
+            agree += 1
+        if confidence >= threshold:
+            confident += 1
+            if label == expected:
+                confident_agree += 1
+
+    return {
+        "samples": len(predictions),
+        "agreement": round(agree / len(predictions), 4),
+        "threshold": threshold,
+        "local_coverage": round(confident / len(predictions), 4),
+        "local_agreement": round(confident_agree / confident, 4) if confident else None,
+        "confusion": confusion,
+        "avg_latency_us": round(elapsed / len(predictions) * 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Путь к корпусу JSONL")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Путь к файлу модели")
+    parser.add_argument("--threshold", type=float, default=0.75,
+                        help="Порог уверенности для гибридного режима")
+    parser.add_argument("--reference", choices=("llm", "corpus"), default="llm",
+                        help="Эталон: живая разметка OpenAI или сохраненный в корпусе снимок")
+    parser.add_argument("--folds", type=int, default=5, help="Число частей перекрестной проверки")
+    parser.add_argument("--seed", type=int, default=0, help="Seed перемешивания корпуса")
+    parser.add_argument("--in-sample", action="store_true",
+                        help="Оценить файл --model на всем корпусе вместо перекрестной проверки")
+    parser.add_argument("--train", action="store_true", help="Обучить модель и сохранить в --model")
+    args = parser.parse_args()
+    if not args.in_sample and args.folds < 2:
+        parser.error("--folds должно быть не меньше 2")
+
+    corpus = load_corpus(args.corpus)
+
+    if args.train:
+        model = train(corpus)
+        with open(args.model, "w", encoding="utf-8") as f:
+            json.dump(model, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Модель сохранена: {args.model}")
+
+    if args.reference == "llm":
+        reference = asyncio.run(label_with_llm(corpus))
+    else:
+        print("Эталон — сохраненный снимок разметки, а не текущий ответ LLM", file=sys.stderr)
+        reference = [item["label"] for item in corpus]
+
+    if args.in_sample:
+        predictions, elapsed = predict(LocalTextClassifier(args.model), [item["text"] for item in corpus])
+    else:
+        predictions, elapsed = cross_validate(corpus, args.folds, args.seed)
+
+    report = evaluate(predictions, reference, args.threshold, elapsed)
+    report["reference"] = args.reference
+    report["validation"] = "in_sample" if args.in_sample else f"{args.folds}_fold"
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
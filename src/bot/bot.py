@@ -1,9 +1,23 @@
 import asyncio
+import hmac
+import json
 import logging
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+import signal
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import (
+    Application, BaseUpdateProcessor, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+)
 
 from config.settings import settings
 from src.bot.handlers import BotHandlers
+from src.bot.http_server import HTTPRequest, HTTPResponse, HTTPServer
+from src.services.http_clients import HTTPClients
+from src.services.metrics import registry
+from src.services.prompt_templates import templates
 
 # Настройка логирования
 logging.basicConfig(
@@ -12,13 +26,210 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Метрики планировщика обновлений
+UPDATES_QUEUED = registry.gauge("bot_updates_queued", "Обновления, ожидающие обработки")
+UPDATES_IN_FLIGHT = registry.gauge("bot_updates_in_flight", "Обновления в обработке")
+UPDATES_PROCESSED = registry.counter("bot_updates_processed_total", "Обработанные обновления")
+UPDATES_DROPPED = registry.counter("bot_updates_dropped_total", "Обновления, отброшенные по лимиту пользователя")
+UPDATES_DEFERRED = registry.counter("bot_updates_deferred_total", "Обновления, ждавшие места в очереди пользователя")
+
+# Ответ пользователю, чье обновление отброшено по лимиту
+BUSY_MESSAGE = "⏳ Подождите, предыдущий запрос еще обрабатывается"
+UPDATE_QUEUE_WAIT = registry.histogram("bot_update_queue_wait_seconds", "Время ожидания обновления в очереди")
+PENDING_TEXTS = registry.gauge("bot_pending_texts", "Тексты, ожидающие выбора улучшения")
+
+
+class _UserQueue:
+    """Очередь обновлений одного пользователя"""
+    
+    __slots__ = ("turns", "pending", "waiters")
+    
+    def __init__(self):
+        # Очередность в порядке прихода: обновление выполняется, когда его future в голове завершена
+        self.turns: Deque[asyncio.Future] = deque()
+        # Принятые обновления (ожидающие очереди и выполняемые)
+        self.pending = 0
+        # Обновления сверх лимита, ждущие места; освободившееся место передается первому
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Конкурентная обработка обновлений с порядком внутри пользователя и лимитами"""
+    
+    def __init__(self, max_concurrent: int, max_pending_per_user: int = 3, max_queued: int = 1024,
+                 overflow_wait: float = 10.0):
+        # Базовый семафор ограничивает число принятых обновлений (ожидающих + выполняемых),
+        # собственный — число одновременно выполняемых
+        super().__init__(max(max_queued, max_concurrent, 2))
+        self.max_concurrent = max_concurrent
+        self.max_pending_per_user = max_pending_per_user
+        # Сколько обновление сверх лимита ждет места, прежде чем будет отброшено (секунды)
+        self.overflow_wait = overflow_wait
+        self._running = asyncio.Semaphore(max_concurrent)
+        self._users: Dict[int, _UserQueue] = {}
+    
+    @staticmethod
+    def _user_key(update: object) -> Optional[int]:
+        """Ключ упорядочивания: пользователь, иначе чат"""
+        if isinstance(update, Update):
+            if update.effective_user:
+                return update.effective_user.id
+            if update.effective_chat:
+                return update.effective_chat.id
+        return None
+    
+    async def do_process_update(self, update: object, coroutine) -> None:
+        """Обработка обновления в очереди его пользователя"""
+        key = self._user_key(update)
+        queue = None
+        turn = None
+        if key is not None:
+            queue = self._users.get(key)
+            if queue is None:
+                queue = self._users[key] = _UserQueue()
+            # Очередь занимается при приходе: следующие обновления не обгонят ждущее места
+            turn = asyncio.get_running_loop().create_future()
+            queue.turns.append(turn)
+            if len(queue.turns) == 1:
+                turn.set_result(None)
+            if queue.pending >= self.max_pending_per_user or queue.waiters:
+                if not await self._wait_for_room(queue):
+                    coroutine.close()
+                    UPDATES_DROPPED.inc()
+                    logger.warning(f"Пользователь {key} превысил лимит обновлений в обработке")
+                    self._leave_turn(queue, turn)
+                    self._forget_user(key, queue)
+                    await self._reject(update)
+                    return
+            else:
+                queue.pending += 1
+        
+        UPDATES_QUEUED.inc()
+        queued_at = time.monotonic()
+        dequeued = False
+        try:
+            if turn is not None:
+                await turn
+            async with self._running:
+                UPDATES_QUEUED.dec()
+                dequeued = True
+                UPDATE_QUEUE_WAIT.observe(time.monotonic() - queued_at)
+                UPDATES_IN_FLIGHT.inc()
+                try:
+                    await coroutine
+                finally:
+                    UPDATES_IN_FLIGHT.dec()
+                    UPDATES_PROCESSED.inc()
+        finally:
+            if not dequeued:
+                UPDATES_QUEUED.dec()
+            if queue is not None:
+                self._leave_turn(queue, turn)
+                self._release_slot(queue)
+                self._forget_user(key, queue)
+    
+    async def _wait_for_room(self, queue: _UserQueue) -> bool:
+        """Ожидание места в очереди пользователя не дольше overflow_wait (место передает освободивший)"""
+        if self.overflow_wait <= 0:
+            return False
+        UPDATES_DEFERRED.inc()
+        room = asyncio.get_running_loop().create_future()
+        queue.waiters.append(room)
+        try:
+            await asyncio.wait_for(room, self.overflow_wait)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except BaseException:
+            # Место уже передано, но обновление отменено — отдаем его следующему
+            if room.done() and not room.cancelled():
+                self._release_slot(queue)
+            raise
+        finally:
+            if room in queue.waiters:
+                queue.waiters.remove(room)
+    
+    @staticmethod
+    def _release_slot(queue: _UserQueue):
+        """Освобождение места: сразу первому ждущему (pending не меняется), иначе — уменьшение pending"""
+        while queue.waiters:
+            room = queue.waiters.popleft()
+            if not room.done():
+                room.set_result(None)
+                return
+        queue.pending -= 1
+    
+    @staticmethod
+    def _leave_turn(queue: _UserQueue, turn: asyncio.Future):
+        """Выход из очереди: если обновление было первым, ход переходит к следующему"""
+        if queue.turns and queue.turns[0] is turn:
+            queue.turns.popleft()
+            if queue.turns and not queue.turns[0].done():
+                queue.turns[0].set_result(None)
+        elif turn in queue.turns:
+            queue.turns.remove(turn)
+    
+    def _forget_user(self, key: int, queue: _UserQueue):
+        """Удаление пустой очереди (пока в ней есть ожидающие, она нужна для порядка)"""
+        if queue.pending == 0 and not queue.waiters and not queue.turns and self._users.get(key) is queue:
+            del self._users[key]
+    
+    @staticmethod
+    async def _reject(update: object):
+        """Сообщение пользователю об отброшенном обновлении: без ответа кнопка «крутится» до таймаута"""
+        if not isinstance(update, Update):
+            return
+        try:
+            if update.callback_query is not None:
+                await update.callback_query.answer(BUSY_MESSAGE)
+            elif update.effective_message is not None:
+                await update.effective_message.reply_text(f"{BUSY_MESSAGE}. Отправьте сообщение еще раз позже")
+        except TelegramError as e:
+            logger.warning(f"Не удалось сообщить об отброшенном обновлении: {e}")
+    
+    def stats(self) -> dict:
+        """Текущая загрузка планировщика"""
+        return {
+            "queued": UPDATES_QUEUED.value(),
+            "in_flight": UPDATES_IN_FLIGHT.value(),
+            "processed": UPDATES_PROCESSED.value(),
+            "dropped": UPDATES_DROPPED.value(),
+            "active_users": len(self._users)
+        }
+    
+    async def initialize(self) -> None:
+        """Ресурсы не требуются"""
+    
+    async def shutdown(self) -> None:
+        """Ресурсы не требуются"""
+
 
 class PromptEnhancerBot:
     """Основной класс Telegram бота"""
     
     def __init__(self):
-        self.application = Application.builder().token(settings.telegram_token).build()
-        self.handlers = BotHandlers()
+        # Общие HTTP-клиенты: пулы и таймауты из настроек, прогрев при старте, закрытие в stop()
+        self.http_clients = HTTPClients.from_settings()
+        builder = (
+            Application.builder()
+            .token(settings.telegram_token)
+            .request(self.http_clients.telegram_request())
+            .get_updates_request(self.http_clients.telegram_request(get_updates=True))
+            .concurrent_updates(PerUserUpdateProcessor(
+                max_concurrent=settings.concurrent_updates,
+                max_pending_per_user=settings.max_pending_updates_per_user,
+                max_queued=settings.max_queued_updates,
+                overflow_wait=settings.update_overflow_wait
+            ))
+        )
+        if settings.telegram_base_url:
+            builder.base_url(settings.telegram_base_url)
+        if settings.telegram_base_file_url:
+            builder.base_file_url(settings.telegram_base_file_url)
+        self.application = builder.build()
+        self.handlers = BotHandlers(self.http_clients)
+        self.http_server: Optional[HTTPServer] = None
+        self._stop_event = asyncio.Event()
         self._setup_handlers()
     
     def _setup_handlers(self):
@@ -63,20 +274,85 @@ class PromptEnhancerBot:
                 "❌ Произошла ошибка при обработке запроса. Попробуйте еще раз."
             )
     
+    async def _handle_webhook(self, request: HTTPRequest) -> HTTPResponse:
+        """Прием обновления от Telegram: проверка секрета и быстрый ответ"""
+        secret = request.headers.get("x-telegram-bot-api-secret-token", "")
+        if not hmac.compare_digest(secret, settings.webhook_secret):
+            return HTTPResponse(403, b"Forbidden")
+        
+        try:
+            update = Update.de_json(json.loads(request.body), self.application.bot)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Некорректное обновление в вебхуке: {e}")
+            return HTTPResponse(400, b"Bad Request")
+        
+        # Обработка идет в фоне, Telegram получает ответ сразу
+        await self.application.update_queue.put(update)
+        return HTTPResponse(200, b"OK")
+    
+    async def _handle_metrics(self, request: HTTPRequest) -> HTTPResponse:
+        """Отдача метрик в текстовом формате Prometheus"""
+        PENDING_TEXTS.set(len(self.handlers.pending_store))
+        return HTTPResponse(
+            200, registry.render().encode("utf-8"),
+            content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    
+    def _create_http_server(self) -> HTTPServer:
+        """HTTP-сервер со служебными эндпоинтами"""
+        server = HTTPServer(settings.http_host, settings.http_port)
+        if settings.metrics_enabled:
+            server.add_route("GET", settings.metrics_path, self._handle_metrics)
+        return server
+    
+    async def _start_webhook(self):
+        """Запуск HTTP-сервера и регистрация вебхука"""
+        if not settings.webhook_secret:
+            raise ValueError("Для режима webhook нужно задать WEBHOOK_SECRET")
+        
+        self.http_server = self._create_http_server()
+        self.http_server.add_route("POST", settings.webhook_path, self._handle_webhook)
+        await self.http_server.start()
+        
+        if settings.webhook_url:
+            await self.application.bot.set_webhook(
+                url=settings.webhook_url,
+                secret_token=settings.webhook_secret,
+                allowed_updates=Update.ALL_TYPES,
+                max_connections=settings.webhook_max_connections
+            )
+    
     async def start(self):
         """Запуск бота"""
-        logger.info("Запуск Prompt Enhancer Bot...")
+        logger.info(f"Запуск Prompt Enhancer Bot (режим: {settings.bot_mode})...")
+        for template in templates.report():
+            logger.info(f"Промпт {template['name']} v{template['version']}: ~{template['tokens']} токенов "
+                        f"({template['fingerprint']})")
         
         # Проверяем подключение к Telegram API
         try:
-            await self.application.initialize()
+            # initialize() открывает соединение с Bot API через getMe, параллельно прогреваем OpenAI
+            await asyncio.gather(self.application.initialize(), self.http_clients.warm_up())
             await self.application.start()
-            await self.application.updater.start_polling()
+            
+            if settings.bot_mode == "webhook":
+                await self._start_webhook()
+            else:
+                if settings.metrics_enabled:
+                    self.http_server = self._create_http_server()
+                    await self.http_server.start()
+                await self.application.updater.start_polling()
             
             logger.info("Бот успешно запущен!")
             
-            # Ждем завершения
-            await self.application.updater.idle()
+            # Ждем сигнала остановки
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, self._stop_event.set)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            await self._stop_event.wait()
             
         except Exception as e:
             logger.error(f"Ошибка запуска бота: {e}")
@@ -85,8 +361,15 @@ class PromptEnhancerBot:
     async def stop(self):
         """Остановка бота"""
         logger.info("Остановка бота...")
-        await self.application.stop()
+        if self.http_server is not None:
+            await self.http_server.stop()
+        if self.application.updater and self.application.updater.running:
+            await self.application.updater.stop()
+        if self.application.running:
+            await self.application.stop()
         await self.application.shutdown()
+        await self.handlers.close()
+        await self.http_clients.close()
 
 
 async def main():
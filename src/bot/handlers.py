@@ -1,23 +1,110 @@
 import asyncio
 import tempfile
-import os
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, BinaryIO, Dict, List, Optional, Tuple, Union
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 
+from config.settings import settings
+from src.bot.streaming import ProgressiveMessageEditor
+from src.services.http_clients import HTTPClients
 from src.services.openai_service import OpenAIService
-from src.services.user_service import UserService
-from src.models.enhancement import EnhancementType, EnhancementResponse
+from src.services.user_service import AsyncUserService, UserService
+from src.services.text_classifier import TextTypeClassifier
+from src.services.pending_store import PendingTextStore
+from src.services.transcription import ChunkedTranscriber
+from src.services.speculation import SpeculativeEnhancer
+from src.services.metrics import registry, timed
+from src.models.enhancement import CustomEnhancer, EnhancementType, EnhancementResponse, TextSource
+
+HANDLER_LATENCY = registry.histogram("bot_handler_duration_seconds", "Длительность обработчиков бота")
+HANDLER_ERRORS = registry.counter("bot_handler_errors_total", "Необработанные исключения в обработчиках")
+ENHANCE_ALL_CALLS = registry.counter("enhance_all_calls_total", "Варианты в режиме «Применить все» по исходу")
 
 
 class BotHandlers:
     """Хендлеры для Telegram бота"""
     
-    def __init__(self):
-        self.openai_service = OpenAIService()
-        self.user_service = UserService()
+    ENHANCEMENT_NAMES = {
+        "grammar": "🔤 Улучшение грамматики",
+        "prompt_enhancement": "🚀 Усиление промпта",
+        "custom": "⚙️ Кастомное улучшение"
+    }
+    
+    def __init__(self, http_clients: Optional[HTTPClients] = None):
+        self.openai_service = OpenAIService(http_clients=http_clients)
+        self.user_service = AsyncUserService(
+            UserService(storage_file=settings.user_storage_file, max_hot_users=settings.max_hot_users),
+            flush_delay=settings.user_flush_delay
+        )
+        self.text_classifier = TextTypeClassifier.from_settings(self.openai_service.analyze_text_type)
+        self.pending_store = PendingTextStore.from_settings()
+        self.transcriber = ChunkedTranscriber.from_settings(self.openai_service.transcribe_audio)
+        self.speculator = SpeculativeEnhancer.from_settings(self.openai_service.enhance_text)
+    
+    @staticmethod
+    def _preview(text: str) -> str:
+        """Сокращение текста для показа в сообщениях"""
+        limit = settings.pending_preview_length
+        if len(text) <= limit:
+            return text
+        return text[:limit].rstrip() + "…"
+    
+    @staticmethod
+    def _audio_limit() -> str:
+        """Лимит длительности голосовых для справки"""
+        minutes, seconds = divmod(settings.max_audio_duration, 60)
+        if seconds:
+            return f"{settings.max_audio_duration} сек"
+        return f"{minutes} мин"
+    
+    @staticmethod
+    def _build_enhancement_keyboard(token: str, text_type: str,
+                                    custom_enhancers: List[CustomEnhancer]) -> InlineKeyboardMarkup:
+        """Клавиатура с вариантами улучшения для сохраненного текста"""
+        keyboard = []
+        
+        if text_type == "prompt":
+            keyboard.append([
+                InlineKeyboardButton("🚀 Усилить промпт", callback_data=f"enhance:prompt_enhancement:{token}")
+            ])
+        
+        keyboard.append([
+            InlineKeyboardButton("🔤 Улучшить грамматику", callback_data=f"enhance:grammar:{token}")
+        ])
+        
+        # Добавляем кастомные улучшатели
+        for enhancer in custom_enhancers:
+            keyboard.append([
+                InlineKeyboardButton(
+                    f"⚙️ {enhancer.name}", 
+                    callback_data=f"enhance:custom:{token}:{enhancer.id}"
+                )
+            ])
+        
+        # Все варианты сразу, если их больше одного
+        if len(keyboard) > 1:
+            keyboard.append([
+                InlineKeyboardButton("✨ Применить все", callback_data=f"enhance_all:{token}")
+            ])
+        
+        return InlineKeyboardMarkup(keyboard)
+    
+    async def _prepare_enhancement(self, text: str, user_id: int, source: TextSource,
+                                   custom_enhancers: Optional[Awaitable[List[CustomEnhancer]]] = None
+                                   ) -> InlineKeyboardMarkup:
+        """Сохранение текста и клавиатура: классификация и чтение настроек идут параллельно"""
+        if custom_enhancers is None:
+            custom_enhancers = self.user_service.list_custom_enhancers(user_id)
+        text_type, enhancers = await asyncio.gather(self.text_classifier.classify(text), custom_enhancers)
+        
+        token = await self.pending_store.put(text, user_id, source)
+        if self.speculator is not None:
+            self.speculator.start(token, text, user_id, text_type)
+        return self._build_enhancement_keyboard(token, text_type, enhancers)
     
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="start")
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /start"""
         welcome_text = """
@@ -47,9 +134,10 @@ class BotHandlers:
             parse_mode=ParseMode.MARKDOWN
         )
     
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="help")
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /help"""
-        help_text = """
+        help_text = f"""
 📚 **Справка по использованию бота**
 
 **Типы улучшений:**
@@ -69,9 +157,13 @@ class BotHandlers:
 - До 3 ваших собственных правил
 - Настройка через /settings
 
+✨ **Применить все**
+- Все подходящие улучшения одним нажатием
+- Результаты приходят одним сообщением
+
 **Поддерживаемые форматы:**
 - Текстовые сообщения
-- Голосовые сообщения (до 60 сек)
+- Голосовые сообщения (до {self._audio_limit()})
 
 **Ограничения:**
 - Максимум 4096 символов на сообщение
@@ -83,10 +175,11 @@ class BotHandlers:
             parse_mode=ParseMode.MARKDOWN
         )
     
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="settings")
     async def settings_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды /settings"""
         user_id = update.effective_user.id
-        custom_enhancers = self.user_service.list_custom_enhancers(user_id)
+        custom_enhancers = await self.user_service.list_custom_enhancers(user_id)
         
         if not custom_enhancers:
             text = "🔧 **Настройки кастомных улучшателей**\n\nУ вас пока нет кастомных улучшателей."
@@ -122,121 +215,83 @@ class BotHandlers:
             reply_markup=reply_markup
         )
     
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="text")
     async def handle_text_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка текстовых сообщений"""
         text = update.message.text
         user_id = update.effective_user.id
         
         # Анализируем тип текста
-        text_type = await self.openai_service.analyze_text_type(text)
-        
-        # Создаем клавиатуру с вариантами улучшения
-        keyboard = []
-        
-        if text_type == "prompt":
-            keyboard.append([
-                InlineKeyboardButton("🚀 Усилить промпт", callback_data=f"enhance:prompt_enhancement:{user_id}")
-            ])
-        
-        keyboard.append([
-            InlineKeyboardButton("🔤 Улучшить грамматику", callback_data=f"enhance:grammar:{user_id}")
-        ])
-        
-        # Добавляем кастомные улучшатели
-        custom_enhancers = self.user_service.list_custom_enhancers(user_id)
-        for enhancer in custom_enhancers:
-            keyboard.append([
-                InlineKeyboardButton(
-                    f"⚙️ {enhancer.name}", 
-                    callback_data=f"enhance:custom:{user_id}:{enhancer.id}"
-                )
-            ])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = await self._prepare_enhancement(text, user_id, TextSource.TEXT)
         
         await update.message.reply_text(
-            f"📝 **Ваш текст:**\n\n{text}\n\nВыберите тип улучшения:",
+            f"📝 **Ваш текст:**\n\n{self._preview(text)}\n\nВыберите тип улучшения:",
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=reply_markup
         )
     
+    @asynccontextmanager
+    async def _download_voice(self, context: ContextTypes.DEFAULT_TYPE, voice) -> AsyncIterator[Union[bytes, BinaryIO]]:
+        """Скачивание голосового в память; крупные файлы — в SpooledTemporaryFile, удаляемый после обработки"""
+        file = await context.bot.get_file(voice.file_id)
+        size = file.file_size or voice.file_size or 0
+        if size > settings.max_voice_file_size:
+            raise ValueError("файл слишком большой")
+        if size <= settings.voice_spool_threshold:
+            yield bytes(await file.download_as_bytearray())
+            return
+        
+        with tempfile.SpooledTemporaryFile(max_size=settings.voice_spool_threshold) as buffer:
+            await file.download_to_memory(out=buffer)
+            yield buffer
+    
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="voice")
     async def handle_voice_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка голосовых сообщений"""
         voice = update.message.voice
         user_id = update.effective_user.id
         
         # Проверяем длительность
-        if voice.duration > 60:
+        if voice.duration > settings.max_audio_duration:
             await update.message.reply_text(
-                "⚠️ Голосовое сообщение слишком длинное. Максимум 60 секунд."
+                f"⚠️ Голосовое сообщение слишком длинное. Максимум {settings.max_audio_duration} секунд."
             )
             return
         
+        # Проверяем размер файла до скачивания
+        if voice.file_size and voice.file_size > settings.max_voice_file_size:
+            await update.message.reply_text("⚠️ Голосовое сообщение слишком большое.")
+            return
+        
         # Отправляем сообщение о обработке
         processing_msg = await update.message.reply_text("🎤 Обрабатываю голосовое сообщение...")
         
+        # Настройки пользователя читаем, пока идет распознавание
+        custom_enhancers = asyncio.create_task(self.user_service.list_custom_enhancers(user_id))
+        
         try:
-            # Скачиваем файл
-            file = await context.bot.get_file(voice.file_id)
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".ogg") as temp_file:
-                await file.download_to_drive(temp_file.name)
-                temp_path = temp_file.name
-            
-            # Транскрибируем
-            transcribed_text = await self.openai_service.transcribe_audio(temp_path)
-            
-            # Удаляем временный файл
-            os.unlink(temp_path)
-            
-            # Обновляем сообщение
-            await processing_msg.edit_text(
-                f"🎤 **Распознанный текст:**\n\n{transcribed_text}\n\nВыберите тип улучшения:",
-                parse_mode=ParseMode.MARKDOWN
-            )
-            
-            # Создаем клавиатуру
-            keyboard = []
+            # Скачиваем и транскрибируем без промежуточной записи на диск
+            async with self._download_voice(context, voice) as audio:
+                transcribed_text = await self.transcriber.transcribe(audio)
             
             # Анализируем тип текста
-            text_type = await self.openai_service.analyze_text_type(transcribed_text)
-            
-            if text_type == "prompt":
-                keyboard.append([
-                    InlineKeyboardButton("🚀 Усилить промпт", callback_data=f"enhance:prompt_enhancement:{user_id}")
-                ])
-            
-            keyboard.append([
-                InlineKeyboardButton("🔤 Улучшить грамматику", callback_data=f"enhance:grammar:{user_id}")
-            ])
-            
-            # Добавляем кастомные улучшатели
-            custom_enhancers = self.user_service.list_custom_enhancers(user_id)
-            for enhancer in custom_enhancers:
-                keyboard.append([
-                    InlineKeyboardButton(
-                        f"⚙️ {enhancer.name}", 
-                        callback_data=f"enhance:custom:{user_id}:{enhancer.id}"
-                    )
-                ])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = await self._prepare_enhancement(
+                transcribed_text, user_id, TextSource.VOICE, custom_enhancers
+            )
             
-            # Отправляем новое сообщение с кнопками
-            await update.message.reply_text(
-                f"📝 **Распознанный текст:**\n\n{transcribed_text}\n\nВыберите тип улучшения:",
+            # Одно редактирование сообщения о обработке: текст и кнопки
+            await processing_msg.edit_text(
+                f"🎤 **Распознанный текст:**\n\n{self._preview(transcribed_text)}\n\nВыберите тип улучшения:",
                 parse_mode=ParseMode.MARKDOWN,
                 reply_markup=reply_markup
             )
             
-            # Удаляем сообщение о обработке
-            await processing_msg.delete()
-            
         except Exception as e:
+            custom_enhancers.cancel()
             await processing_msg.edit_text(f"❌ Ошибка обработки аудио: {str(e)}")
     
     async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработка callback запросов от кнопок"""
+        """Обработка callback запросов от кнопок (время учитывает обработчик конкретной кнопки)"""
         query = update.callback_query
         await query.answer()
         
@@ -244,6 +299,8 @@ class BotHandlers:
         
         if data.startswith("enhance:"):
             await self._handle_enhancement_callback(query, data)
+        elif data.startswith("enhance_all:"):
+            await self._handle_enhance_all_callback(query, data)
         elif data == "add_enhancer":
             await self._handle_add_enhancer_callback(query)
         elif data.startswith("remove_enhancer:"):
@@ -251,75 +308,180 @@ class BotHandlers:
         elif data == "back_to_main":
             await self._handle_back_to_main_callback(query)
     
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="enhancement")
     async def _handle_enhancement_callback(self, query, data: str):
         """Обработка callback для улучшения текста"""
         parts = data.split(":")
         enhancement_type = parts[1]
-        user_id = int(parts[2])
         
-        # Получаем текст из предыдущего сообщения
-        message_text = query.message.text
-        text_start = message_text.find("**Ваш текст:**\n\n") + 15
-        text_end = message_text.find("\n\nВыберите тип улучшения:")
-        
-        if text_start == -1 or text_end == -1:
-            # Пробуем найти в другом формате
-            text_start = message_text.find("**Распознанный текст:**\n\n") + 22
-            text_end = message_text.find("\n\nВыберите тип улучшения:")
-        
-        if text_start == -1 or text_end == -1:
-            await query.edit_message_text("❌ Не удалось найти текст для улучшения")
+        # Получаем исходный текст по токену из callback_data
+        pending = await self.pending_store.get(parts[2])
+        if pending is None:
+            await query.edit_message_text("❌ Текст устарел. Отправьте его еще раз")
             return
         
-        original_text = message_text[text_start:text_end].strip()
+        original_text = pending.text
+        user_id = pending.user_id
         
         # Отправляем сообщение о обработке
         processing_msg = await query.message.reply_text("🔄 Улучшаю текст...")
         
+        editor = ProgressiveMessageEditor(processing_msg, min_interval=settings.stream_edit_interval)
+        
         try:
+            custom_prompt = None
             if enhancement_type == "custom":
                 enhancer_id = parts[3]
-                custom_enhancer = self.user_service.get_custom_enhancer(user_id, enhancer_id)
+                custom_enhancer = await self.user_service.get_custom_enhancer(user_id, enhancer_id)
                 if not custom_enhancer:
                     await processing_msg.edit_text("❌ Кастомный улучшатель не найден")
                     return
-                
-                response = await self.openai_service.enhance_text(
-                    original_text, 
-                    EnhancementType.CUSTOM, 
-                    custom_enhancer.prompt
+                custom_prompt = custom_enhancer.prompt
+            
+            speculated = None
+            if self.speculator is not None:
+                speculated = await self.speculator.take(parts[2], EnhancementType(enhancement_type))
+            
+            if speculated is not None:
+                enhanced_text = speculated.enhanced_text
+            elif settings.streaming_enabled:
+                enhanced_text = await self._stream_enhancement(
+                    editor, original_text, EnhancementType(enhancement_type), custom_prompt
                 )
             else:
                 response = await self.openai_service.enhance_text(
                     original_text, 
-                    EnhancementType(enhancement_type)
+                    EnhancementType(enhancement_type), 
+                    custom_prompt
                 )
+                enhanced_text = response.enhanced_text
             
             # Формируем ответ
-            enhancement_names = {
-                "grammar": "🔤 Улучшение грамматики",
-                "prompt_enhancement": "🚀 Усиление промпта",
-                "custom": "⚙️ Кастомное улучшение"
-            }
-            
             result_text = f"""
-{enhancement_names.get(enhancement_type, "Улучшение")}
+{self.ENHANCEMENT_NAMES.get(enhancement_type, "Улучшение")}
 
 📝 **Исходный текст:**
-{original_text}
+{self._preview(original_text)}
 
 ✨ **Улучшенный текст:**
-{response.enhanced_text}
+{enhanced_text}
             """
             
-            await processing_msg.edit_text(
-                result_text,
-                parse_mode=ParseMode.MARKDOWN
+            await editor.finish(result_text, parse_mode=ParseMode.MARKDOWN)
+            
+        except Exception as e:
+            await editor.stop()
+            await processing_msg.edit_text(f"❌ Ошибка улучшения: {str(e)}")
+    
+    async def _collect_enhancements(self, keyboard: Optional[InlineKeyboardMarkup],
+                                    user_id: int) -> List[Tuple[str, EnhancementType, Optional[str]]]:
+        """Варианты улучшения из кнопок сообщения: название, тип и кастомный промпт"""
+        jobs = []
+        for row in keyboard.inline_keyboard if keyboard else ():
+            for button in row:
+                parts = (button.callback_data or "").split(":")
+                if parts[0] != "enhance":
+                    continue
+                custom_prompt = None
+                label = self.ENHANCEMENT_NAMES.get(parts[1], "Улучшение")
+                if parts[1] == "custom":
+                    enhancer = await self.user_service.get_custom_enhancer(user_id, parts[3])
+                    if enhancer is None:
+                        continue
+                    custom_prompt = enhancer.prompt
+                    label = f"⚙️ {enhancer.name}"
+                jobs.append((label, EnhancementType(parts[1]), custom_prompt))
+        return jobs
+    
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="enhance_all")
+    async def _handle_enhance_all_callback(self, query, data: str):
+        """Все улучшения текста параллельно с выводом в одном сообщении"""
+        token = data.split(":")[1]
+        pending = await self.pending_store.get(token)
+        if pending is None:
+            await query.edit_message_text("❌ Текст устарел. Отправьте его еще раз")
+            return
+        
+        jobs = await self._collect_enhancements(query.message.reply_markup, pending.user_id)
+        if not jobs:
+            await query.message.reply_text("❌ Нет доступных вариантов улучшения")
+            return
+        
+        # Варианты с одинаковым системным промптом запрашиваются один раз
+        groups: Dict[str, List] = {}
+        for label, enhancement_type, custom_prompt in jobs:
+            system_prompt = self.openai_service.system_prompt(enhancement_type, custom_prompt)
+            group = groups.setdefault(system_prompt, [[], enhancement_type, custom_prompt])
+            group[0].append(label)
+        ENHANCE_ALL_CALLS.inc(len(jobs) - len(groups), outcome="deduplicated")
+        
+        processing_msg = await query.message.reply_text(f"🔄 Применяю улучшения: {len(groups)}...")
+        
+        speculated_type = self.speculator.pending_type(token) if self.speculator is not None else None
+        
+        async def run(enhancement_type: EnhancementType, custom_prompt: Optional[str]) -> str:
+            if enhancement_type == speculated_type:
+                speculated = await self.speculator.take(token, enhancement_type)
+                if speculated is not None:
+                    ENHANCE_ALL_CALLS.inc(outcome="speculated")
+                    return speculated.enhanced_text
+            ENHANCE_ALL_CALLS.inc(outcome="sent")
+            response = await self.openai_service.enhance_text(pending.text, enhancement_type, custom_prompt)
+            return response.enhanced_text
+        
+        editor = ProgressiveMessageEditor(processing_msg, min_interval=settings.stream_edit_interval)
+        
+        try:
+            # Общее ожидание — самый долгий запрос, а не сумма всех
+            results = await asyncio.gather(
+                *(run(enhancement_type, custom_prompt) for _, enhancement_type, custom_prompt in groups.values()),
+                return_exceptions=True
             )
             
+            sections = []
+            for (labels, _, _), result in zip(groups.values(), results):
+                if isinstance(result, Exception):
+                    sections.append((", ".join(labels), f"❌ Ошибка улучшения: {result}"))
+                else:
+                    sections.append((", ".join(labels), result))
+            
+            # Обрезка и разметка из ответов модели могут сломать Markdown — finish повторит без него
+            await editor.finish(self._render_all(pending.text, sections), parse_mode=ParseMode.MARKDOWN)
+            
         except Exception as e:
+            await editor.stop()
             await processing_msg.edit_text(f"❌ Ошибка улучшения: {str(e)}")
     
+    def _render_all(self, original_text: str, sections: List[Tuple[str, str]]) -> str:
+        """Одно сообщение со всеми результатами в пределах лимита длины"""
+        header = f"✨ **Все улучшения**\n\n📝 **Исходный текст:**\n{self._preview(original_text)}\n"
+        titles = [f"\n**{label}:**\n" for label, _ in sections]
+        budget = settings.max_message_length - len(header) - sum(len(title) for title in titles)
+        # Длинные результаты обрезаются поровну, короткие отдают свой запас остальным
+        remaining = sorted(range(len(sections)), key=lambda index: len(sections[index][1]))
+        limits = {}
+        for position, index in enumerate(remaining):
+            share = max(0, budget) // (len(remaining) - position)
+            text = sections[index][1]
+            limits[index] = text if len(text) <= share else text[:max(0, share - 1)].rstrip() + "…"
+            budget -= len(limits[index])
+        return header + "".join(title + limits[index] for index, title in enumerate(titles))
+    
+    async def _stream_enhancement(self, editor: ProgressiveMessageEditor, text: str,
+                                  enhancement_type: EnhancementType,
+                                  custom_prompt: Optional[str] = None) -> str:
+        """Потоковое улучшение с постепенным обновлением сообщения"""
+        enhanced_text = ""
+        editor.start()
+        try:
+            async for delta in self.openai_service.enhance_text_stream(text, enhancement_type, custom_prompt):
+                enhanced_text += delta
+                editor.update(f"✨ {enhanced_text}")
+        finally:
+            await editor.stop()
+        return enhanced_text.strip()
+    
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="add_enhancer_menu")
     async def _handle_add_enhancer_callback(self, query):
         """Обработка добавления улучшателя"""
         await query.edit_message_text(
@@ -331,18 +493,20 @@ class BotHandlers:
             parse_mode=ParseMode.MARKDOWN
         )
     
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="remove_enhancer")
     async def _handle_remove_enhancer_callback(self, query, data: str):
         """Обработка удаления улучшателя"""
         enhancer_id = data.split(":")[1]
         user_id = query.from_user.id
         
-        success = self.user_service.remove_custom_enhancer(user_id, enhancer_id)
+        success = await self.user_service.remove_custom_enhancer(user_id, enhancer_id)
         
         if success:
             await query.edit_message_text("✅ Улучшатель удален!")
         else:
             await query.edit_message_text("❌ Не удалось удалить улучшатель")
     
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="back_to_main")
     async def _handle_back_to_main_callback(self, query):
         """Обработка возврата в главное меню"""
         await query.edit_message_text(
@@ -351,6 +515,15 @@ class BotHandlers:
             parse_mode=ParseMode.MARKDOWN
         )
     
+    async def close(self):
+        """Сохранение данных при остановке бота"""
+        if self.speculator is not None:
+            self.speculator.close()
+        await self.user_service.close()
+        await self.openai_service.close()
+        await asyncio.to_thread(self.pending_store.close)
+    
+    @timed(HANDLER_LATENCY, HANDLER_ERRORS, handler="add_enhancer")
     async def handle_add_enhancer_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработка команды добавления улучшателя"""
         if not context.args:
@@ -377,7 +550,7 @@ class BotHandlers:
         prompt = parts[2].strip() if len(parts) > 2 else parts[1].strip()
         
         user_id = update.effective_user.id
-        success = self.user_service.add_custom_enhancer(user_id, name, prompt, description)
+        success = await self.user_service.add_custom_enhancer(user_id, name, prompt, description)
         
         if success:
             await update.message.reply_text(f"✅ Улучшатель '{name}' добавлен!")
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HTTPRequest:
+    """Входящий HTTP-запрос"""
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes = b""
+
+
+@dataclass
+class HTTPResponse:
+    """Ответ на HTTP-запрос"""
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+RouteHandler = Callable[[HTTPRequest], Awaitable[HTTPResponse]]
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPServer:
+    """Минимальный асинхронный HTTP/1.1 сервер для вебхука и служебных эндпоинтов"""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8000,
+                 max_body_size: int = 1024 * 1024, read_timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+        self.read_timeout = read_timeout
+        self._routes: Dict[Tuple[str, str], RouteHandler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    def add_route(self, method: str, path: str, handler: RouteHandler):
+        """Регистрация обработчика для метода и пути"""
+        self._routes[(method.upper(), path)] = handler
+
+    @property
+    def bound_port(self) -> int:
+        """Фактический порт (полезно при port=0)"""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self):
+        """Запуск сервера"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"HTTP-сервер слушает {self.host}:{self.bound_port}")
+
+    async def stop(self):
+        """Остановка сервера"""
+        if self._server is not None:
+            self._server.close()
+            # Keep-alive соединения клиентов закрываем сами, иначе обработчики повиснут до отмены
+            connections = dict(self._connections)
+            for writer in connections:
+                writer.close()
+            await asyncio.gather(*connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обработка соединения (с поддержкой keep-alive)"""
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request = await asyncio.wait_for(self._read_request(reader), self.read_timeout)
+                if request is None:
+                    break
+                if isinstance(request, HTTPResponse):
+                    await self._write_response(writer, request, keep_alive=False)
+                    break
+
+                response = await self._dispatch(request)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Чтение одного запроса; HTTPResponse — если запрос некорректен"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return HTTPResponse(400, b"Bad Request")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            return HTTPResponse(400, b"Bad Request")
+        if length > self.max_body_size:
+            return HTTPResponse(413, b"Payload Too Large")
+
+        body = await reader.readexactly(length) if length else b""
+        path = unquote(target.split("?", 1)[0])
+        return HTTPRequest(method=method.upper(), path=path, headers=headers, body=body)
+
+    async def _dispatch(self, request: HTTPRequest) -> HTTPResponse:
+        """Вызов обработчика маршрута"""
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in self._routes):
+                return HTTPResponse(405, b"Method Not Allowed")
+            return HTTPResponse(404, b"Not Found")
+
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Ошибка обработки {request.method} {request.path}: {e}")
+            return HTTPResponse(500, b"Internal Server Error")
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, response: HTTPResponse, keep_alive: bool):
+        """Отправка ответа"""
+        reason = _REASONS.get(response.status, "Unknown")
+        headers = {
+            "Content-Type": response.content_type,
+            "Content-Length": str(len(response.body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **response.headers
+        }
+        head = f"HTTP/1.1 {response.status} {reason}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        ) + "\r\n"
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressiveMessageEditor:
+    """Постепенное обновление сообщения Telegram с ограничением частоты правок"""
+
+    # Максимальная длина сообщения в Telegram
+    MAX_LENGTH = 4096
+    # Финальная правка: не больше попыток и не дольше дедлайна (секунды), даже если Telegram просит ждать
+    FINISH_ATTEMPTS = 5
+    FINISH_DEADLINE = 60.0
+
+    def __init__(self, message, min_interval: float = 1.0, min_delta: int = 20,
+                 cursor: str = " ▌"):
+        self.message = message
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.cursor = cursor
+
+        self._text = ""
+        self._shown = ""
+        self._next_edit_at = 0.0
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Счетчики
+        self.edits = 0
+        self.coalesced = 0
+
+    def start(self):
+        """Запуск фоновой отправки промежуточных правок"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def update(self, text: str):
+        """Новый промежуточный текст (правки объединяются, пока действует лимит)"""
+        if self._changed.is_set():
+            self.coalesced += 1
+        self._text = text
+        self._changed.set()
+
+    async def _run(self):
+        """Цикл промежуточных правок не чаще min_interval"""
+        while True:
+            await self._changed.wait()
+
+            delay = self._next_edit_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._changed.clear()
+
+            text = self._text
+            if len(text) - len(self._shown) < self.min_delta:
+                continue
+            await self._edit(text + self.cursor)
+            self._shown = text
+
+    async def _edit(self, text: str, parse_mode: Optional[str] = None) -> bool:
+        """Правка сообщения с учетом лимитов Telegram"""
+        if len(text) > self.MAX_LENGTH:
+            text = text[:self.MAX_LENGTH - 1] + "…"
+
+        try:
+            await self.message.edit_text(text, parse_mode=parse_mode)
+        except RetryAfter as e:
+            # Telegram просит подождать — откладываем следующую правку
+            self._next_edit_at = time.monotonic() + e.retry_after
+            return False
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+
+        self.edits += 1
+        self._next_edit_at = time.monotonic() + self.min_interval
+        return True
+
+    async def stop(self):
+        """Остановка промежуточных правок"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.warning(f"Ошибка промежуточной правки сообщения: {e}")
+            self._task = None
+
+    async def finish(self, text: str, parse_mode: Optional[str] = None) -> bool:
+        """Финальная правка сообщения с ограниченными повторами; False, если доставить не удалось"""
+        await self.stop()
+
+        deadline = time.monotonic() + self.FINISH_DEADLINE
+        for _ in range(self.FINISH_ATTEMPTS):
+            delay = self._next_edit_at - time.monotonic()
+            if delay > 0:
+                if time.monotonic() + delay > deadline:
+                    break
+                await asyncio.sleep(delay)
+            try:
+                if await self._edit(text, parse_mode=parse_mode):
+                    return True
+            except BadRequest as e:
+                if parse_mode is None or "can't parse entities" not in str(e).lower():
+                    raise
+                # Обрезка по лимиту или сам ответ разорвали разметку — отправляем без форматирования
+                logger.warning(f"Финальная правка без разметки: {e}")
+                parse_mode = None
+
+        logger.warning(f"Финальная правка сообщения не доставлена за {self.FINISH_ATTEMPTS} попыток")
+        return False
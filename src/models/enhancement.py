@@ -10,6 +10,12 @@ class EnhancementType(str, Enum):
     CUSTOM = "custom"
 
 
+class TextSource(str, Enum):
+    """Источник текста"""
+    TEXT = "text"
+    VOICE = "voice"
+
+
 class CustomEnhancer(BaseModel):
     """Модель кастомного улучшателя"""
     id: str
@@ -37,4 +43,13 @@ class UserSettings(BaseModel):
     """Настройки пользователя"""
     user_id: int
     custom_enhancers: List[CustomEnhancer] = Field(default_factory=list)
-    language: str = Field(default="ru") 
\ No newline at end of file
+    language: str = Field(default="ru") 
+
+
+class PendingText(BaseModel):
+    """Текст, ожидающий выбора типа улучшения"""
+    token: str
+    text: str
+    user_id: int
+    source: TextSource = TextSource.TEXT
+    created_at: float
@@ -0,0 +1,292 @@
+import io
+import statistics
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+# Заголовок страницы Ogg: сигнатура, версия, флаги, гранула, серийный номер, номер страницы, CRC, число сегментов
+_PAGE_HEADER = struct.Struct("<4sBBqIIIB")
+_CRC_OFFSET = 22
+
+_FLAG_CONTINUED = 0x01
+_FLAG_BOS = 0x02
+_FLAG_EOS = 0x04
+
+# Opus всегда тактируется на 48 кГц
+OPUS_SAMPLE_RATE = 48000
+
+
+class OggOpusError(ValueError):
+    """Данные не являются поддерживаемым потоком Ogg/Opus"""
+
+
+def _crc_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 24
+        for _ in range(8):
+            crc = (crc << 1) ^ 0x04C11DB7 if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def ogg_crc(data: bytes) -> int:
+    """CRC-32 страницы Ogg (полином 0x04C11DB7 без отражения)"""
+    crc = 0
+    table = _CRC_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ table[(crc >> 24) ^ byte]
+    return crc
+
+
+def iter_pages(stream: BinaryIO) -> Iterator[Tuple[int, List[bytes]]]:
+    """Постраничное чтение Ogg из файла: серийный номер и пакеты, завершенные на странице"""
+    current = bytearray()
+    serial = None
+
+    while True:
+        header = stream.read(_PAGE_HEADER.size)
+        if not header:
+            break
+        if len(header) < _PAGE_HEADER.size:
+            raise OggOpusError("Обрезанная страница Ogg")
+        capture, _, _, _, page_serial, _, _, segments = _PAGE_HEADER.unpack(header)
+        if capture != b"OggS":
+            raise OggOpusError("Нет сигнатуры страницы Ogg")
+        if serial is None:
+            serial = page_serial
+        elif page_serial != serial:
+            raise OggOpusError("Поддерживается только один логический поток")
+
+        lacings = stream.read(segments)
+        body = stream.read(sum(lacings))
+        if len(lacings) < segments or len(body) < sum(lacings):
+            raise OggOpusError("Обрезанная страница Ogg")
+
+        packets: List[bytes] = []
+        position = 0
+        for lacing in lacings:
+            current += body[position:position + lacing]
+            position += lacing
+            if lacing < 255:
+                packets.append(bytes(current))
+                current = bytearray()
+        yield serial, packets
+
+    if serial is None:
+        raise OggOpusError("Пустой поток Ogg")
+
+
+def read_packets(data: bytes) -> Tuple[int, List[bytes]]:
+    """Разбор потока Ogg на пакеты; возвращает серийный номер и пакеты"""
+    packets: List[bytes] = []
+    serial = None
+    for serial, page_packets in iter_pages(io.BytesIO(data)):
+        packets += page_packets
+    return serial, packets
+
+
+def opus_packet_samples(packet: bytes) -> int:
+    """Длительность пакета Opus в отсчетах 48 кГц (по байту TOC)"""
+    if not packet:
+        return 0
+    config = packet[0] >> 3
+    if config < 12:
+        frame = (480, 960, 1920, 2880)[config % 4]  # SILK: 10/20/40/60 мс
+    elif config < 16:
+        frame = (480, 960)[config % 2]  # Hybrid: 10/20 мс
+    else:
+        frame = (120, 240, 480, 960)[config % 4]  # CELT: 2.5/5/10/20 мс
+
+    code = packet[0] & 0x03
+    if code == 0:
+        frames = 1
+    elif code < 3:
+        frames = 2
+    else:
+        frames = packet[1] & 0x3F if len(packet) > 1 else 0
+    return frame * frames
+
+
+class _PageWriter:
+    """Упаковка пакетов в страницы Ogg"""
+
+    TARGET_PAGE_SIZE = 4096
+
+    def __init__(self, serial: int):
+        self.serial = serial
+        self.sequence = 0
+        self.output = bytearray()
+        self._segments: List[int] = []
+        self._body = bytearray()
+        self._granule = -1
+        self._continued = False
+
+    def add(self, packet: bytes, granule: int):
+        """Добавление пакета, заканчивающегося на грануле granule"""
+        lacing = [255] * (len(packet) // 255) + [len(packet) % 255]
+        offset = 0
+        for index, value in enumerate(lacing):
+            if len(self._segments) == 255:
+                self._emit(mid_packet=index > 0)
+            self._segments.append(value)
+            self._body += packet[offset:offset + value]
+            offset += value
+        self._granule = granule
+        if len(self._body) >= self.TARGET_PAGE_SIZE:
+            self._emit()
+
+    def flush(self, eos: bool = False):
+        """Завершение текущей страницы"""
+        if self._segments or eos:
+            self._emit(eos=eos)
+
+    def _emit(self, eos: bool = False, mid_packet: bool = False):
+        flags = (_FLAG_CONTINUED if self._continued else 0) | (_FLAG_BOS if self.sequence == 0 else 0)
+        if eos:
+            flags |= _FLAG_EOS
+        page = bytearray(_PAGE_HEADER.pack(
+            b"OggS", 0, flags, self._granule, self.serial, self.sequence, 0, len(self._segments)
+        ))
+        page += bytes(self._segments)
+        page += self._body
+        struct.pack_into("<I", page, _CRC_OFFSET, ogg_crc(page))
+        self.output += page
+
+        self.sequence += 1
+        self._segments = []
+        self._body = bytearray()
+        self._granule = -1
+        self._continued = mid_packet
+
+
+def write_stream(serial: int, head: bytes, tags: bytes, audio: Sequence[bytes]) -> bytes:
+    """Сборка самостоятельного файла Ogg/Opus из заголовков и аудиопакетов"""
+    writer = _PageWriter(serial)
+    writer.add(head, 0)
+    writer.flush()
+    writer.add(tags, 0)
+    writer.flush()
+
+    granule = struct.unpack_from("<H", head, 10)[0]  # pre-skip
+    for packet in audio:
+        granule += opus_packet_samples(packet)
+        writer.add(packet, granule)
+    writer.flush(eos=True)
+    return bytes(writer.output)
+
+
+def find_cut_points(sizes: Sequence[int], durations: Sequence[float], chunk_duration: float,
+                    max_chunk_duration: float, min_silence: float = 0.3,
+                    silence_ratio: float = 0.5, min_tail: float = 2.0) -> List[int]:
+    """Индексы пакетов, с которых начинаются новые части: середина первой паузы после chunk_duration,
+    либо жесткий разрез на max_chunk_duration"""
+    # Тихие кадры Opus кодируются заметно короче речи
+    threshold = statistics.median(sizes) * silence_ratio if sizes else 0
+    cuts: List[int] = []
+    elapsed = 0.0
+    run_start = None
+    run_length = 0.0
+
+    for index, (size, duration) in enumerate(zip(sizes, durations)):
+        elapsed += duration
+        if size <= threshold:
+            if run_start is None:
+                run_start, run_length = index, 0.0
+            run_length += duration
+        elif run_start is not None:
+            # Пауза закончилась: режем посередине, если часть уже набрала длительность
+            if elapsed >= chunk_duration and run_length >= min_silence:
+                cut = (run_start + index) // 2
+                cuts.append(cut)
+                elapsed = sum(durations[cut:index + 1])
+            run_start = None
+
+        if elapsed >= max_chunk_duration:
+            cuts.append(index + 1)
+            elapsed = 0.0
+            run_start = None
+
+    # Короткий хвост (обычно тишина) присоединяем к предыдущей части
+    if cuts and sum(durations[cuts[-1]:]) < min_tail:
+        cuts.pop()
+    return cuts
+
+
+@dataclass
+class OggOpusSplit:
+    """Результат первого прохода по файлу: заголовки Opus и индексы аудиопакетов, с которых начинаются части"""
+    serial: int
+    head: bytes
+    tags: bytes
+    cuts: List[int]
+
+    def __len__(self) -> int:
+        return len(self.cuts) + 1
+
+    def chunks(self, stream: BinaryIO) -> Iterator[bytes]:
+        """Второй проход: части собираются по одной, в памяти держится только текущая"""
+        stream.seek(0)
+        cuts = iter(self.cuts)
+        cut = next(cuts, None)
+        audio: List[bytes] = []
+        index = -2  # первые два пакета — заголовки
+
+        for _, packets in iter_pages(stream):
+            for packet in packets:
+                if index == cut:
+                    yield write_stream(self.serial, self.head, self.tags, audio)
+                    audio = []
+                    cut = next(cuts, None)
+                if index >= 0:
+                    audio.append(packet)
+                index += 1
+        yield write_stream(self.serial, self.head, self.tags, audio)
+
+
+def plan_ogg_opus_split(stream: BinaryIO, chunk_duration: float = 30.0, max_chunk_duration: float = 45.0,
+                        min_silence: float = 0.3) -> Optional[OggOpusSplit]:
+    """Первый проход по файлу: размеры и длительности пакетов без хранения самих пакетов;
+    None, если голосовое помещается в одну часть"""
+    stream.seek(0)
+    head = tags = None
+    sizes: List[int] = []
+    durations: List[float] = []
+    serial = None
+
+    for serial, packets in iter_pages(stream):
+        for packet in packets:
+            if head is None:
+                head = packet
+            elif tags is None:
+                tags = packet
+            else:
+                sizes.append(len(packet))
+                durations.append(opus_packet_samples(packet) / OPUS_SAMPLE_RATE)
+
+    if head is None or tags is None or not head.startswith(b"OpusHead") or not tags.startswith(b"OpusTags"):
+        raise OggOpusError("Поток не содержит заголовков Opus")
+    if sum(durations) <= max_chunk_duration:
+        return None
+
+    cuts = find_cut_points(sizes, durations, chunk_duration, max_chunk_duration, min_silence)
+    return OggOpusSplit(serial, head, tags, cuts)
+
+
+def split_ogg_opus(data: bytes, chunk_duration: float = 30.0, max_chunk_duration: float = 45.0,
+                   min_silence: float = 0.3) -> List[bytes]:
+    """Разбиение голосового Ogg/Opus на самостоятельные файлы по паузам"""
+    stream = io.BytesIO(data)
+    split = plan_ogg_opus_split(stream, chunk_duration, max_chunk_duration, min_silence)
+    if split is None:
+        return [data]
+    return list(split.chunks(stream))
+
+
+def stream_duration(data: bytes) -> float:
+    """Длительность потока Ogg/Opus в секундах"""
+    _, packets = read_packets(data)
+    return sum(opus_packet_samples(packet) for packet in packets[2:]) / OPUS_SAMPLE_RATE
@@ -0,0 +1,304 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import httpx
+from src.models.enhancement import EnhancementResponse, EnhancementType
+from src.services.metrics import registry
+from src.services.token_budget import TokenBudget
+
+logger = logging.getLogger(__name__)
+
+BULK_ITEMS = registry.counter("bulk_items_total", "Тексты пакетного улучшения по исходу")
+
+EnhanceFunc = Callable[[str, EnhancementType, Optional[str]], Awaitable[EnhancementResponse]]
+# Тела запросов частей текста и разделители, с которыми части склеиваются обратно
+RequestBuilder = Callable[[str, EnhancementType, Optional[str]], List[Tuple[dict, str]]]
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+@dataclass
+class BulkItem:
+    """Текст из входного JSONL"""
+    id: str
+    text: str
+    enhancement_type: EnhancementType
+    custom_prompt: Optional[str] = None
+
+
+def read_items(path: str, default_type: EnhancementType = EnhancementType.GRAMMAR,
+               default_prompt: Optional[str] = None, errors: Optional[List[dict]] = None) -> Iterator[BulkItem]:
+    """Потоковое чтение JSONL: {"id", "text", "type"?, "prompt"?}; id по умолчанию — номер строки"""
+    # Повторный id склеил бы результаты и запросы пакета разных текстов
+    seen: Set[str] = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                custom_prompt = record.get("prompt", default_prompt)
+                enhancement_type = EnhancementType(record["type"]) if "type" in record else default_type
+                if custom_prompt and "type" not in record:
+                    enhancement_type = EnhancementType.CUSTOM
+                item = BulkItem(str(record.get("id", line_number)), record["text"], enhancement_type, custom_prompt)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                if errors is not None:
+                    errors.append({"id": str(line_number), "error": f"Некорректная строка: {e}"})
+                continue
+            if item.id in seen:
+                if errors is not None:
+                    errors.append({"id": str(line_number), "error": f"Повторяющийся id: {item.id}"})
+                continue
+            seen.add(item.id)
+            yield item
+
+
+def load_checkpoint(path: str, retry_failed: bool = False) -> Set[str]:
+    """Идентификаторы уже обработанных текстов из файла результатов"""
+    done: Dict[str, bool] = {}
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Недописанная строка после аварийной остановки
+                continue
+            done[str(record["id"])] = "error" not in record
+    return {item_id for item_id, ok in done.items() if ok or not retry_failed}
+
+
+class ResultWriter:
+    """Дописывание результатов в JSONL: каждая строка сразу сбрасывается на диск"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self.written = 0
+        self.failed = 0
+
+    def write(self, item_id: str, enhancement_type: Optional[EnhancementType] = None,
+              enhanced_text: Optional[str] = None, error: Optional[str] = None):
+        record = {"id": item_id}
+        if enhancement_type is not None:
+            record["type"] = enhancement_type.value
+        if error is not None:
+            record["error"] = error
+            self.failed += 1
+            BULK_ITEMS.inc(outcome="failed")
+        else:
+            record["enhanced_text"] = enhanced_text
+            BULK_ITEMS.inc(outcome="done")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.written += 1
+
+    def close(self):
+        self._file.close()
+
+
+class LocalBulkRunner:
+    """Пакетное улучшение через OpenAIService с ограничением параллельности"""
+
+    def __init__(self, enhance: EnhanceFunc, concurrency: int = 8):
+        self.enhance = enhance
+        self.concurrency = concurrency
+
+    async def _process(self, item: BulkItem, writer: ResultWriter):
+        try:
+            response = await self.enhance(item.text, item.enhancement_type, item.custom_prompt)
+            writer.write(item.id, item.enhancement_type, response.enhanced_text)
+        except Exception as e:
+            writer.write(item.id, item.enhancement_type, error=str(e))
+
+    async def run(self, items: Iterable[BulkItem], writer: ResultWriter):
+        """Обработка потока текстов: в работе не больше concurrency запросов"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks: Set[asyncio.Task] = set()
+
+        async def process(item: BulkItem):
+            try:
+                await self._process(item, writer)
+            finally:
+                semaphore.release()
+
+        try:
+            for item in items:
+                await semaphore.acquire()
+                task = asyncio.create_task(process(item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class BatchBulkRunner:
+    """Пакетное улучшение через OpenAI-совместимый Batch API (дешевле, результат в течение окна)"""
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str, api_key: str, build_request: RequestBuilder,
+                 state_path: str, batch_size: int = 50000, poll_interval: float = 30.0,
+                 completion_window: str = "24h"):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.build_request = build_request
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        # Отправленные пакеты: id пакета -> текст -> [тип, разделители частей] (переживает перезапуск)
+        self.state: Dict[str, Dict[str, list]] = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict[str, list]]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _custom_ids(item_id: str, parts: int) -> List[str]:
+        """custom_id строк пакета: длинный текст отправляется частями id#0, id#1, ..."""
+        if parts == 1:
+            return [item_id]
+        return [f"{item_id}#{index}" for index in range(parts)]
+
+    def _save_state(self):
+        temp_file = f"{self.state_path}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(temp_file, self.state_path)
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = await self.client.request(method, f"{self.base_url}{path}", headers=self.headers, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def _submit(self, items: List[Tuple[BulkItem, List[Tuple[dict, str]]]]) -> str:
+        """Загрузка файла запросов и создание пакета"""
+        lines = []
+        for item, requests in items:
+            custom_ids = self._custom_ids(item.id, len(requests))
+            for custom_id, (body, _) in zip(custom_ids, requests):
+                lines.append(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": body,
+                }, ensure_ascii=False))
+        upload = await self._request(
+            "POST", "/files",
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", ("\n".join(lines) + "\n").encode("utf-8"), "application/jsonl")}
+        )
+        batch = await self._request("POST", "/batches", json={
+            "input_file_id": upload.json()["id"],
+            "endpoint": BATCH_ENDPOINT,
+            "completion_window": self.completion_window,
+        })
+        batch_id = batch.json()["id"]
+        self.state[batch_id] = {
+            item.id: [item.enhancement_type.value, [separator for _, separator in requests]]
+            for item, requests in items
+        }
+        self._save_state()
+        logger.info(f"Пакет {batch_id} отправлен: {len(items)} текстов, {len(lines)} запросов")
+        return batch_id
+
+    async def _wait(self, batch_id: str) -> dict:
+        """Ожидание завершения пакета"""
+        while True:
+            batch = (await self._request("GET", f"/batches/{batch_id}")).json()
+            if batch["status"] in BATCH_FINAL_STATUSES:
+                return batch
+            counts = batch.get("request_counts") or {}
+            logger.info(f"Пакет {batch_id}: {batch['status']}, "
+                        f"готово {counts.get('completed', 0)} из {counts.get('total', '?')}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _file_lines(self, file_id: Optional[str]) -> Iterator[dict]:
+        if not file_id:
+            return iter(())
+        content = (await self._request("GET", f"/files/{file_id}/content")).text
+        return (json.loads(line) for line in content.splitlines() if line.strip())
+
+    async def _collect(self, batch_id: str, writer: ResultWriter):
+        """Запись результатов пакета: части текста склеиваются; тексты без ответа отмечаются ошибкой"""
+        batch = await self._wait(batch_id)
+        entries = self.state[batch_id]
+        # custom_id -> (текст, номер части)
+        parts_of = {
+            custom_id: (item_id, index)
+            for item_id, (_, separators) in entries.items()
+            for index, custom_id in enumerate(self._custom_ids(item_id, len(separators)))
+        }
+        contents: Dict[str, Dict[int, str]] = {item_id: {} for item_id in entries}
+        errors: Dict[str, str] = {}
+
+        for record in await self._file_lines(batch.get("output_file_id")):
+            if record.get("custom_id") not in parts_of:
+                logger.error(f"Пакет {batch_id}: неизвестный custom_id {record.get('custom_id')!r}")
+                continue
+            item_id, index = parts_of[record["custom_id"]]
+            response = record.get("response") or {}
+            if response.get("status_code") == 200:
+                contents[item_id][index] = response["body"]["choices"][0]["message"]["content"]
+            else:
+                error = record.get("error") or response.get("body", {}).get("error")
+                errors.setdefault(item_id, f"Ошибка пакета: {error}")
+
+        for record in await self._file_lines(batch.get("error_file_id")):
+            if record.get("custom_id") not in parts_of:
+                logger.error(f"Пакет {batch_id}: неизвестный custom_id {record.get('custom_id')!r}")
+                continue
+            item_id, _ = parts_of[record["custom_id"]]
+            errors.setdefault(item_id, f"Ошибка пакета: {record.get('error')}")
+
+        for item_id, (type_value, separators) in entries.items():
+            enhancement_type = EnhancementType(type_value)
+            if item_id in errors:
+                writer.write(item_id, enhancement_type, error=errors[item_id])
+            elif len(contents[item_id]) < len(separators):
+                writer.write(item_id, enhancement_type, error=f"Пакет завершился: {batch['status']}")
+            else:
+                parts = [(contents[item_id][index], separator) for index, separator in enumerate(separators)]
+                writer.write(item_id, enhancement_type, TokenBudget.join(parts))
+
+        del self.state[batch_id]
+        self._save_state()
+
+    async def run(self, items: Iterable[BulkItem], writer: ResultWriter):
+        """Сначала дожидаемся пакетов прошлого запуска, затем отправляем оставшиеся тексты"""
+        submitted: Set[str] = {item_id for types in self.state.values() for item_id in types}
+        for batch_id in list(self.state):
+            await self._collect(batch_id, writer)
+
+        # batch_size ограничивает число запросов (частей), а не текстов
+        chunk: List[Tuple[BulkItem, List[Tuple[dict, str]]]] = []
+        requests_in_chunk = 0
+        for item in items:
+            if item.id in submitted:
+                continue
+            requests = self.build_request(item.text, item.enhancement_type, item.custom_prompt)
+            if chunk and requests_in_chunk + len(requests) > self.batch_size:
+                await self._submit(chunk)
+                submitted.update(queued.id for queued, _ in chunk)
+                chunk, requests_in_chunk = [], 0
+            chunk.append((item, requests))
+            requests_in_chunk += len(requests)
+        if chunk:
+            await self._submit(chunk)
+
+        started = time.monotonic()
+        for batch_id in list(self.state):
+            await self._collect(batch_id, writer)
+        logger.info(f"Пакеты обработаны за {time.monotonic() - started:.0f} с")
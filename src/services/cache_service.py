@@ -0,0 +1,63 @@
+import hashlib
+from typing import Optional
+from src.services.tiered_store import TieredStore
+
+
+class EnhancementCache:
+    """Кэш результатов OpenAI: LRU в памяти + опциональный SQLite на диске"""
+
+    def __init__(self, max_entries: int = 1024, ttl: int = 86400,
+                 disk_path: Optional[str] = None, disk_max_entries: int = 100000):
+        self.disk_path = disk_path
+        # Чтение с диска и запись выполняются в потоке хранилища, не блокируя цикл событий
+        self._store: TieredStore[str] = TieredStore(
+            "cache", ttl=ttl, max_entries=max_entries,
+            path=disk_path, disk_max_entries=disk_max_entries
+        )
+
+    @classmethod
+    def from_settings(cls) -> Optional["EnhancementCache"]:
+        """Создание кэша по настройкам приложения (None, если кэш выключен)"""
+        from config.settings import settings
+
+        if not settings.cache_enabled:
+            return None
+        return cls(
+            max_entries=settings.cache_max_entries,
+            ttl=settings.cache_ttl,
+            disk_path=settings.cache_disk_path,
+            disk_max_entries=settings.cache_disk_max_entries
+        )
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, text: str,
+                 temperature: float, max_tokens: int) -> str:
+        """Ключ кэша по содержимому запроса"""
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        raw = f"{model}\x00{prompt_hash}\x00{text_hash}\x00{temperature!r}\x00{max_tokens}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Получение значения из кэша"""
+        return await self._store.get(key)
+
+    def set(self, key: str, value: str):
+        """Сохранение значения в кэш (на диск — в фоне, ответ пользователю не ждет записи)"""
+        self._store.set(key, value)
+
+    async def flush(self):
+        """Ожидание фоновой записи на диск"""
+        await self._store.flush()
+
+    def clear(self):
+        """Очистка кэша"""
+        self._store.clear()
+
+    def stats(self) -> dict:
+        """Статистика попаданий и промахов"""
+        return self._store.stats()
+
+    def close(self):
+        """Закрытие дискового уровня"""
+        self._store.close()
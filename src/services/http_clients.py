@@ -0,0 +1,124 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Dict, Optional
+import httpx
+from telegram.request import HTTPXRequest
+from src.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WARMUP_LATENCY = registry.histogram("http_client_warmup_seconds", "Прогрев соединений HTTP-клиентов")
+OPEN_CLIENTS = registry.gauge("http_clients_open", "Открытые общие HTTP-клиенты")
+
+
+def http2_available() -> bool:
+    """Поддержка HTTP/2 в httpx требует пакета h2 (pip install httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+class HTTPClients:
+    """Общие настроенные HTTP-клиенты сервисов: пулы, keep-alive, прогрев и закрытие"""
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 32,
+                 keepalive_expiry: float = 30.0, connect_timeout: float = 5.0,
+                 read_timeout: float = 10.0, http2: bool = True, warmup_connections: int = 2,
+                 telegram_pool_size: int = 128):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2 and http2_available()
+        self.warmup_connections = warmup_connections
+        self.telegram_pool_size = telegram_pool_size
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        # Параметры, с которыми создан каждый клиент: имя -> параметры
+        self._options: Dict[str, dict] = {}
+        # Адреса для прогрева: имя клиента -> URL
+        self._warmup_urls: Dict[str, str] = {}
+
+    @classmethod
+    def from_settings(cls) -> "HTTPClients":
+        from config.settings import settings
+        return cls(
+            max_connections=settings.http_pool_size,
+            max_keepalive_connections=settings.http_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+            connect_timeout=settings.http_connect_timeout,
+            read_timeout=settings.http_read_timeout,
+            http2=settings.http2_enabled,
+            warmup_connections=settings.http_warmup_connections,
+            telegram_pool_size=settings.telegram_pool_size
+        )
+
+    def timeout(self, read_timeout: Optional[float] = None) -> httpx.Timeout:
+        """Таймауты запроса: подключение из настроек, чтение — свое для каждого API"""
+        read = read_timeout if read_timeout is not None else self.read_timeout
+        return httpx.Timeout(read, connect=self.connect_timeout)
+
+    def client(self, name: str, warmup_url: Optional[str] = None,
+               read_timeout: Optional[float] = None, **kwargs) -> httpx.AsyncClient:
+        """Общий клиент по имени (создается при первом обращении; другие параметры для того же имени — ошибка)"""
+        options = dict(kwargs, read_timeout=read_timeout)
+        client = self._clients.get(name)
+        if client is not None and not client.is_closed and self._options[name] != options:
+            raise ValueError(f"HTTP-клиент {name} уже создан с другими параметрами")
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout(read_timeout),
+                http2=self.http2,
+                **kwargs
+            )
+            self._clients[name] = client
+            self._options[name] = options
+            OPEN_CLIENTS.set(len(self._clients))
+        if warmup_url:
+            self._warmup_urls[name] = warmup_url
+        return client
+
+    def telegram_request(self, get_updates: bool = False) -> HTTPXRequest:
+        """Запросы PTB к Bot API: для getUpdates хватает одного соединения"""
+        return HTTPXRequest(
+            connection_pool_size=1 if get_updates else self.telegram_pool_size,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            write_timeout=self.read_timeout,
+            pool_timeout=self.connect_timeout,
+            http_version="2" if self.http2 else "1.1"
+        )
+
+    async def _warm(self, name: str, url: str):
+        """Открытие соединений заранее: любой ответ сервера означает готовое соединение"""
+        client = self._clients[name]
+        started = time.monotonic()
+        results = await asyncio.gather(
+            # Прогрев не должен задерживать запуск дольше таймаута подключения
+            *(client.head(url, timeout=self.timeout(self.connect_timeout))
+              for _ in range(self.warmup_connections)),
+            return_exceptions=True
+        )
+        WARMUP_LATENCY.observe(time.monotonic() - started, client=name)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            logger.warning(f"Прогрев {name} не удался: {errors[0]}")
+
+    async def warm_up(self):
+        """Прогрев соединений всех клиентов, чтобы TLS-рукопожатия не попадали на запросы пользователей"""
+        if self.warmup_connections <= 0:
+            return
+        await asyncio.gather(*(
+            self._warm(name, url) for name, url in self._warmup_urls.items() if name in self._clients
+        ))
+
+    async def close(self):
+        """Закрытие всех клиентов"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._options.clear()
+        OPEN_CLIENTS.set(0)
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
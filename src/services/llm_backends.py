@@ -0,0 +1,232 @@
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+from openai.types.audio import Transcription
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from src.services.http_clients import HTTPClients
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# Серверы вроде vLLM и llama.cpp ключ не проверяют, но SDK требует непустой
+COMPATIBLE_PLACEHOLDER_KEY = "EMPTY"
+
+
+class ChatStream(Protocol):
+    """Поток фрагментов ответа; aclose освобождает соединение, даже если поток не дочитан"""
+
+    def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]: ...
+
+    async def aclose(self): ...
+
+
+class LLMBackend(Protocol):
+    """Бэкенд LLM: запросы и ответы в формате OpenAI (chat.completions и audio.transcriptions)"""
+    name: str
+
+    async def chat_completion(self, *, model: str, messages: List[dict], max_tokens: int,
+                              temperature: float) -> ChatCompletion:
+        """Ответ модели целиком"""
+        ...
+
+    async def stream_chat(self, *, model: str, messages: List[dict], max_tokens: int,
+                          temperature: float) -> ChatStream:
+        """Ответ модели по фрагментам"""
+        ...
+
+    async def transcribe(self, file: Any, *, model: str, language: str) -> Transcription:
+        """Распознавание речи (file — байты с именем или файловый объект, как в SDK)"""
+        ...
+
+
+class _OpenAIChatStream:
+    """Поток SDK с закрытием HTTP-ответа"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        return self._stream.__aiter__()
+
+    async def aclose(self):
+        response = getattr(self._stream, "response", None)
+        if response is not None:
+            await response.aclose()
+
+
+class OpenAIBackend:
+    """Официальный API OpenAI через SDK на общем HTTP-клиенте"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str, http_clients: HTTPClients, timeout: float,
+                 base_url: Optional[str] = None, event_hooks: Optional[Dict[str, list]] = None):
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.api_key = api_key
+        # Повторы выполняет ResiliencePolicy, поэтому встроенные повторы SDK отключены
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=self.base_url,
+            http_client=http_clients.client(
+                "openai",
+                warmup_url=self.base_url,
+                read_timeout=timeout,
+                event_hooks=event_hooks or {}
+            ),
+            timeout=http_clients.timeout(timeout),
+            max_retries=0
+        )
+
+    async def chat_completion(self, *, model: str, messages: List[dict], max_tokens: int,
+                              temperature: float) -> ChatCompletion:
+        return await self.client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature
+        )
+
+    async def stream_chat(self, *, model: str, messages: List[dict], max_tokens: int,
+                          temperature: float) -> ChatStream:
+        stream = await self.client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, stream=True
+        )
+        return _OpenAIChatStream(stream)
+
+    async def transcribe(self, file: Any, *, model: str, language: str) -> Transcription:
+        return await self.client.audio.transcriptions.create(model=model, file=file, language=language)
+
+
+class OpenAICompatibleBackend(OpenAIBackend):
+    """Любой OpenAI-совместимый сервер (vLLM, llama.cpp, LocalAI): свой base URL, ключ необязателен"""
+
+    name = "compatible"
+
+    def __init__(self, base_url: str, http_clients: HTTPClients, timeout: float,
+                 api_key: Optional[str] = None, event_hooks: Optional[Dict[str, list]] = None):
+        if not base_url:
+            raise ValueError("Для совместимого бэкенда нужен OPENAI_BASE_URL")
+        super().__init__(api_key or COMPATIBLE_PLACEHOLDER_KEY, http_clients, timeout,
+                         base_url=base_url, event_hooks=event_hooks)
+
+
+class _StubStream:
+    """Поток фрагментов ответа заглушки"""
+
+    def __init__(self, chunks: List[ChatCompletionChunk]):
+        self._chunks = chunks
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        for chunk in self._chunks:
+            yield chunk
+
+    async def aclose(self):
+        pass
+
+
+class StubBackend:
+    """Детерминированная заглушка в процессе: ответы без сети, задержки и ошибки по настройкам"""
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, latency_sigma: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0, stream_chunks: int = 20,
+                 transcript: str = "Тестовая расшифровка голосового сообщения"):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.stream_chunks = stream_chunks
+        self.transcript = transcript
+        self.calls: Counter = Counter()
+        # Один генератор на задержки и ошибки: при том же seed прогон повторяется
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_settings(cls) -> "StubBackend":
+        """Создание по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            latency=settings.llm_stub_latency,
+            latency_sigma=settings.llm_stub_latency_sigma,
+            error_rate=settings.llm_stub_error_rate,
+            seed=settings.llm_stub_seed
+        )
+
+    async def _delay_or_fail(self, path: str):
+        """Задержка (логнормальная вокруг latency) и, с вероятностью error_rate, сетевая ошибка"""
+        delay = self.latency
+        if delay > 0 and self.latency_sigma > 0:
+            delay = self._random.lognormvariate(math.log(delay), self.latency_sigma)
+        failed = self._random.random() < self.error_rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if failed:
+            self.calls["errors"] += 1
+            raise openai.APIConnectionError(request=httpx.Request("POST", f"stub://{path}"))
+
+    @staticmethod
+    def content(messages: List[dict], max_tokens: Optional[int]) -> str:
+        """Ответ по тексту пользователя (классификация запрашивается с очень малым max_tokens)"""
+        text = messages[-1]["content"]
+        if max_tokens is not None and max_tokens <= 10:
+            return "prompt" if "напиши" in text.lower() else "text"
+        return f"Улучшенный вариант: {text}"
+
+    async def _reply(self, messages: List[dict], max_tokens: int) -> str:
+        self.calls["chat"] += 1
+        await self._delay_or_fail("chat/completions")
+        return self.content(messages, max_tokens)
+
+    async def chat_completion(self, *, model: str, messages: List[dict], max_tokens: int,
+                              temperature: float) -> ChatCompletion:
+        content = await self._reply(messages, max_tokens)
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 3
+        completion_tokens = len(content) // 3
+        return ChatCompletion(
+            id="chatcmpl-stub", object="chat.completion", created=int(time.time()), model=model,
+            choices=[{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }
+        )
+
+    async def stream_chat(self, *, model: str, messages: List[dict], max_tokens: int,
+                          temperature: float) -> ChatStream:
+        content = await self._reply(messages, max_tokens)
+        created = int(time.time())
+        size = max(1, len(content) // self.stream_chunks)
+        return _StubStream([
+            ChatCompletionChunk(
+                id="chatcmpl-stub", object="chat.completion.chunk", created=created, model=model,
+                choices=[{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}]
+            )
+            for start in range(0, len(content), size)
+        ])
+
+    async def transcribe(self, file: Any, *, model: str, language: str) -> Transcription:
+        self.calls["transcribe"] += 1
+        await self._delay_or_fail("audio/transcriptions")
+        return Transcription(text=self.transcript)
+
+
+def backend_from_settings(http_clients: HTTPClients, timeout: float,
+                          event_hooks: Optional[Dict[str, list]] = None) -> LLMBackend:
+    """Бэкенд по LLM_BACKEND: openai, compatible или stub"""
+    from config.settings import settings
+
+    kind = settings.llm_backend.lower()
+    if kind == OpenAIBackend.name:
+        return OpenAIBackend(settings.openai_api_key, http_clients, timeout,
+                             base_url=settings.openai_base_url, event_hooks=event_hooks)
+    if kind == OpenAICompatibleBackend.name:
+        return OpenAICompatibleBackend(settings.openai_base_url, http_clients, timeout,
+                                       api_key=settings.openai_api_key, event_hooks=event_hooks)
+    if kind == StubBackend.name:
+        return StubBackend.from_settings()
+    raise ValueError(f"Неизвестный LLM_BACKEND: {settings.llm_backend}")
@@ -0,0 +1,203 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+# Границы корзин по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelValues:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str, quote: bool = True) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def _format_sample(name: str, labels: LabelValues, value: float) -> str:
+    """Строка значения в текстовом формате Prometheus"""
+    if labels:
+        name += "{" + ",".join(f'{label}="{_escape(text)}"' for label, text in labels) + "}"
+    if value == int(value) and abs(value) < 1e15:
+        return f"{name} {int(value)}"
+    return f"{name} {value!r}"
+
+
+class Counter:
+    """Монотонно растущий счетчик"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и уменьшаться"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram:
+    """Гистограмма значений (например, задержек) с фиксированными корзинами"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                # Последняя корзина — +Inf
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(_label_key(labels), ()))
+
+    def sum(self, **labels) -> float:
+        return self._sums.get(_label_key(labels), 0.0)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Оценка квантиля по корзинам (верхняя граница корзины)"""
+        counts = self._counts.get(_label_key(labels))
+        if not counts:
+            return None
+
+        target = q * sum(counts)
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1] if self.buckets else None
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """Значения в формате Prometheus: _bucket, _sum, _count"""
+        result = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    result.append((f"{self.name}_bucket", key + (("le", repr(bound)),), cumulative))
+                cumulative += counts[-1]
+                result.append((f"{self.name}_bucket", key + (("le", "+Inf"),), cumulative))
+                result.append((f"{self.name}_sum", key, self._sums[key]))
+                result.append((f"{self.name}_count", key, cumulative))
+        return result
+
+
+class MetricsRegistry:
+    """Реестр метрик приложения"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Метрика {name} уже зарегистрирована с другим типом")
+            return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str,
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+
+    def collect(self) -> list:
+        """Все зарегистрированные метрики"""
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus (для эндпоинта /metrics)"""
+        lines = []
+        for metric in sorted(self.collect(), key=lambda metric: metric.name):
+            lines.append(f"# HELP {metric.name} {_escape(metric.description, quote=False)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_format_sample(*sample) for sample in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram, errors: Optional[Counter] = None, **labels):
+    """Декоратор: длительность вызова — в гистограмму, исключения — в счетчик ошибок"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.monotonic()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    if errors is not None:
+                        errors.inc(**labels)
+                    raise
+                finally:
+                    histogram.observe(time.monotonic() - started, **labels)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.monotonic()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    if errors is not None:
+                        errors.inc(**labels)
+                    raise
+                finally:
+                    histogram.observe(time.monotonic() - started, **labels)
+        return wrapper
+    return decorator
+
+
+# Глобальный реестр метрик
+registry = MetricsRegistry()
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from src.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ROUTE_LATENCY = registry.histogram("model_route_duration_seconds", "Длительность запросов по маршрутам моделей")
+ROUTE_FALLBACKS = registry.counter("model_route_fallbacks_total", "Переходы на запасную модель по причине")
+ROUTE_COST = registry.counter("model_route_cost_usd_total", "Оценка стоимости запросов по маршрутам, USD")
+
+# Задача классификации типа текста; остальные задачи — значения EnhancementType
+CLASSIFY_TASK = "classify"
+
+# Цены моделей за 1M токенов, USD: (вход, выход); для неизвестных моделей стоимость не считается
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+# task[:макс. входных токенов]=model[|fallback][@бюджет латентности, с]
+_ROUTE_RE = re.compile(
+    r"^(?P<task>[\w-]+)(?::(?P<max_tokens>\d+))?=(?P<model>[^|@]+)"
+    r"(?:\|(?P<fallback>[^@]+))?(?:@(?P<budget>\d+(?:\.\d+)?))?$"
+)
+
+
+@dataclass(frozen=True)
+class Route:
+    """Модель для задачи и размера входа"""
+    task: str
+    model: str
+    max_input_tokens: Optional[int] = None
+    fallback: Optional[str] = None
+    latency_budget: float = 0.0  # 0 — без бюджета
+
+    @property
+    def name(self) -> str:
+        """Имя маршрута для метрик"""
+        return self.task if self.max_input_tokens is None else f"{self.task}:{self.max_input_tokens}"
+
+
+def parse_routes(spec: str) -> List[Route]:
+    """Разбор таблицы маршрутов: "classify=gpt-4o-mini, grammar:400=gpt-4o-mini|gpt-4o@5, grammar=gpt-4o" """
+    routes = []
+    for entry in spec.replace(";", ",").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = _ROUTE_RE.match(entry.replace(" ", ""))
+        if match is None:
+            raise ValueError(f"Некорректный маршрут модели: {entry}")
+        routes.append(Route(
+            task=match["task"],
+            model=match["model"],
+            max_input_tokens=int(match["max_tokens"]) if match["max_tokens"] else None,
+            fallback=match["fallback"] or None,
+            latency_budget=float(match["budget"]) if match["budget"] else 0.0
+        ))
+    return routes
+
+
+class ModelRouter:
+    """Выбор модели по задаче и размеру входа с переходом на запасную при ошибке или долгом ответе"""
+
+    def __init__(self, default_model: str = "gpt-4o", routes: Optional[List[Route]] = None,
+                 fallback_model: Optional[str] = None, latency_budget: float = 0.0):
+        self.default_model = default_model
+        self.fallback_model = fallback_model
+        self.latency_budget = latency_budget
+        # Для каждой задачи сначала маршруты с меньшим порогом, маршрут без порога — последним
+        self._routes: Dict[str, List[Route]] = {}
+        for route in routes or []:
+            self._routes.setdefault(route.task, []).append(route)
+        for task_routes in self._routes.values():
+            task_routes.sort(key=lambda route: (route.max_input_tokens is None, route.max_input_tokens or 0))
+
+    @classmethod
+    def from_settings(cls) -> "ModelRouter":
+        """Создание по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            default_model=settings.openai_model,
+            routes=parse_routes(settings.openai_model_routes),
+            fallback_model=settings.openai_fallback_model or None,
+            latency_budget=settings.openai_latency_budget
+        )
+
+    def route(self, task: str, input_tokens: int) -> Route:
+        """Маршрут для задачи: первый, чей порог вмещает вход; иначе модель по умолчанию"""
+        for route in self._routes.get(task, ()):
+            if route.max_input_tokens is None or input_tokens <= route.max_input_tokens:
+                return route
+        return Route(task=task, model=self.default_model)
+
+    def fallback_for(self, route: Route) -> Optional[str]:
+        fallback = route.fallback or self.fallback_model
+        return fallback if fallback != route.model else None
+
+    def budget_for(self, route: Route) -> float:
+        return route.latency_budget or self.latency_budget
+
+    async def call(self, route: Route,
+                   factory: Callable[[str, Optional[float]], Awaitable[T]]) -> Tuple[T, str]:
+        """Запрос к модели маршрута; при ошибке или превышении бюджета латентности — к запасной.
+        factory получает модель и бюджет латентности одной попытки (None — без бюджета): бюджет
+        отсчитывается после допуска ограничителем, поэтому очередь не считается медленной моделью.
+        Возвращает результат и модель, которая его дала"""
+        started = time.monotonic()
+        fallback = self.fallback_for(route)
+        budget = self.budget_for(route)
+        try:
+            result = await factory(route.model, budget if budget > 0 and fallback else None)
+            ROUTE_LATENCY.observe(time.monotonic() - started, route=route.name, model=route.model)
+            return result, route.model
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not fallback:
+                raise
+            reason = "latency" if isinstance(e, asyncio.TimeoutError) else "error"
+            ROUTE_FALLBACKS.inc(route=route.name, model=route.model, reason=reason)
+            logger.warning(f"Маршрут {route.name}: {route.model} -> {fallback} ({reason}: {e!r})")
+
+        fallback_started = time.monotonic()
+        result = await factory(fallback, None)
+        ROUTE_LATENCY.observe(time.monotonic() - fallback_started, route=route.name, model=fallback)
+        return result, fallback
+
+    @staticmethod
+    def record_cost(route: Route, model: str, prompt_tokens: int, completion_tokens: int):
+        """Учет стоимости запроса по ценам MODEL_PRICES"""
+        prices = MODEL_PRICES.get(model)
+        if prices is None:
+            return
+        cost = (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+        ROUTE_COST.inc(cost, route=route.name, model=model)
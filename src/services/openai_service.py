@@ -1,76 +1,251 @@
 import asyncio
 import aiofiles
 import tempfile
-from typing import Optional
-from openai import AsyncOpenAI
+import time
+import httpx
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple, Union
 from config.settings import settings
 from src.models.enhancement import EnhancementType, EnhancementResponse
+from src.services.cache_service import EnhancementCache
+from src.services.http_clients import HTTPClients
+from src.services.llm_backends import DEFAULT_BASE_URL, LLMBackend, backend_from_settings
+from src.services.rate_limiter import OpenAIRateLimiter, estimate_tokens
+from src.services.metrics import registry, timed
+from src.services.model_router import CLASSIFY_TASK, ModelRouter, Route
+from src.services.prompt_templates import CLASSIFY, GRAMMAR, PROMPT_ENHANCEMENT, templates
+from src.services.resilience import ResiliencePolicy
+from src.services.token_budget import TokenBudget
+
+# Метрики сервиса (с учетом кэша, очереди ограничителя и повторов)
+OPENAI_LATENCY = registry.histogram("openai_method_duration_seconds", "Длительность методов OpenAIService")
+OPENAI_ERRORS = registry.counter("openai_method_errors_total", "Ошибки методов OpenAIService")
+OPENAI_TOKENS = registry.counter("openai_tokens_total", "Токены OpenAI (source=usage — из ответа, estimate — оценка)")
+STREAM_FIRST_TOKEN = registry.histogram("openai_stream_first_token_seconds", "Время до первого фрагмента потока")
+ENHANCEMENTS = registry.counter("enhancements_total", "Запросы на улучшение по типам")
+CACHE_REQUESTS = registry.counter("enhancement_cache_requests_total", "Обращения к кэшу ответов")
+
+# Температура генерации улучшенного текста (max_tokens считает TokenBudget)
+ENHANCE_TEMPERATURE = 0.3
+
+
+class OpenAIServiceError(Exception):
+    """Ошибка обращения к OpenAI"""
 
 
 class OpenAIService:
     """Сервис для работы с OpenAI API"""
     
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+    def __init__(self, cache: Optional[EnhancementCache] = None,
+                 rate_limiter: Optional[OpenAIRateLimiter] = None,
+                 resilience: Optional[ResiliencePolicy] = None,
+                 http_clients: Optional[HTTPClients] = None,
+                 token_budget: Optional[TokenBudget] = None,
+                 router: Optional[ModelRouter] = None,
+                 backend: Optional[LLMBackend] = None):
+        self.rate_limiter = rate_limiter if rate_limiter is not None else OpenAIRateLimiter.from_settings()
+        self.resilience = resilience if resilience is not None else ResiliencePolicy.from_settings()
+        # Без общих клиентов сервис владеет своими и закрывает их в close()
+        self._owns_http_clients = http_clients is None
+        self.http_clients = http_clients if http_clients is not None else HTTPClients.from_settings()
+        # Заголовки x-ratelimit-* читаем из каждого ответа, чтобы подстраивать бюджеты
+        self.backend = backend if backend is not None else backend_from_settings(
+            self.http_clients, self.resilience.timeout,
+            event_hooks={"response": [self._observe_response]}
+        )
         self.model = settings.openai_model
+        self.token_budget = token_budget if token_budget is not None else TokenBudget.from_settings()
+        # Модель выбирается по задаче и размеру входа; self.model — модель по умолчанию
+        self.router = router if router is not None else ModelRouter.from_settings()
+        self.cache = cache if cache is not None else EnhancementCache.from_settings()
     
-    async def transcribe_audio(self, audio_file_path: str) -> str:
-        """Транскрибирование аудио в текст"""
-        try:
-            with open(audio_file_path, "rb") as audio_file:
-                transcript = await self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="ru"
+    async def _observe_response(self, response: httpx.Response):
+        """Передача заголовков лимитов ограничителю"""
+        kind = "audio" if "/audio/" in response.request.url.path else "chat"
+        self.rate_limiter.observe_headers(response.headers, kind=kind, status=response.status_code)
+    
+    async def close(self):
+        """Закрытие кэша и собственных HTTP-клиентов (общие закрывает их владелец)"""
+        if self.cache is not None:
+            # Дожидается фоновой записи кэша на диск
+            await asyncio.to_thread(self.cache.close)
+        if self._owns_http_clients:
+            await self.http_clients.close()
+    
+    @staticmethod
+    def _usage_tokens(response) -> Optional[int]:
+        """Фактический расход токенов из response.usage"""
+        total = getattr(getattr(response, "usage", None), "total_tokens", None)
+        return total if isinstance(total, int) else None
+    
+    def _record_usage(self, response, operation: str, model: str, route: Route):
+        """Учет токенов и стоимости из response.usage в метриках"""
+        usage = getattr(response, "usage", None)
+        counted = {}
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None)
+            if isinstance(tokens, int):
+                counted[kind] = tokens
+                OPENAI_TOKENS.inc(tokens, kind=kind, operation=operation, model=model, source="usage")
+        # Часть входных токенов, взятая провайдером из кэша префикса (если API ее сообщает)
+        cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+        if isinstance(cached, int):
+            OPENAI_TOKENS.inc(cached, kind="cached_prompt", operation=operation, model=model, source="usage")
+        if counted:
+            self.router.record_cost(route, model, counted.get("prompt", 0), counted.get("completion", 0))
+    
+    async def _chat_completion(self, task: str, system_prompt: str, text: str,
+                               max_tokens: int, temperature: float,
+                               operation: str = "chat", hedge: bool = False) -> str:
+        """Запрос к chat.completions через маршрут модели с кэшированием результата"""
+        route = self.router.route(task, self.token_budget.count(text))
+        if self.cache is not None:
+            cached = await self.cache.get(EnhancementCache.make_key(
+                route.model, system_prompt, text, temperature, max_tokens
+            ))
+            CACHE_REQUESTS.inc(operation=operation, result="hit" if cached is not None else "miss")
+            if cached is not None:
+                return cached
+        
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(text) + max_tokens
+        
+        async def request(model: str, budget: Optional[float]):
+            async def attempt(permit):
+                response = await self.backend.chat_completion(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": text}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature
                 )
+                permit.actual_tokens = self._usage_tokens(response)
+                return response
+            
+            # Допуск ограничителя — на каждую попытку, но вне ее таймаута: очередь не считается медленным ответом
+            response = await self.resilience.call(
+                operation, attempt, hedge=hedge,
+                admit=lambda: self.rate_limiter.limit("chat", tokens),
+                busy=lambda: self.rate_limiter.busy("chat"),
+                budget=budget
+            )
+            self._record_usage(response, operation, model, route)
+            return response
+        
+        response, model = await self.router.call(route, request)
+        content = response.choices[0].message.content.strip()
+        
+        if self.cache is not None and content:
+            # Ответ запасной модели кэшируется под ее ключом, а не под ключом модели маршрута
+            self.cache.set(EnhancementCache.make_key(model, system_prompt, text, temperature, max_tokens), content)
+        return content
+    
+    @timed(OPENAI_LATENCY, OPENAI_ERRORS, method="transcribe_audio")
+    async def transcribe_audio(self, audio: Union[str, bytes, BinaryIO], filename: str = "voice.ogg") -> str:
+        """Транскрибирование аудио в текст (путь к файлу, байты или файловый объект)"""
+        async def request(permit):
+            if isinstance(audio, str):
+                with open(audio, "rb") as audio_file:
+                    return await self._transcribe(audio_file)
+            if isinstance(audio, (bytes, bytearray)):
+                return await self._transcribe((filename, bytes(audio)))
+            # Файловый объект перематываем, чтобы повтор отправил его целиком
+            audio.seek(0)
+            return await self._transcribe((filename, audio))
+        
+        try:
+            transcript = await self.resilience.call(
+                "transcribe", request, admit=lambda: self.rate_limiter.limit("audio")
+            )
             return transcript.text
         except Exception as e:
-            raise Exception(f"Ошибка транскрибирования: {str(e)}")
+            raise OpenAIServiceError(f"Ошибка транскрибирования: {str(e)}")
     
-    async def enhance_text(self, text: str, enhancement_type: EnhancementType, 
-                          custom_prompt: Optional[str] = None) -> EnhancementResponse:
-        """Улучшение текста"""
-        
+    async def _transcribe(self, file):
+        """Один запрос к Whisper"""
+        return await self.backend.transcribe(file, model="whisper-1", language="ru")
+    
+    @staticmethod
+    def system_prompt(enhancement_type: EnhancementType, custom_prompt: Optional[str] = None) -> str:
+        """Системный промпт для типа улучшения (одинаковые промпты дают одинаковый ответ)"""
         if enhancement_type == EnhancementType.GRAMMAR:
-            system_prompt = """
-            Ты эксперт по русскому языку. Улучши текст, исправляя:
-            - Грамматические ошибки
-            - Пунктуацию
-            - Убирая слова-паразиты (типа, как бы, ну, вот, так сказать)
-            - Улучшая стиль и читаемость
-            
-            НЕ МЕНЯЙ смысл текста! Сохрани все ключевые идеи и контекст.
-            Верни только улучшенный текст без объяснений.
-            """
+            system_prompt = templates.get(GRAMMAR).text
         elif enhancement_type == EnhancementType.PROMPT_ENHANCEMENT:
-            system_prompt = """
-            Ты эксперт по созданию эффективных промптов для AI-инструментов.
-            Улучши этот промпт, сделав его:
-            - Более структурированным и четким
-            - Оптимизированным для AI-инструментов (Cursor, ChatGPT, Claude)
-            - Содержащим конкретные инструкции
-            - С указанием желаемого формата ответа
-            
-            Сохрани основную цель промпта, но сделай его более эффективным.
-            Верни только улучшенный промпт без объяснений.
-            """
+            system_prompt = templates.get(PROMPT_ENHANCEMENT).text
         elif enhancement_type == EnhancementType.CUSTOM and custom_prompt:
-            system_prompt = custom_prompt
+            system_prompt = templates.custom(custom_prompt)
         else:
             raise ValueError("Неверный тип улучшения или отсутствует кастомный промпт")
+        return system_prompt
+    
+    def enhancement_request(self, text: str, enhancement_type: EnhancementType,
+                            custom_prompt: Optional[str] = None) -> dict:
+        """Тело запроса chat.completions для улучшения (для пакетной обработки через Batch API)"""
+        input_tokens = self.token_budget.count(text)
+        return {
+            "model": self.router.route(enhancement_type.value, input_tokens).model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt(enhancement_type, custom_prompt)},
+                {"role": "user", "content": text}
+            ],
+            "max_tokens": self.token_budget.max_tokens(enhancement_type, input_tokens),
+            "temperature": ENHANCE_TEMPERATURE
+        }
+    
+    def enhancement_requests(self, text: str, enhancement_type: EnhancementType,
+                             custom_prompt: Optional[str] = None) -> List[Tuple[dict, str]]:
+        """Тела запросов для Batch API: длинный текст делится на части, как в enhance_text;
+        для каждой части — разделитель, с которым ответы склеиваются обратно"""
+        if not self.token_budget.should_split(enhancement_type, self.token_budget.count(text)):
+            return [(self.enhancement_request(text, enhancement_type, custom_prompt), "")]
+        return [
+            (self.enhancement_request(chunk, enhancement_type, custom_prompt), separator)
+            for chunk, separator in self.token_budget.split(text)
+        ]
+    
+    async def _enhance_chunks(self, system_prompt: str, text: str,
+                              enhancement_type: EnhancementType) -> AsyncIterator[str]:
+        """Длинный текст: части улучшаются параллельно и выдаются по порядку с исходными разделителями"""
+        chunks = self.token_budget.split(text)
+        semaphore = asyncio.Semaphore(self.token_budget.chunk_max_parallel)
+        
+        async def run(chunk: str) -> str:
+            async with semaphore:
+                return await self._chat_completion(
+                    enhancement_type.value, system_prompt, chunk,
+                    max_tokens=self.token_budget.max_tokens(enhancement_type, self.token_budget.count(chunk)),
+                    temperature=ENHANCE_TEMPERATURE, operation="enhance_chunk", hedge=True
+                )
         
+        tasks = [asyncio.create_task(run(chunk)) for chunk, _ in chunks]
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
-                ],
-                max_tokens=2000,
-                temperature=0.3
-            )
-            
-            enhanced_text = response.choices[0].message.content.strip()
+            for task, (_, separator) in zip(tasks, chunks):
+                yield (await task).strip() + separator
+        finally:
+            # Без одной части результат неполон: остальные запросы не нужны
+            for task in tasks:
+                task.cancel()
+    
+    @timed(OPENAI_LATENCY, OPENAI_ERRORS, method="enhance_text")
+    async def enhance_text(self, text: str, enhancement_type: EnhancementType, 
+                          custom_prompt: Optional[str] = None) -> EnhancementResponse:
+        """Улучшение текста"""
+        
+        system_prompt = self.system_prompt(enhancement_type, custom_prompt)
+        ENHANCEMENTS.inc(type=enhancement_type.value, mode="complete")
+        
+        input_tokens = self.token_budget.count(text)
+        
+        try:
+            if self.token_budget.should_split(enhancement_type, input_tokens):
+                parts = [part async for part in self._enhance_chunks(system_prompt, text, enhancement_type)]
+                enhanced_text = "".join(parts).strip()
+            else:
+                enhanced_text = await self._chat_completion(
+                    enhancement_type.value, system_prompt, text,
+                    max_tokens=self.token_budget.max_tokens(enhancement_type, input_tokens),
+                    temperature=ENHANCE_TEMPERATURE, operation="enhance", hedge=True
+                )
             
             return EnhancementResponse(
                 original_text=text,
@@ -79,31 +254,112 @@ class OpenAIService:
             )
             
         except Exception as e:
-            raise Exception(f"Ошибка улучшения текста: {str(e)}")
+            raise OpenAIServiceError(f"Ошибка улучшения текста: {str(e)}")
     
-    async def analyze_text_type(self, text: str) -> str:
-        """Анализ типа текста для определения лучшего способа улучшения"""
-        system_prompt = """
-        Проанализируй текст и определи его тип:
-        - "prompt" - если это промпт для AI-инструмента
-        - "text" - если это обычный текст
+    async def enhance_text_stream(self, text: str, enhancement_type: EnhancementType,
+                                  custom_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Потоковое улучшение текста: выдает фрагменты ответа по мере генерации"""
+        system_prompt = self.system_prompt(enhancement_type, custom_prompt)
+        input_tokens = self.token_budget.count(text)
+        temperature = ENHANCE_TEMPERATURE
+        started = time.monotonic()
+        ENHANCEMENTS.inc(type=enhancement_type.value, mode="stream")
+        
+        if self.token_budget.should_split(enhancement_type, input_tokens):
+            try:
+                async for part in self._enhance_chunks(system_prompt, text, enhancement_type):
+                    yield part
+            except Exception as e:
+                OPENAI_ERRORS.inc(method="enhance_text_stream")
+                raise OpenAIServiceError(f"Ошибка улучшения текста: {str(e)}")
+            finally:
+                OPENAI_LATENCY.observe(time.monotonic() - started, method="enhance_text_stream")
+            return
+        
+        max_tokens = self.token_budget.max_tokens(enhancement_type, input_tokens)
+        route = self.router.route(enhancement_type.value, input_tokens)
+        if self.cache is not None:
+            cached = await self.cache.get(EnhancementCache.make_key(
+                route.model, system_prompt, text, temperature, max_tokens
+            ))
+            CACHE_REQUESTS.inc(operation="enhance_stream", result="hit" if cached is not None else "miss")
+            if cached is not None:
+                OPENAI_LATENCY.observe(time.monotonic() - started, method="enhance_text_stream")
+                yield cached
+                return
         
-        Верни только одно слово: "prompt" или "text"
-        """
+        stream = None
+        parts = []
+        prompt_tokens = estimate_tokens(system_prompt) + input_tokens
         
+        async def open_stream(route_model: str, budget: Optional[float]):
+            # Повторяется только установка потока: после первых фрагментов повтор невозможен
+            opened = await self.resilience.call(
+                "enhance_stream",
+                lambda: self.backend.stream_chat(
+                    model=route_model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": text}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                ),
+                budget=budget
+            )
+            return opened
+        
+        try:
+            async with self.rate_limiter.limit("chat", prompt_tokens + max_tokens) as permit:
+                # Запасная модель подключается, только пока поток не начат
+                stream, model = await self.router.call(route, open_stream)
+                
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if not parts:
+                            STREAM_FIRST_TOKEN.observe(time.monotonic() - started)
+                        parts.append(delta)
+                        yield delta
+                
+                # В потоке нет usage — оцениваем расход по сгенерированному тексту
+                completion_tokens = estimate_tokens("".join(parts))
+                permit.actual_tokens = prompt_tokens + completion_tokens
+                for kind, tokens in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+                    OPENAI_TOKENS.inc(tokens, kind=kind, operation="enhance_stream",
+                                      model=model, source="estimate")
+                self.router.record_cost(route, model, prompt_tokens, completion_tokens)
+        except Exception as e:
+            OPENAI_ERRORS.inc(method="enhance_text_stream")
+            raise OpenAIServiceError(f"Ошибка улучшения текста: {str(e)}")
+        finally:
+            OPENAI_LATENCY.observe(time.monotonic() - started, method="enhance_text_stream")
+            # Закрываем соединение, даже если потребитель прервал поток
+            if stream is not None:
+                await stream.aclose()
+        
+        enhanced_text = "".join(parts).strip()
+        # Пустой ответ не кэшируем, иначе он отдавался бы до истечения TTL
+        if self.cache is not None and enhanced_text:
+            self.cache.set(
+                EnhancementCache.make_key(model, system_prompt, text, temperature, max_tokens),
+                enhanced_text
+            )
+    
+    @timed(OPENAI_LATENCY, OPENAI_ERRORS, method="analyze_text_type")
+    async def analyze_text_type(self, text: str) -> str:
+        """Анализ типа текста для определения лучшего способа улучшения"""
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
-                ],
-                max_tokens=10,
-                temperature=0.1
+            text_type = await self._chat_completion(
+                CLASSIFY_TASK, templates.get(CLASSIFY).text, text, max_tokens=10, temperature=0.1,
+                operation="classify"
             )
             
-            return response.choices[0].message.content.strip().lower()
+            return text_type.lower()
             
         except Exception as e:
             # В случае ошибки считаем текстом
+            OPENAI_ERRORS.inc(method="analyze_text_type")
             return "text" 
\ No newline at end of file
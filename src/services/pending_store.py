@@ -0,0 +1,60 @@
+import asyncio
+import secrets
+import time
+from typing import Optional
+from src.models.enhancement import PendingText, TextSource
+from src.services.tiered_store import TieredStore
+
+
+class PendingTextStore:
+    """Хранилище текстов, ожидающих нажатия кнопки, по короткому токену"""
+
+    def __init__(self, ttl: int = 86400, max_entries: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024, storage_path: Optional[str] = None):
+        self.ttl = ttl
+        self.storage_path = storage_path
+        # Общий SQLite (может разделяться несколькими репликами) читается и пишется в потоке хранилища
+        self._store: TieredStore[PendingText] = TieredStore(
+            "pending_texts", ttl=ttl, max_entries=max_entries, path=storage_path, max_bytes=max_bytes,
+            serialize=lambda pending: pending.model_dump_json(),
+            deserialize=PendingText.model_validate_json,
+            sizeof=lambda pending: len(pending.text.encode("utf-8"))
+        )
+
+    @classmethod
+    def from_settings(cls) -> "PendingTextStore":
+        """Создание хранилища по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            ttl=settings.pending_ttl,
+            max_entries=settings.pending_max_entries,
+            max_bytes=settings.pending_max_bytes,
+            storage_path=settings.pending_store_path
+        )
+
+    async def put(self, text: str, user_id: int, source: TextSource = TextSource.TEXT) -> str:
+        """Сохранение текста, возвращает токен для callback_data"""
+        pending = PendingText(
+            token=secrets.token_urlsafe(8),
+            text=text,
+            user_id=user_id,
+            source=source,
+            created_at=time.time()
+        )
+        written = self._store.set(pending.token, pending)
+        if written is not None:
+            # Нажатие кнопки может прийти на другую реплику: текст должен быть на диске до ответа
+            await asyncio.wrap_future(written)
+        return pending.token
+
+    async def get(self, token: str) -> Optional[PendingText]:
+        """Получение текста по токену (None, если не найден или устарел)"""
+        return await self._store.get(token)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def close(self):
+        """Закрытие дискового хранилища"""
+        self._store.close()
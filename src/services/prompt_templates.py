@@ -0,0 +1,114 @@
+import hashlib
+import re
+import textwrap
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List
+from src.services.metrics import registry
+from src.services.rate_limiter import estimate_tokens
+
+TEMPLATE_TOKENS = registry.gauge("prompt_template_tokens", "Оценка числа токенов системных промптов")
+
+_TRAILING_SPACES = re.compile(r"[ \t]+$", re.MULTILINE)
+_EXTRA_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+@lru_cache(maxsize=1024)
+def normalize_prompt(text: str) -> str:
+    """Приведение промпта к каноничному виду: без общего отступа, хвостовых пробелов и лишних пустых строк"""
+    text = textwrap.dedent(text)
+    text = _TRAILING_SPACES.sub("", text)
+    text = _EXTRA_BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Нормализованный системный промпт с версией"""
+    name: str
+    version: int
+    text: str
+    tokens: int = field(compare=False)
+
+    @property
+    def fingerprint(self) -> str:
+        """Короткий хэш текста: по нему видно, какой вариант промпта ушел в запрос"""
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:12]
+
+
+class PromptRegistry:
+    """Реестр системных промптов, нормализуемых один раз при регистрации"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, name: str, text: str, version: int = 1) -> PromptTemplate:
+        """Регистрация промпта (повторная регистрация имени требует новой версии)"""
+        current = self._templates.get(name)
+        if current is not None and current.version >= version:
+            raise ValueError(f"Промпт {name} v{current.version} уже зарегистрирован")
+
+        normalized = normalize_prompt(text)
+        template = PromptTemplate(name, version, normalized, estimate_tokens(normalized))
+        self._templates[name] = template
+        if current is not None:
+            TEMPLATE_TOKENS.set(0, template=name, version=str(current.version))
+        TEMPLATE_TOKENS.set(template.tokens, template=name, version=str(version))
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise KeyError(f"Неизвестный промпт: {name}") from None
+
+    def custom(self, prompt: str) -> str:
+        """Нормализация пользовательского промпта (результат кэшируется)"""
+        return normalize_prompt(prompt)
+
+    def report(self) -> List[dict]:
+        """Сводка по промптам: версия, токены, отпечаток"""
+        return [
+            {"name": t.name, "version": t.version, "tokens": t.tokens, "fingerprint": t.fingerprint}
+            for t in self._templates.values()
+        ]
+
+
+GRAMMAR = "grammar"
+PROMPT_ENHANCEMENT = "prompt_enhancement"
+CLASSIFY = "classify"
+
+# Статичный системный промпт идет первым сообщением, а изменчивый текст пользователя — последним:
+# так одинаковый префикс запросов может переиспользоваться провайдером
+templates = PromptRegistry()
+
+templates.register(GRAMMAR, """
+    Ты эксперт по русскому языку. Улучши текст, исправляя:
+    - Грамматические ошибки
+    - Пунктуацию
+    - Убирая слова-паразиты (типа, как бы, ну, вот, так сказать)
+    - Улучшая стиль и читаемость
+
+    НЕ МЕНЯЙ смысл текста! Сохрани все ключевые идеи и контекст.
+    Верни только улучшенный текст без объяснений.
+""")
+
+templates.register(PROMPT_ENHANCEMENT, """
+    Ты эксперт по созданию эффективных промптов для AI-инструментов.
+    Улучши этот промпт, сделав его:
+    - Более структурированным и четким
+    - Оптимизированным для AI-инструментов (Cursor, ChatGPT, Claude)
+    - Содержащим конкретные инструкции
+    - С указанием желаемого формата ответа
+
+    Сохрани основную цель промпта, но сделай его более эффективным.
+    Верни только улучшенный промпт без объяснений.
+""")
+
+templates.register(CLASSIFY, """
+    Проанализируй текст и определи его тип:
+    - "prompt" - если это промпт для AI-инструмента
+    - "text" - если это обычный текст
+
+    Верни только одно слово: "prompt" или "text"
+""")
@@ -0,0 +1,201 @@
+import asyncio
+import math
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Mapping, Optional
+from src.services.metrics import registry
+
+# Метрики ограничителя
+LIMITER_WAIT = registry.histogram(
+    "openai_limiter_wait_seconds", "Время ожидания разрешения на запрос к OpenAI"
+)
+LIMITER_THROTTLED = registry.counter(
+    "openai_limiter_throttled_total", "Запросы, ожидавшие бюджета RPM/TPM"
+)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """Разбор длительности из заголовков OpenAI ("1s", "6m0s", "20ms") в секунды"""
+    parts = _DURATION_RE.findall(value or "")
+    if not parts:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов текста (кириллица ~3 символа на токен)"""
+    return math.ceil(len(text) / 3)
+
+
+class TokenBucket:
+    """Бюджет на минуту, пополняемый равномерно"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Сколько ждать, пока в бюджете будет amount"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Возврат (или доначисление при отрицательном amount) после точного подсчета"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def update_limit(self, per_minute: float):
+        """Подстройка емкости под лимит, сообщенный сервером"""
+        self._refill()
+        self.capacity = float(per_minute)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def update_remaining(self, remaining: float):
+        """Учет остатка, сообщенного сервером (берем более строгое значение)"""
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+
+class Permit:
+    """Разрешение на запрос; после ответа можно сообщить фактический расход токенов"""
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+
+
+class OpenAIRateLimiter:
+    """Ограничение параллельности и бюджетов RPM/TPM для запросов к OpenAI с очередью FIFO"""
+
+    KINDS = ("chat", "audio")
+
+    def __init__(self, max_concurrent: int = 16, requests_per_minute: int = 500,
+                 tokens_per_minute: int = 30000, audio_requests_per_minute: int = 50):
+        self._concurrency = asyncio.Semaphore(max_concurrent)
+        self._requests: Dict[str, Optional[TokenBucket]] = {
+            "chat": TokenBucket(requests_per_minute) if requests_per_minute else None,
+            "audio": TokenBucket(audio_requests_per_minute) if audio_requests_per_minute else None,
+        }
+        self._tokens: Optional[TokenBucket] = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        # Блокировки asyncio пропускают ожидающих в порядке прихода
+        self._admission = {kind: asyncio.Lock() for kind in self.KINDS}
+        self._paused_until = {kind: 0.0 for kind in self.KINDS}
+
+    @classmethod
+    def from_settings(cls) -> "OpenAIRateLimiter":
+        """Создание ограничителя по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            max_concurrent=settings.openai_max_concurrent,
+            requests_per_minute=settings.openai_requests_per_minute,
+            tokens_per_minute=settings.openai_tokens_per_minute,
+            audio_requests_per_minute=settings.openai_audio_requests_per_minute
+        )
+
+    def _wait_time(self, kind: str, tokens: int) -> float:
+        """Сколько ждать до появления бюджета"""
+        wait = max(0.0, self._paused_until[kind] - time.monotonic())
+        requests = self._requests[kind]
+        if requests is not None:
+            wait = max(wait, requests.time_until(1))
+        if kind == "chat" and self._tokens is not None and tokens:
+            wait = max(wait, self._tokens.time_until(tokens))
+        return wait
+
+    async def _wait_for_budget(self, kind: str, tokens: int):
+        """Ожидание бюджета и его списание"""
+        throttled = False
+        while True:
+            wait = self._wait_time(kind, tokens)
+            if wait <= 0:
+                break
+            if not throttled:
+                LIMITER_THROTTLED.inc(kind=kind)
+                throttled = True
+            await asyncio.sleep(wait)
+
+        requests = self._requests[kind]
+        if requests is not None:
+            requests.take(1)
+        if kind == "chat" and self._tokens is not None and tokens:
+            self._tokens.take(tokens)
+
+    @asynccontextmanager
+    async def limit(self, kind: str = "chat", tokens: int = 0) -> AsyncIterator[Permit]:
+        """Ожидание своей очереди и бюджета; внутри блока выполняется запрос"""
+        started = time.monotonic()
+        async with self._admission[kind]:
+            await self._wait_for_budget(kind, tokens)
+        await self._concurrency.acquire()
+        LIMITER_WAIT.observe(time.monotonic() - started, kind=kind)
+
+        permit = Permit(tokens)
+        try:
+            yield permit
+        finally:
+            self._concurrency.release()
+            if permit.actual_tokens is not None and self._tokens is not None and kind == "chat":
+                self._tokens.refund(tokens - permit.actual_tokens)
+
+    def busy(self, kind: str = "chat") -> bool:
+        """Есть ли очередь: кто-то ждет бюджета или заняты все слоты параллельности"""
+        return self._admission[kind].locked() or self._concurrency.locked()
+
+    def observe_headers(self, headers: Mapping[str, str], kind: str = "chat", status: int = 200):
+        """Подстройка под заголовки x-ratelimit-* и Retry-After из ответа OpenAI"""
+        requests = self._requests[kind]
+
+        if requests is not None:
+            limit = headers.get("x-ratelimit-limit-requests")
+            if limit and limit.isdigit():
+                requests.update_limit(int(limit))
+            remaining = headers.get("x-ratelimit-remaining-requests")
+            if remaining and remaining.isdigit():
+                requests.update_remaining(int(remaining))
+
+        if kind == "chat" and self._tokens is not None:
+            limit = headers.get("x-ratelimit-limit-tokens")
+            if limit and limit.isdigit():
+                self._tokens.update_limit(int(limit))
+            remaining = headers.get("x-ratelimit-remaining-tokens")
+            if remaining and remaining.isdigit():
+                self._tokens.update_remaining(int(remaining))
+
+        if status == 429:
+            delay = parse_reset(headers.get("retry-after", ""))
+            if delay is None:
+                delay = max(
+                    parse_reset(headers.get("x-ratelimit-reset-requests", "")) or 0.0,
+                    parse_reset(headers.get("x-ratelimit-reset-tokens", "")) or 0.0,
+                    1.0
+                )
+            self._paused_until[kind] = max(self._paused_until[kind], time.monotonic() + delay)
+
+    def wait_time_quantile(self, q: float, kind: str = "chat") -> Optional[float]:
+        """Квантиль времени ожидания (для оценки нагрузки)"""
+        return LIMITER_WAIT.quantile(q, kind=kind)
@@ -0,0 +1,162 @@
+import asyncio
+import random
+import time
+from typing import Any, AsyncContextManager, Awaitable, Callable, Optional, TypeVar
+
+import openai
+from src.services.metrics import registry
+
+T = TypeVar("T")
+
+# Метрики устойчивости
+CALL_LATENCY = registry.histogram("openai_call_latency_seconds", "Длительность успешных попыток запроса")
+RETRIES = registry.counter("openai_retries_total", "Повторные попытки запросов к OpenAI")
+TIMEOUTS = registry.counter("openai_timeouts_total", "Попытки, прерванные по таймауту")
+HEDGES = registry.counter("openai_hedges_total", "Запущенные дублирующие запросы")
+HEDGE_WINS = registry.counter("openai_hedge_wins_total", "Какой из запросов завершился первым")
+HEDGES_SKIPPED = registry.counter("openai_hedges_skipped_total", "Дублирования, пропущенные из-за очереди ограничителя")
+
+# Ошибки, после которых имеет смысл повторить запрос
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class ResiliencePolicy:
+    """Политика таймаутов, повторов с экспоненциальной задержкой и дублирующих запросов"""
+
+    # Минимум наблюдений, чтобы доверять оценке p95 для дублирования
+    HEDGE_MIN_SAMPLES = 20
+
+    def __init__(self, timeout: float = 60.0, deadline: float = 120.0, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 hedge_enabled: bool = False, hedge_delay: float = 0.0,
+                 hedge_default_delay: float = 5.0):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_enabled = hedge_enabled
+        # 0 — задержка дублирования берется из p95 латентности операции
+        self.hedge_delay = hedge_delay
+        self.hedge_default_delay = hedge_default_delay
+
+    @classmethod
+    def from_settings(cls) -> "ResiliencePolicy":
+        """Создание политики по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            timeout=settings.openai_timeout,
+            deadline=settings.openai_deadline,
+            max_retries=settings.openai_max_retries,
+            backoff_base=settings.openai_backoff_base,
+            backoff_max=settings.openai_backoff_max,
+            hedge_enabled=settings.openai_hedge_enabled,
+            hedge_delay=settings.openai_hedge_delay
+        )
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """Можно ли повторить запрос после ошибки"""
+        if isinstance(error, RETRYABLE_ERRORS):
+            return True
+        status = getattr(error, "status_code", None)
+        return isinstance(status, int) and (status >= 500 or status in (408, 409))
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повтором: экспонента с полным джиттером"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def hedge_after(self, operation: str) -> float:
+        """Через сколько секунд запускать дублирующий запрос"""
+        if self.hedge_delay > 0:
+            return self.hedge_delay
+        if CALL_LATENCY.count(operation=operation) >= self.HEDGE_MIN_SAMPLES:
+            return CALL_LATENCY.quantile(0.95, operation=operation)
+        return self.hedge_default_delay
+
+    async def call(self, operation: str, factory: Callable[..., Awaitable[T]], hedge: bool = False,
+                   admit: Optional[Callable[[], AsyncContextManager[Any]]] = None,
+                   busy: Optional[Callable[[], bool]] = None, budget: Optional[float] = None) -> T:
+        """Выполнение запроса с таймаутами, повторами и (опционально) дублированием.
+        admit — допуск ограничителя на каждую попытку: таймаут и латентность считаются после допуска,
+        значение контекста передается в factory; busy — есть ли очередь у ограничителя (тогда без дублей);
+        budget — бюджет латентности попытки: по его истечении запрос не повторяется (решает вызывающий)"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            timeout = min(self.timeout, remaining, budget) if budget else min(self.timeout, remaining)
+            try:
+                if hedge and self.hedge_enabled:
+                    return await self._hedged(operation, factory, timeout, admit, busy)
+                return await self._attempt(operation, factory, timeout, admit)
+            except Exception as e:
+                if not self.is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                if budget and isinstance(e, asyncio.TimeoutError):
+                    # Модель не уложилась в бюджет: вызывающий переходит на запасную, а не ждет повтора
+                    raise
+                delay = self.backoff(attempt)
+                if time.monotonic() - started + delay >= self.deadline:
+                    raise
+                RETRIES.inc(operation=operation)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, operation: str, factory: Callable[..., Awaitable[T]], timeout: float,
+                       admit: Optional[Callable[[], AsyncContextManager[Any]]] = None) -> T:
+        """Одна попытка с таймаутом; ожидание допуска в таймаут и латентность не входит"""
+        if admit is not None:
+            async with admit() as permit:
+                return await self._attempt(operation, lambda: factory(permit), timeout)
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(factory(), timeout)
+        except asyncio.TimeoutError:
+            TIMEOUTS.inc(operation=operation)
+            raise
+        CALL_LATENCY.observe(time.monotonic() - started, operation=operation)
+        return result
+
+    async def _hedged(self, operation: str, factory: Callable[..., Awaitable[T]], timeout: float,
+                      admit: Optional[Callable[[], AsyncContextManager[Any]]] = None,
+                      busy: Optional[Callable[[], bool]] = None) -> T:
+        """Основной запрос и дублирующий после задержки: берется первый успешный"""
+        primary = asyncio.create_task(self._attempt(operation, factory, timeout, admit))
+        names = {primary: "primary"}
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=min(self.hedge_after(operation), timeout))
+            if done:
+                pending = set()
+                return primary.result()
+
+            if busy is not None and busy():
+                # Задержка из-за очереди ограничителя: дубль занял бы еще одно разрешение
+                HEDGES_SKIPPED.inc(operation=operation)
+                return await primary
+
+            HEDGES.inc(operation=operation)
+            hedge = asyncio.create_task(self._attempt(operation, factory, timeout, admit))
+            names[hedge] = "hedge"
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        HEDGE_WINS.inc(operation=operation, winner=names[task])
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
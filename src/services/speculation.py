@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.models.enhancement import EnhancementResponse, EnhancementType
+from src.services.metrics import registry
+from src.services.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SPECULATIONS = registry.counter(
+    "speculations_total", "Упреждающие улучшения по исходам (started/skipped/hit/miss/expired/failed)"
+)
+SPECULATION_TOKENS = registry.counter(
+    "speculation_tokens_total", "Оценка токенов упреждающих улучшений (used — пригодились, wasted — нет)"
+)
+SPECULATION_SAVED = registry.histogram(
+    "speculation_saved_seconds", "Сколько секунд ожидания сэкономило упреждающее улучшение"
+)
+
+EnhanceFunc = Callable[[str, EnhancementType], Awaitable[EnhancementResponse]]
+
+
+@dataclass
+class Speculation:
+    """Запущенное упреждающее улучшение текста"""
+    token: str
+    user_id: int
+    text: str
+    enhancement_type: EnhancementType
+    task: asyncio.Task
+    started_at: float
+    expiry: asyncio.TimerHandle
+
+
+class SpeculativeEnhancer:
+    """Упреждающее улучшение наиболее вероятного варианта, пока пользователь выбирает кнопку"""
+
+    def __init__(self, enhance: EnhanceFunc, ttl: float = 120.0, max_in_flight: int = 8,
+                 max_text_length: int = 2000):
+        self.enhance = enhance
+        self.ttl = ttl
+        self.max_in_flight = max_in_flight
+        self.max_text_length = max_text_length
+        self._speculations: Dict[str, Speculation] = {}
+        # Последняя спекуляция пользователя: новый текст делает прежнюю ненужной
+        self._by_user: Dict[int, str] = {}
+
+    @classmethod
+    def from_settings(cls, enhance: EnhanceFunc) -> Optional["SpeculativeEnhancer"]:
+        """Создание по настройкам приложения (None, если режим выключен)"""
+        from config.settings import settings
+
+        if not settings.speculation_enabled:
+            return None
+        return cls(
+            enhance,
+            ttl=settings.speculation_ttl,
+            max_in_flight=settings.speculation_max_in_flight,
+            max_text_length=settings.speculation_max_text_length
+        )
+
+    @staticmethod
+    def likely_type(text_type: str) -> EnhancementType:
+        """Наиболее вероятный выбор пользователя для типа текста"""
+        if text_type == "prompt":
+            return EnhancementType.PROMPT_ENHANCEMENT
+        return EnhancementType.GRAMMAR
+
+    def in_flight(self) -> int:
+        """Число незавершенных упреждающих запросов"""
+        return sum(1 for speculation in self._speculations.values() if not speculation.task.done())
+
+    def start(self, token: str, text: str, user_id: int, text_type: str) -> bool:
+        """Запуск упреждающего улучшения для сохраненного текста; False — если бюджет не позволяет"""
+        previous = self._by_user.get(user_id)
+        if previous is not None:
+            self._drop(previous, "miss")
+
+        if len(text) > self.max_text_length or self.in_flight() >= self.max_in_flight:
+            SPECULATIONS.inc(outcome="skipped")
+            return False
+
+        enhancement_type = self.likely_type(text_type)
+        loop = asyncio.get_running_loop()
+        self._speculations[token] = Speculation(
+            token=token,
+            user_id=user_id,
+            text=text,
+            enhancement_type=enhancement_type,
+            task=loop.create_task(self.enhance(text, enhancement_type)),
+            started_at=time.monotonic(),
+            expiry=loop.call_later(self.ttl, self._drop, token, "expired")
+        )
+        self._by_user[user_id] = token
+        SPECULATIONS.inc(outcome="started")
+        return True
+
+    def pending_type(self, token: str) -> Optional[EnhancementType]:
+        """Тип улучшения, который выполняется упреждающе для текста"""
+        speculation = self._speculations.get(token)
+        return speculation.enhancement_type if speculation is not None else None
+
+    async def take(self, token: str, enhancement_type: EnhancementType) -> Optional[EnhancementResponse]:
+        """Результат упреждающего улучшения, если пользователь выбрал угаданный вариант"""
+        speculation = self._speculations.get(token)
+        if speculation is None:
+            return None
+        if speculation.enhancement_type != enhancement_type:
+            self._drop(token, "miss")
+            return None
+
+        self._forget(speculation)
+        waited_from = time.monotonic()
+        try:
+            # Незавершенный запрос дожидаемся: повторный стоил бы дороже
+            response = await asyncio.shield(speculation.task)
+        except asyncio.CancelledError:
+            speculation.task.cancel()
+            raise
+        except Exception as e:
+            logger.warning(f"Упреждающее улучшение не удалось: {e}")
+            SPECULATIONS.inc(outcome="failed")
+            return None
+
+        SPECULATIONS.inc(outcome="hit")
+        SPECULATION_TOKENS.inc(self._cost(speculation), outcome="used")
+        SPECULATION_SAVED.observe(waited_from - speculation.started_at)
+        return response
+
+    def discard(self, token: str):
+        """Отмена упреждающего улучшения (текст больше не нужен)"""
+        self._drop(token, "miss")
+
+    def close(self):
+        """Отмена всех упреждающих запросов"""
+        for token in list(self._speculations):
+            self._drop(token, "expired")
+
+    def _drop(self, token: str, outcome: str):
+        """Отмена и учет неиспользованного улучшения"""
+        speculation = self._speculations.get(token)
+        if speculation is None:
+            return
+        self._forget(speculation)
+        speculation.task.cancel()
+        SPECULATIONS.inc(outcome=outcome)
+        SPECULATION_TOKENS.inc(self._cost(speculation), outcome="wasted")
+
+    def _forget(self, speculation: Speculation):
+        self._speculations.pop(speculation.token, None)
+        speculation.expiry.cancel()
+        if self._by_user.get(speculation.user_id) == speculation.token:
+            del self._by_user[speculation.user_id]
+
+    @staticmethod
+    def _cost(speculation: Speculation) -> int:
+        """Оценка израсходованных токенов: вход всегда, выход — если ответ получен"""
+        tokens = estimate_tokens(speculation.text)
+        task = speculation.task
+        if task.done() and not task.cancelled() and task.exception() is None:
+            tokens += estimate_tokens(task.result().enhanced_text)
+        return tokens
@@ -0,0 +1,139 @@
+import json
+import math
+import os
+import re
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "text_classifier_model.json")
+
+# Глаголы в повелительном наклонении, с которых обычно начинаются промпты
+IMPERATIVE_VERBS = (
+    "создай", "напиши", "сделай", "объясни", "придумай", "сгенерируй", "помоги",
+    "реализуй", "добавь", "исправь", "переведи", "составь", "опиши", "проанализируй",
+    "оптимизируй", "перепиши", "улучши", "расскажи", "покажи", "найди", "сравни",
+    "разработай", "подготовь", "предложи", "представь", "сформулируй", "набросай",
+    "write", "create", "generate", "explain", "implement", "build", "make", "add",
+    "fix", "refactor", "translate", "summarize", "describe", "design", "act",
+)
+AI_TOOL_WORDS = (
+    "cursor", "chatgpt", "gpt", "claude", "copilot", "midjourney", "нейросеть",
+    "нейросети", "ии", "ai", "llm", "модель", "ассистент", "бот",
+)
+ROLE_PATTERNS = (
+    r"\bты\s*[-—–]?\s*(опытный|эксперт|профессиональный|senior|специалист)",
+    r"\bпредставь,?\s+что\b", r"\bвыступи\s+в\s+роли\b", r"\bact\s+as\b", r"\byou\s+are\b",
+    r"\bв\s+роли\b",
+)
+FORMAT_WORDS = (
+    "формат", "json", "markdown", "таблиц", "списк", "список", "пример", "шаг",
+    "пошагов", "структур", "требовани", "ограничени", "format", "step",
+)
+CODE_WORDS = (
+    "функци", "код", "python", "javascript", "typescript", "api", "класс", "метод",
+    "скрипт", "sql", "endpoint", "компонент", "тест", "баг", "ошибк", "react", "docker",
+)
+CONVERSATIONAL_WORDS = (
+    "привет", "как дела", "спасибо", "вчера", "сегодня", "завтра", "мы с", "я был",
+    "я была", "было", "ходил", "ходили", "погода", "кстати", "короче",
+)
+
+_WORD_RE = re.compile(r"[\w'-]+", re.UNICODE)
+_LIST_LINE_RE = re.compile(r"^\s*([-*•]|\d+[.)])\s+", re.MULTILINE)
+
+
+def extract_features(text: str) -> Dict[str, float]:
+    """Извлечение признаков текста для линейного классификатора"""
+    lowered = text.lower()
+    words = _WORD_RE.findall(lowered)
+    first_words = words[:3]
+    lines = [line for line in text.splitlines() if line.strip()]
+
+    return {
+        "starts_imperative": float(any(word in IMPERATIVE_VERBS for word in first_words)),
+        "imperative_count": float(min(sum(1 for word in words if word in IMPERATIVE_VERBS), 5)),
+        "ai_tool": float(any(word in AI_TOOL_WORDS for word in words)),
+        "role": float(any(re.search(pattern, lowered) for pattern in ROLE_PATTERNS)),
+        "format": float(min(sum(1 for word in FORMAT_WORDS if word in lowered), 5)),
+        "code": float(min(sum(1 for word in CODE_WORDS if word in lowered), 5)),
+        "code_block": float("`" in text),
+        "list_lines": float(min(len(_LIST_LINE_RE.findall(text)), 10)),
+        "multiline": float(len(lines) > 1),
+        "question": float("?" in text),
+        "conversational": float(min(sum(1 for word in CONVERSATIONAL_WORDS if word in lowered), 5)),
+        "log_length": math.log1p(len(words)),
+    }
+
+
+class LocalTextClassifier:
+    """Быстрый локальный классификатор "prompt"/"text" на линейной модели"""
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, model: Optional[dict] = None):
+        # Готовые веса (например, из обучения при перекрестной проверке) вместо файла
+        if model is None:
+            with open(model_path, "r", encoding="utf-8") as f:
+                model = json.load(f)
+        self.version = model.get("version", 1)
+        self.bias: float = model["bias"]
+        self.weights: Dict[str, float] = model["weights"]
+
+    def predict_proba(self, text: str) -> float:
+        """Вероятность того, что текст является промптом"""
+        features = extract_features(text)
+        score = self.bias + sum(
+            self.weights.get(name, 0.0) * value for name, value in features.items()
+        )
+        return 1.0 / (1.0 + math.exp(-score))
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Классификация текста: метка и уверенность"""
+        probability = self.predict_proba(text)
+        if probability >= 0.5:
+            return "prompt", probability
+        return "text", 1.0 - probability
+
+
+class TextTypeClassifier:
+    """Стадия классификации: локальная модель с откатом к LLM при низкой уверенности"""
+
+    MODES = ("local", "llm", "hybrid")
+
+    def __init__(self, llm_classify: Optional[Callable[[str], Awaitable[str]]] = None,
+                 local: Optional[LocalTextClassifier] = None,
+                 mode: str = "hybrid", confidence_threshold: float = 0.75):
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим классификатора: {mode}")
+        if mode != "local" and llm_classify is None:
+            raise ValueError("Для режима с LLM нужен llm_classify")
+
+        self.mode = mode
+        self.confidence_threshold = confidence_threshold
+        self.llm_classify = llm_classify
+        self.local = local if local is not None or mode == "llm" else LocalTextClassifier()
+
+        # Счетчики
+        self.local_decisions = 0
+        self.llm_decisions = 0
+
+    @classmethod
+    def from_settings(cls, llm_classify: Optional[Callable[[str], Awaitable[str]]] = None
+                      ) -> "TextTypeClassifier":
+        """Создание классификатора по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            llm_classify=llm_classify,
+            mode=settings.classifier_mode,
+            confidence_threshold=settings.classifier_confidence_threshold
+        )
+
+    async def classify(self, text: str) -> str:
+        """Определение типа текста ("prompt" или "text")"""
+        if self.mode != "llm":
+            label, confidence = self.local.classify(text)
+            if self.mode == "local" or confidence >= self.confidence_threshold:
+                self.local_decisions += 1
+                return label
+
+        self.llm_decisions += 1
+        return await self.llm_classify(text)
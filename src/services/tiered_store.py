@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class TieredStore(Generic[V]):
+    """LRU в памяти со сроком жизни + опциональная таблица SQLite; диск — только в отдельном потоке"""
+
+    # Как часто (в записях) чистить диск от просроченных и лишних записей
+    DISK_PURGE_INTERVAL = 100
+    # Сколько обращений копить до записи времени доступа на диск
+    TOUCH_FLUSH_INTERVAL = 100
+
+    def __init__(self, table: str, ttl: float, max_entries: int,
+                 path: Optional[str] = None, max_bytes: int = 0, disk_max_entries: int = 0,
+                 serialize: Callable[[V], str] = str, deserialize: Callable[[str], V] = str,
+                 sizeof: Optional[Callable[[V], int]] = None):
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 — без ограничения объема
+        self.path = path
+        self.disk_max_entries = disk_max_entries  # 0 — без ограничения
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.sizeof = sizeof or (lambda value: len(serialize(value).encode("utf-8")))
+
+        # Память: ключ -> (истекает, значение, размер); трогается только из потока событий
+        self._memory: "OrderedDict[str, Tuple[float, V, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        # Время последнего доступа для дискового LRU копится здесь, а не пишется при каждом чтении
+        self._touched: Dict[str, float] = {}
+        self._disk_writes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if path:
+            # Один поток: записи выполняются по порядку, а чтение видит все поставленные до него записи
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{table}-store")
+            self._submit(self._open_disk)
+
+    def _submit(self, func, *args) -> Future:
+        """Дисковая операция в потоке хранилища; ошибки логируются, а не теряются"""
+        def run():
+            try:
+                return func(*args)
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка хранилища {self.table}: {e}")
+                return None
+        return self._executor.submit(run)
+
+    def _open_disk(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+        self._conn.commit()
+
+    def get_memory(self, key: str) -> Optional[V]:
+        """Значение из памяти без обращения к диску"""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.time():
+            self._forget(key)
+            return None
+        self._memory.move_to_end(key)
+        self.memory_hits += 1
+        self._touch(key)
+        return value
+
+    async def get(self, key: str) -> Optional[V]:
+        """Значение из памяти, иначе с диска (чтение в потоке хранилища)"""
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+
+        if self._executor is not None:
+            row = await asyncio.wrap_future(self._submit(self._read, key))
+            if row is not None and row[1] > time.time():
+                value = self.deserialize(row[0])
+                self._remember(key, row[1], value)
+                self.disk_hits += 1
+                self._touch(key)
+                return value
+
+        self.misses += 1
+        return None
+
+    def _read(self, key: str) -> Optional[Tuple[str, float]]:
+        return self._conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+
+    def set(self, key: str, value: V) -> Optional[Future]:
+        """Запись в память сразу, на диск — в потоке хранилища (дождаться можно через возвращенный Future)"""
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(key, expires_at, value)
+        self._touched.pop(key, None)
+        if self._executor is None:
+            return None
+        return self._submit(self._write, key, self.serialize(value), expires_at, now)
+
+    def _write(self, key: str, value: str, expires_at: float, now: float):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, expires_at, now)
+        )
+        self._disk_writes += 1
+        if self._disk_writes % self.DISK_PURGE_INTERVAL == 0:
+            self._purge(now)
+        self._conn.commit()
+
+    def _touch(self, key: str):
+        """Учет доступа для дискового LRU; на диск уходит пачкой"""
+        if self._executor is None:
+            return
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.TOUCH_FLUSH_INTERVAL:
+            self._flush_touched()
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        touched = [(accessed_at, key) for key, accessed_at in self._touched.items()]
+        self._touched = {}
+        self._submit(self._write_touched, touched)
+
+    def _write_touched(self, touched):
+        self._conn.executemany(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", touched)
+        self._conn.commit()
+
+    def _purge(self, now: float):
+        """Удаление просроченных записей и ограничение размера диска"""
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        if self.disk_max_entries > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max_entries,)
+            )
+
+    def _remember(self, key: str, expires_at: float, value: V):
+        """Запись в память с вытеснением самых старых значений по количеству и объему"""
+        if key in self._memory:
+            self._forget(key)
+        size = self.sizeof(value)
+        self._memory[key] = (expires_at, value, size)
+        self._memory_bytes += size
+        while self._memory and (len(self._memory) > self.max_entries
+                                or (self.max_bytes and self._memory_bytes > self.max_bytes)):
+            self._forget(next(iter(self._memory)))
+            self.evictions += 1
+
+    def _forget(self, key: str):
+        _, _, size = self._memory.pop(key)
+        self._memory_bytes -= size
+
+    async def flush(self):
+        """Ожидание всех поставленных дисковых операций (включая время доступа)"""
+        if self._executor is None:
+            return
+        self._flush_touched()
+        await asyncio.wrap_future(self._submit(lambda: None))
+
+    def clear(self):
+        """Очистка памяти и диска"""
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._touched = {}
+        if self._executor is not None:
+            self._submit(self._clear_disk).result()
+
+    def _clear_disk(self):
+        self._conn.execute(f"DELETE FROM {self.table}")
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        """Статистика попаданий и промахов"""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory)
+        }
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def close(self):
+        """Запись накопленного и закрытие диска (дожидается очереди потока)"""
+        if self._executor is None:
+            return
+        self._flush_touched()
+        self._submit(self._close_disk)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _close_disk(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
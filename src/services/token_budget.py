@@ -0,0 +1,153 @@
+import importlib.util
+import re
+from functools import lru_cache
+from typing import Callable, List, Sequence, Tuple
+
+from src.models.enhancement import EnhancementType
+from src.services.metrics import registry
+from src.services.rate_limiter import estimate_tokens
+
+INPUT_TOKENS = registry.histogram(
+    "enhance_input_tokens", "Оценка входных токенов текста на улучшение",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192)
+)
+OUTPUT_BUDGET = registry.histogram(
+    "enhance_max_tokens", "Выделенный max_tokens на ответ",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192)
+)
+TEXT_CHUNKS = registry.histogram(
+    "enhance_text_chunks", "Число частей, на которые разбит длинный текст",
+    buckets=(1, 2, 4, 8, 16, 32)
+)
+
+_PARAGRAPHS = re.compile(r"\n\s*\n")
+_SENTENCES = re.compile(r"(?<=[.!?…])(\s+)")
+
+# Ответ относительно входа: исправление грамматики сохраняет длину, усиление промпта его расширяет
+OUTPUT_RATIO = {
+    EnhancementType.GRAMMAR: 1.3,
+    EnhancementType.PROMPT_ENHANCEMENT: 3.0,
+    EnhancementType.CUSTOM: 2.0,
+}
+# Запас на короткие тексты (списки, заголовки и т.п.)
+OUTPUT_OVERHEAD = {
+    EnhancementType.GRAMMAR: 64,
+    EnhancementType.PROMPT_ENHANCEMENT: 400,
+    EnhancementType.CUSTOM: 200,
+}
+
+
+def tiktoken_available() -> bool:
+    """Точный подсчет токенов требует пакета tiktoken (pip install tiktoken)"""
+    return importlib.util.find_spec("tiktoken") is not None
+
+
+@lru_cache(maxsize=8)
+def _tiktoken_counter(model: str) -> Callable[[str], int]:
+    """Счетчик токенов tiktoken для модели (для незнакомых моделей — кодировка gpt-4o)"""
+    import tiktoken
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+class TokenBudget:
+    """Оценка входных токенов, max_tokens по типу улучшения и разбиение длинных текстов по абзацам"""
+
+    def __init__(self, model: str = "gpt-4o", min_output_tokens: int = 256, max_output_tokens: int = 4000,
+                 chunk_threshold_tokens: int = 1000, chunk_target_tokens: int = 500,
+                 chunk_max_parallel: int = 4,
+                 split_types: Sequence[EnhancementType] = (EnhancementType.GRAMMAR,)):
+        self.model = model
+        self.min_output_tokens = min_output_tokens
+        self.max_output_tokens = max_output_tokens
+        self.chunk_threshold_tokens = chunk_threshold_tokens
+        self.chunk_target_tokens = chunk_target_tokens
+        self.chunk_max_parallel = chunk_max_parallel
+        # Делить можно только правки, не зависящие от всего текста; промпт и кастомные правила — целиком
+        self.split_types = frozenset(split_types)
+        self._count = _tiktoken_counter(model) if tiktoken_available() else estimate_tokens
+
+    @classmethod
+    def from_settings(cls) -> "TokenBudget":
+        """Создание по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            model=settings.openai_model,
+            min_output_tokens=settings.enhance_min_output_tokens,
+            max_output_tokens=settings.enhance_max_output_tokens,
+            chunk_threshold_tokens=settings.enhance_chunk_threshold_tokens,
+            chunk_target_tokens=settings.enhance_chunk_target_tokens,
+            chunk_max_parallel=settings.enhance_chunk_max_parallel
+        )
+
+    def count(self, text: str) -> int:
+        """Число токенов текста (tiktoken, если установлен, иначе оценка)"""
+        return self._count(text)
+
+    def max_tokens(self, enhancement_type: EnhancementType, input_tokens: int) -> int:
+        """Бюджет ответа по типу улучшения и длине входа"""
+        ratio = OUTPUT_RATIO.get(enhancement_type, 2.0)
+        budget = int(input_tokens * ratio) + OUTPUT_OVERHEAD.get(enhancement_type, 200)
+        budget = max(self.min_output_tokens, min(self.max_output_tokens, budget))
+        INPUT_TOKENS.observe(input_tokens, type=enhancement_type.value)
+        OUTPUT_BUDGET.observe(budget, type=enhancement_type.value)
+        return budget
+
+    def should_split(self, enhancement_type: EnhancementType, input_tokens: int) -> bool:
+        """Нужно ли улучшать текст по частям"""
+        return enhancement_type in self.split_types and input_tokens > self.chunk_threshold_tokens
+
+    def split(self, text: str) -> List[Tuple[str, str]]:
+        """Разбиение по абзацам (крупные абзацы — по предложениям) на части около chunk_target_tokens;
+        для каждой части возвращается разделитель, шедший после нее в исходном тексте"""
+        pieces = []
+        for paragraph in _PARAGRAPHS.split(text.strip()):
+            if self.count(paragraph) <= self.chunk_target_tokens:
+                pieces.append((paragraph, "\n\n"))
+            else:
+                pieces.extend(self._split_paragraph(paragraph))
+            # После последнего куска абзаца — разрыв абзаца
+            pieces[-1] = (pieces[-1][0], "\n\n")
+
+        chunks = []
+        current = ""
+        current_tokens = 0
+        boundary = ""
+        for piece, separator in pieces:
+            tokens = self.count(piece)
+            if current and current_tokens + tokens > self.chunk_target_tokens:
+                chunks.append((current.strip(), boundary))
+                current, current_tokens = "", 0
+            current += piece + separator
+            current_tokens += tokens
+            boundary = separator
+        if current.strip():
+            chunks.append((current.strip(), ""))
+        TEXT_CHUNKS.observe(len(chunks))
+        return chunks
+
+    @staticmethod
+    def join(chunks: Sequence[Tuple[str, str]]) -> str:
+        """Сборка частей с исходными разделителями (абзац, перенос строки или пробел)"""
+        return "".join(text.strip() + separator for text, separator in chunks).strip()
+
+    def _split_paragraph(self, paragraph: str) -> List[Tuple[str, str]]:
+        """Предложения абзаца с пробельными символами после каждого; слишком длинные режутся по длине"""
+        parts = _SENTENCES.split(paragraph)
+        sentences = []
+        for sentence, separator in zip(parts[::2], parts[1::2] + [""]):
+            while self.count(sentence) > self.chunk_target_tokens:
+                # Грубая оценка длины в символах; режем по последнему пробелу
+                limit = max(1, len(sentence) * self.chunk_target_tokens // self.count(sentence))
+                cut = sentence.rfind(" ", 0, limit)
+                cut = cut if cut > 0 else limit
+                rest = sentence[cut:].lstrip()
+                sentences.append((sentence[:cut], sentence[cut:len(sentence) - len(rest)]))
+                sentence = rest
+            if sentence:
+                sentences.append((sentence, separator))
+        return sentences
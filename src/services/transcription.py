@@ -0,0 +1,85 @@
+import asyncio
+import io
+import logging
+from typing import Awaitable, BinaryIO, Callable, List, Optional, Union
+
+from src.services.audio_splitter import OggOpusError, OggOpusSplit, plan_ogg_opus_split
+from src.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_CHUNKS = registry.histogram(
+    "transcription_chunks", "Число частей, на которые разбито голосовое сообщение",
+    buckets=(1, 2, 4, 8, 16, 32)
+)
+
+
+class ChunkedTranscriber:
+    """Транскрибирование длинных голосовых: разбиение по паузам и параллельное распознавание частей"""
+
+    def __init__(self, transcribe: Callable[[Union[bytes, BinaryIO]], Awaitable[str]], chunk_duration: float = 30.0,
+                 max_chunk_duration: float = 45.0, max_parallel: int = 4):
+        self.transcribe_chunk = transcribe
+        self.chunk_duration = chunk_duration
+        self.max_chunk_duration = max_chunk_duration
+        self.max_parallel = max_parallel
+
+    @classmethod
+    def from_settings(cls, transcribe: Callable[[Union[bytes, BinaryIO]], Awaitable[str]]) -> "ChunkedTranscriber":
+        """Создание по настройкам приложения"""
+        from config.settings import settings
+
+        return cls(
+            transcribe,
+            chunk_duration=settings.transcription_chunk_duration,
+            max_chunk_duration=settings.transcription_max_chunk_duration,
+            max_parallel=settings.transcription_max_parallel
+        )
+
+    async def plan(self, stream: BinaryIO) -> Optional[OggOpusSplit]:
+        """Поиск точек разреза (вне цикла событий); None — отправить аудио одной частью"""
+        try:
+            return await asyncio.to_thread(
+                plan_ogg_opus_split, stream, self.chunk_duration, self.max_chunk_duration
+            )
+        except OggOpusError as e:
+            logger.warning(f"Аудио не разбито на части: {e}")
+            return None
+
+    async def transcribe(self, audio: Union[bytes, BinaryIO]) -> str:
+        """Распознавание аудио; текст частей склеивается в исходном порядке"""
+        # Файл (в том числе сброшенный на диск) целиком в память не читается
+        stream = io.BytesIO(audio) if isinstance(audio, (bytes, bytearray)) else audio
+        split = await self.plan(stream)
+        if split is None:
+            TRANSCRIPTION_CHUNKS.observe(1)
+            return await self.transcribe_chunk(audio)
+        TRANSCRIPTION_CHUNKS.observe(len(split))
+
+        # Следующая часть читается из файла, только когда для нее освободился слот
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        chunks = split.chunks(stream)
+        tasks: List[asyncio.Task] = []
+
+        async def run(chunk: bytes) -> str:
+            try:
+                return await self.transcribe_chunk(chunk)
+            finally:
+                semaphore.release()
+
+        try:
+            while True:
+                await semaphore.acquire()
+                if any(task.done() and not task.cancelled() and task.exception() for task in tasks):
+                    break
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                tasks.append(asyncio.create_task(run(chunk)))
+            texts = await asyncio.gather(*tasks)
+        except BaseException:
+            # Без одной части результат неполон: остальные запросы не нужны
+            for task in tasks:
+                task.cancel()
+            raise
+        return " ".join(text.strip() for text in texts if text.strip())
@@ -0,0 +1,68 @@
+import sys
+from typing import Optional, Tuple
+from src.models.enhancement import CustomEnhancer, UserSettings
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Интернирование строки: одинаковые промпты разных пользователей хранятся один раз"""
+    return sys.intern(value) if value is not None else None
+
+
+class EnhancerRecord:
+    """Компактная запись кастомного улучшателя"""
+
+    __slots__ = ("id", "name", "prompt", "description")
+
+    def __init__(self, id: str, name: str, prompt: str, description: Optional[str] = None):
+        self.id = _intern(id)
+        self.name = _intern(name)
+        self.prompt = _intern(prompt)
+        self.description = _intern(description)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EnhancerRecord":
+        return cls(data["id"], data["name"], data["prompt"], data.get("description"))
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "prompt": self.prompt, "description": self.description}
+
+    def to_model(self) -> CustomEnhancer:
+        """Pydantic-модель для внешнего API (данные уже проверены при создании)"""
+        return CustomEnhancer.model_construct(
+            id=self.id, name=self.name, prompt=self.prompt, description=self.description
+        )
+
+
+class UserRecord:
+    """Компактная запись настроек пользователя"""
+
+    __slots__ = ("user_id", "enhancers", "language")
+
+    def __init__(self, user_id: int, enhancers: Tuple[EnhancerRecord, ...] = (), language: str = "ru"):
+        self.user_id = user_id
+        self.enhancers = enhancers
+        self.language = _intern(language)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserRecord":
+        """Запись из данных хранилища (формат UserSettings.model_dump)"""
+        return cls(
+            int(data["user_id"]),
+            tuple(EnhancerRecord.from_dict(enhancer) for enhancer in data.get("custom_enhancers") or ()),
+            data.get("language", "ru")
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "custom_enhancers": [enhancer.to_dict() for enhancer in self.enhancers],
+            "language": self.language,
+        }
+
+    def to_model(self) -> UserSettings:
+        """Pydantic-модель для внешнего API"""
+        return UserSettings.model_construct(
+            user_id=self.user_id,
+            custom_enhancers=[enhancer.to_model() for enhancer in self.enhancers],
+            language=self.language
+        )
@@ -1,95 +1,195 @@
-import json
-import os
-from typing import Dict, List, Optional
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set
 from src.models.enhancement import UserSettings, CustomEnhancer
+from src.services.metrics import registry
+from src.services.user_records import EnhancerRecord, UserRecord
+from src.services.user_storage import UserStorage, create_user_storage
+
+USER_LOOKUPS = registry.counter("user_lookups_total", "Обращения к настройкам пользователей")
+HOT_USERS = registry.gauge("user_hot_records", "Пользователи в памяти сервиса")
 
 
 class UserService:
     """Сервис для управления пользователями"""
     
-    def __init__(self, storage_file: str = "data/users.json"):
+    def __init__(self, storage_file: str = "data/users.db", storage: Optional[UserStorage] = None,
+                 autosave: bool = True, max_hot_users: int = 10000):
         self.storage_file = storage_file
-        self.users: Dict[int, UserSettings] = {}
-        self._ensure_storage_dir()
-        self._load_users()
+        self.storage = storage if storage is not None else create_user_storage(storage_file)
+        # Без autosave изменения копятся до вызова flush()
+        self.autosave = autosave
+        # LRU активных пользователей в компактном виде; остальные читаются из хранилища по мере обращения
+        self.max_hot_users = max_hot_users
+        self.users: "OrderedDict[int, UserRecord]" = OrderedDict()
+        self._dirty: Set[int] = set()
     
-    def _ensure_storage_dir(self):
-        """Создание директории для хранения данных"""
-        os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
+    def _save_user(self, record: UserRecord):
+        """Сохранение настроек пользователя в хранилище"""
+        if self.autosave:
+            self.storage.save_data_many([record.to_dict()])
+        else:
+            self._dirty.add(record.user_id)
     
-    def _load_users(self):
-        """Загрузка пользователей из файла"""
-        try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for user_id, user_data in data.items():
-                        self.users[int(user_id)] = UserSettings(**user_data)
-        except Exception as e:
-            print(f"Ошибка загрузки пользователей: {e}")
+    def _evict(self):
+        """Выгрузка давно не использованных пользователей (несохраненные остаются до flush)"""
+        while len(self.users) > self.max_hot_users:
+            user_id = next(iter(self.users))
+            if user_id in self._dirty:
+                break
+            del self.users[user_id]
+        HOT_USERS.set(len(self.users))
     
-    def _save_users(self):
-        """Сохранение пользователей в файл"""
-        try:
-            data = {}
-            for user_id, user_settings in self.users.items():
-                data[str(user_id)] = user_settings.model_dump()
-            
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Ошибка сохранения пользователей: {e}")
+    def has_pending_changes(self) -> bool:
+        """Есть ли несохраненные изменения"""
+        return bool(self._dirty)
+    
+    def flush(self) -> int:
+        """Сохранение накопленных изменений одной операцией, возвращает число пользователей"""
+        if not self._dirty:
+            return 0
+        
+        dirty_users = [self.users[user_id].to_dict() for user_id in self._dirty]
+        self._dirty.clear()
+        self.storage.save_data_many(dirty_users)
+        self._evict()
+        return len(dirty_users)
+    
+    def _get_record(self, user_id: int) -> UserRecord:
+        """Запись пользователя из LRU или хранилища"""
+        record = self.users.get(user_id)
+        if record is not None:
+            self.users.move_to_end(user_id)
+            USER_LOOKUPS.inc(result="hot")
+            return record
+        
+        user_data = self.storage.load_data(user_id)
+        if user_data is None:
+            # Пользователь без настроек не сохраняется, пока ничего не изменит
+            record = UserRecord(user_id)
+            USER_LOOKUPS.inc(result="new")
+        else:
+            record = UserRecord.from_dict(user_data)
+            USER_LOOKUPS.inc(result="cold")
+        self.users[user_id] = record
+        self._evict()
+        return record
     
     def get_user_settings(self, user_id: int) -> UserSettings:
         """Получение настроек пользователя"""
-        if user_id not in self.users:
-            self.users[user_id] = UserSettings(user_id=user_id)
-            self._save_users()
-        return self.users[user_id]
+        return self._get_record(user_id).to_model()
     
     def add_custom_enhancer(self, user_id: int, name: str, prompt: str, 
                            description: Optional[str] = None) -> bool:
         """Добавление кастомного улучшателя"""
-        user_settings = self.get_user_settings(user_id)
+        record = self._get_record(user_id)
         
-        if len(user_settings.custom_enhancers) >= 3:
+        if len(record.enhancers) >= 3:
             return False
         
-        enhancer_id = f"custom_{len(user_settings.custom_enhancers) + 1}"
-        custom_enhancer = CustomEnhancer(
-            id=enhancer_id,
-            name=name,
-            prompt=prompt,
-            description=description
-        )
-        
-        user_settings.custom_enhancers.append(custom_enhancer)
-        self._save_users()
+        enhancer_id = f"custom_{len(record.enhancers) + 1}"
+        record.enhancers += (EnhancerRecord(enhancer_id, name, prompt, description),)
+        self._save_user(record)
         return True
     
     def remove_custom_enhancer(self, user_id: int, enhancer_id: str) -> bool:
         """Удаление кастомного улучшателя"""
-        user_settings = self.get_user_settings(user_id)
+        record = self._get_record(user_id)
         
-        for i, enhancer in enumerate(user_settings.custom_enhancers):
+        for i, enhancer in enumerate(record.enhancers):
             if enhancer.id == enhancer_id:
-                user_settings.custom_enhancers.pop(i)
-                self._save_users()
+                record.enhancers = record.enhancers[:i] + record.enhancers[i + 1:]
+                self._save_user(record)
                 return True
         
         return False
     
     def get_custom_enhancer(self, user_id: int, enhancer_id: str) -> Optional[CustomEnhancer]:
         """Получение кастомного улучшателя"""
-        user_settings = self.get_user_settings(user_id)
-        
-        for enhancer in user_settings.custom_enhancers:
+        for enhancer in self._get_record(user_id).enhancers:
             if enhancer.id == enhancer_id:
-                return enhancer
+                return enhancer.to_model()
         
         return None
     
     def list_custom_enhancers(self, user_id: int) -> List[CustomEnhancer]:
         """Список кастомных улучшателей пользователя"""
-        user_settings = self.get_user_settings(user_id)
-        return user_settings.custom_enhancers.copy() 
\ No newline at end of file
+        return [enhancer.to_model() for enhancer in self._get_record(user_id).enhancers]
+    
+    def close(self):
+        """Сохранение изменений и закрытие хранилища"""
+        self.flush()
+        self.storage.close()
+
+
+class AsyncUserService:
+    """Асинхронный интерфейс к UserService: вся работа с хранилищем идет в отдельном потоке"""
+    
+    def __init__(self, service: UserService, flush_delay: float = 0.5):
+        # Изменения копятся и сохраняются пачкой через flush_delay секунд
+        service.autosave = False
+        self.service = service
+        self.flush_delay = flush_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-storage")
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Счетчики
+        self.flushes = 0
+    
+    async def _run(self, func, *args):
+        """Выполнение метода сервиса в потоке хранилища"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    async def _mutate(self, func, *args):
+        """Изменение данных с отложенным сохранением"""
+        result = await self._run(func, *args)
+        if self.service.has_pending_changes():
+            self._schedule_flush()
+        return result
+    
+    def _schedule_flush(self):
+        """Планирование одного сохранения на пачку изменений"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+    
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+    
+    async def flush(self):
+        """Немедленное сохранение накопленных изменений"""
+        try:
+            if await self._run(self.service.flush):
+                self.flushes += 1
+        except Exception as e:
+            print(f"Ошибка сохранения пользователей: {e}")
+    
+    async def get_user_settings(self, user_id: int) -> UserSettings:
+        """Получение настроек пользователя"""
+        return await self._mutate(self.service.get_user_settings, user_id)
+    
+    async def add_custom_enhancer(self, user_id: int, name: str, prompt: str,
+                                  description: Optional[str] = None) -> bool:
+        """Добавление кастомного улучшателя"""
+        return await self._mutate(self.service.add_custom_enhancer, user_id, name, prompt, description)
+    
+    async def remove_custom_enhancer(self, user_id: int, enhancer_id: str) -> bool:
+        """Удаление кастомного улучшателя"""
+        return await self._mutate(self.service.remove_custom_enhancer, user_id, enhancer_id)
+    
+    async def get_custom_enhancer(self, user_id: int, enhancer_id: str) -> Optional[CustomEnhancer]:
+        """Получение кастомного улучшателя"""
+        return await self._mutate(self.service.get_custom_enhancer, user_id, enhancer_id)
+    
+    async def list_custom_enhancers(self, user_id: int) -> List[CustomEnhancer]:
+        """Список кастомных улучшателей пользователя"""
+        return await self._mutate(self.service.list_custom_enhancers, user_id)
+    
+    async def close(self):
+        """Сохранение изменений при остановке и закрытие хранилища"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self._run(self.service.close)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+from src.models.enhancement import UserSettings
+from src.services.metrics import registry, timed
+
+STORAGE_LATENCY = registry.histogram("user_storage_duration_seconds", "Длительность операций хранилища пользователей")
+STORAGE_ERRORS = registry.counter("user_storage_errors_total", "Ошибки хранилища пользователей")
+STORAGE_SAVED = registry.counter("user_storage_saved_users_total", "Сохраненные записи пользователей")
+
+
+class UserStorage:
+    """Базовое хранилище настроек пользователей"""
+
+    def load_data(self, user_id: int) -> Optional[dict]:
+        """Загрузка данных одного пользователя (формат UserSettings.model_dump)"""
+        raise NotImplementedError
+
+    def save_data_many(self, users: Iterable[dict]):
+        """Сохранение данных нескольких пользователей одной операцией"""
+        raise NotImplementedError
+
+    def load(self, user_id: int) -> Optional[UserSettings]:
+        """Загрузка настроек одного пользователя"""
+        user_data = self.load_data(user_id)
+        if user_data is None:
+            return None
+        return UserSettings(**user_data)
+
+    def save(self, user_settings: UserSettings):
+        """Сохранение настроек одного пользователя"""
+        self.save_many([user_settings])
+
+    def save_many(self, users: Iterable[UserSettings]):
+        """Сохранение настроек нескольких пользователей одной операцией"""
+        self.save_data_many(user_settings.model_dump() for user_settings in users)
+
+    def close(self):
+        """Освобождение ресурсов хранилища"""
+
+
+class JsonUserStorage(UserStorage):
+    """Хранилище в одном JSON-файле (весь файл перезаписывается при сохранении)"""
+
+    def __init__(self, storage_file: str):
+        self.storage_file = storage_file
+        self._users: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        _ensure_dir(storage_file)
+        self._load()
+
+    def _load(self):
+        """Загрузка пользователей из файла"""
+        try:
+            if os.path.exists(self.storage_file):
+                with open(self.storage_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    for user_id, user_data in data.items():
+                        self._users[int(user_id)] = user_data
+        except Exception as e:
+            print(f"Ошибка загрузки пользователей: {e}")
+
+    @timed(STORAGE_LATENCY, STORAGE_ERRORS, operation="load", backend="json")
+    def load_data(self, user_id: int) -> Optional[dict]:
+        return self._users.get(user_id)
+
+    @timed(STORAGE_LATENCY, STORAGE_ERRORS, operation="save", backend="json")
+    def save_data_many(self, users: Iterable[dict]):
+        with self._lock:
+            saved = 0
+            for user_data in users:
+                self._users[user_data["user_id"]] = user_data
+                saved += 1
+
+            try:
+                data = {str(user_id): user_data for user_id, user_data in self._users.items()}
+
+                # Пишем во временный файл и атомарно подменяем, чтобы сбой не испортил данные
+                temp_file = f"{self.storage_file}.tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(temp_file, self.storage_file)
+                STORAGE_SAVED.inc(saved, backend="json")
+            except Exception as e:
+                STORAGE_ERRORS.inc(operation="save", backend="json")
+                print(f"Ошибка сохранения пользователей: {e}")
+
+
+class SQLiteUserStorage(UserStorage):
+    """Хранилище в SQLite (WAL) с построчным сохранением пользователей"""
+
+    def __init__(self, storage_file: str, migrate_from: Optional[str] = None):
+        self.storage_file = storage_file
+        self._lock = threading.Lock()
+        _ensure_dir(storage_file)
+
+        self._conn = sqlite3.connect(storage_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+        if migrate_from:
+            self.migrate_from_json(migrate_from)
+
+    def migrate_from_json(self, json_file: str) -> int:
+        """Однократный перенос пользователей из JSON-файла, возвращает число перенесенных"""
+        if not os.path.exists(json_file):
+            return 0
+
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is not None:
+                return 0
+
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            users = [UserSettings(**user_data) for user_data in data.values()]
+        except Exception as e:
+            print(f"Ошибка миграции пользователей: {e}")
+            return 0
+
+        self.save_many(users)
+        os.replace(json_file, f"{json_file}.migrated")
+        return len(users)
+
+    @timed(STORAGE_LATENCY, STORAGE_ERRORS, operation="load", backend="sqlite")
+    def load_data(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    @timed(STORAGE_LATENCY, STORAGE_ERRORS, operation="save", backend="sqlite")
+    def save_data_many(self, users: Iterable[dict]):
+        rows = [(user_data["user_id"], json.dumps(user_data, ensure_ascii=False)) for user_data in users]
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT INTO users (user_id, data) VALUES (?, ?) "
+                        "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data",
+                        rows
+                    )
+                STORAGE_SAVED.inc(len(rows), backend="sqlite")
+            except sqlite3.Error as e:
+                STORAGE_ERRORS.inc(operation="save", backend="sqlite")
+                print(f"Ошибка сохранения пользователей: {e}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_user_storage(storage_file: str) -> UserStorage:
+    """Выбор хранилища по расширению файла (.json — старый формат, иначе SQLite)"""
+    if storage_file.endswith(".json"):
+        return JsonUserStorage(storage_file)
+
+    legacy_file = os.path.splitext(storage_file)[0] + ".json"
+    return SQLiteUserStorage(storage_file, migrate_from=legacy_file)
+
+
+def _ensure_dir(storage_file: str):
+    """Создание директории для хранения данных"""
+    directory = os.path.dirname(storage_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
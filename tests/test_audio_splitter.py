@@ -0,0 +1,126 @@
+import io
+import pytest
+import struct
+from src.services.audio_splitter import (
+    OggOpusError, find_cut_points, ogg_crc, opus_packet_samples, plan_ogg_opus_split, read_packets,
+    split_ogg_opus, stream_duration, write_stream
+)
+
+SERIAL = 0x1234
+# TOC: CELT 20 мс, один кадр
+FRAME_TOC = bytes([19 << 3])
+
+
+def opus_head(pre_skip: int = 312) -> bytes:
+    return b"OpusHead" + struct.pack("<BBHIhB", 1, 1, pre_skip, 48000, 0, 0)
+
+
+def opus_tags() -> bytes:
+    vendor = b"test"
+    return b"OpusTags" + struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", 0)
+
+
+def make_voice(pattern):
+    """Поток из отрезков (секунды, громко ли): речь — длинные кадры, тишина — короткие"""
+    audio = []
+    for seconds, loud in pattern:
+        size = 80 if loud else 3
+        audio += [FRAME_TOC + bytes([len(audio) % 251]) * (size - 1)] * int(seconds * 50)
+    return write_stream(SERIAL, opus_head(), opus_tags(), audio), audio
+
+
+def parse_pages(data: bytes):
+    """Заголовки страниц с проверкой CRC"""
+    pages = []
+    offset = 0
+    while offset < len(data):
+        flags, granule, _, sequence, crc, segments = struct.unpack_from("<BqIIIB", data, offset + 5)
+        length = 27 + segments + sum(data[offset + 27:offset + 27 + segments])
+        page = bytearray(data[offset:offset + length])
+        page[22:26] = b"\0\0\0\0"
+        assert ogg_crc(bytes(page)) == crc
+        pages.append((flags, granule, sequence))
+        offset += length
+    return pages
+
+
+class TestAudioSplitter:
+    """Тесты для разбиения голосовых Ogg/Opus"""
+
+    def test_packet_samples(self):
+        """Тест длительности пакетов по байту TOC"""
+        assert opus_packet_samples(FRAME_TOC) == 960
+        assert opus_packet_samples(bytes([(1 << 3) | 1])) == 1920  # SILK 20 мс, два кадра
+        assert opus_packet_samples(bytes([(16 << 3) | 3, 4])) == 480  # CELT 2.5 мс, четыре кадра
+        assert opus_packet_samples(b"") == 0
+
+    def test_roundtrip(self):
+        """Тест записи и чтения потока"""
+        data, audio = make_voice([(2, True)])
+        serial, packets = read_packets(data)
+
+        assert serial == SERIAL
+        assert packets[2:] == audio
+        assert stream_duration(data) == pytest.approx(2.0)
+
+        pages = parse_pages(data)
+        assert pages[0][0] & 0x02
+        assert pages[-1][0] & 0x04
+        assert pages[-1][1] == 312 + 100 * 960
+        assert [sequence for _, _, sequence in pages] == list(range(len(pages)))
+
+    def test_large_packet_spans_pages(self):
+        """Тест пакета, не помещающегося на одну страницу"""
+        big = FRAME_TOC + b"x" * 70000
+        data = write_stream(SERIAL, opus_head(), opus_tags(), [big, FRAME_TOC])
+        _, packets = read_packets(data)
+
+        assert packets[2:] == [big, FRAME_TOC]
+        assert any(flags & 0x01 for flags, _, _ in parse_pages(data))
+
+    def test_short_audio_not_split(self):
+        """Тест короткого голосового без разбиения"""
+        data, _ = make_voice([(20, True)])
+        assert split_ogg_opus(data) == [data]
+
+    def test_split_at_silence(self):
+        """Тест разреза по паузе после целевой длительности"""
+        data, audio = make_voice([(28, True), (2, False), (10, True), (1, False), (30, True)])
+        chunks = split_ogg_opus(data, chunk_duration=25, max_chunk_duration=45)
+
+        assert len(chunks) == 2
+        # Разрез в середине первой паузы, после 25 секунд
+        assert stream_duration(chunks[0]) == pytest.approx(29.0, abs=0.5)
+        restored = [packet for chunk in chunks for packet in read_packets(chunk)[1][2:]]
+        assert restored == audio
+        for chunk in chunks:
+            assert read_packets(chunk)[1][0].startswith(b"OpusHead")
+            parse_pages(chunk)
+
+    def test_hard_cut_without_silence(self):
+        """Тест жесткого разреза при непрерывной речи"""
+        data, _ = make_voice([(100, True)])
+        chunks = split_ogg_opus(data, chunk_duration=30, max_chunk_duration=45)
+
+        assert [round(stream_duration(chunk)) for chunk in chunks] == [45, 45, 10]
+
+    def test_plan_then_chunks_from_file(self):
+        """Тест двух проходов по файлу: части совпадают с разбиением байтов"""
+        data, _ = make_voice([(28, True), (2, False), (10, True), (1, False), (30, True)])
+        stream = io.BytesIO(data)
+        split = plan_ogg_opus_split(stream, chunk_duration=25, max_chunk_duration=45)
+
+        assert len(split) == 2
+        assert list(split.chunks(stream)) == split_ogg_opus(data, chunk_duration=25, max_chunk_duration=45)
+        assert plan_ogg_opus_split(io.BytesIO(make_voice([(5, True)])[0])) is None
+
+    def test_short_tail_merged(self):
+        """Тест присоединения короткого хвоста"""
+        durations = [0.02] * 2300
+        cuts = find_cut_points([80] * 2300, durations, chunk_duration=30, max_chunk_duration=45)
+        assert cuts == []  # 46 секунд: хвост в 1 секунду не выделяется
+
+    def test_invalid_data(self):
+        """Тест данных не в формате Ogg/Opus"""
+        with pytest.raises(OggOpusError):
+            split_ogg_opus(b"ID3 not an ogg file")
@@ -0,0 +1,237 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import json
+import os
+import tempfile
+import httpx
+from benchmarks.fake_openai import FakeOpenAI
+from src.models.enhancement import EnhancementResponse, EnhancementType
+from src.services.bulk_enhancer import (
+    BatchBulkRunner, LocalBulkRunner, ResultWriter, load_checkpoint, read_items
+)
+
+
+def write_jsonl(path: str, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line, ensure_ascii=False)) + "\n")
+
+
+def read_jsonl(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def build_request(text: str, enhancement_type: EnhancementType, custom_prompt=None):
+    """Тексты с разрывом абзаца отправляются по абзацам, как длинные тексты сервиса"""
+    paragraphs = text.split("\n\n")
+    return [
+        ({
+            "model": "gpt-4o",
+            "messages": [{"role": "system", "content": custom_prompt or enhancement_type.value},
+                         {"role": "user", "content": paragraph}],
+            "max_tokens": 2000,
+            "temperature": 0.3,
+        }, "\n\n" if index < len(paragraphs) - 1 else "")
+        for index, paragraph in enumerate(paragraphs)
+    ]
+
+
+@pytest.fixture
+def temp_dir():
+    """Временная директория для входных и выходных файлов"""
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+class TestBulkInput:
+    """Тесты чтения входного файла и контрольной точки"""
+    
+    def test_read_items(self, temp_dir):
+        """Тест разбора строк: типы, кастомный промпт, некорректные строки и повторные id"""
+        path = os.path.join(temp_dir, "input.jsonl")
+        write_jsonl(path, [
+            {"id": "a", "text": "первый"},
+            {"text": "второй", "type": "prompt_enhancement"},
+            {"id": "c", "text": "третий", "prompt": "Сделай короче"},
+            "не json",
+            {"id": "e", "type": "unknown", "text": "пятый"},
+            {"id": "a", "text": "шестой"},
+        ])
+        errors = []
+        
+        items = list(read_items(path, errors=errors))
+        
+        assert [item.id for item in items] == ["a", "2", "c"]
+        assert items[0].enhancement_type == EnhancementType.GRAMMAR
+        assert items[1].enhancement_type == EnhancementType.PROMPT_ENHANCEMENT
+        assert items[2].enhancement_type == EnhancementType.CUSTOM
+        assert [error["id"] for error in errors] == ["4", "5", "6"]
+        assert "Повторяющийся id" in errors[2]["error"]
+    
+    def test_checkpoint(self, temp_dir):
+        """Тест контрольной точки: последняя запись по id и недописанная строка"""
+        path = os.path.join(temp_dir, "output.jsonl")
+        write_jsonl(path, [
+            {"id": "a", "enhanced_text": "ok"},
+            {"id": "b", "error": "timeout"},
+            {"id": "c", "error": "timeout"},
+            {"id": "c", "enhanced_text": "ok"},
+            '{"id": "d", "enhanced',
+        ])
+        
+        assert load_checkpoint(path) == {"a", "b", "c"}
+        assert load_checkpoint(path, retry_failed=True) == {"a", "c"}
+        assert load_checkpoint(os.path.join(temp_dir, "missing.jsonl")) == set()
+
+
+class TestLocalBulkRunner:
+    """Тесты локального пакетного улучшения"""
+    
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency_and_resume(self, temp_dir):
+        """Тест ограничения параллельности и продолжения после ошибок"""
+        input_path = os.path.join(temp_dir, "input.jsonl")
+        output_path = os.path.join(temp_dir, "output.jsonl")
+        write_jsonl(input_path, [{"id": str(i), "text": f"текст {i}"} for i in range(20)])
+        active = 0
+        peak = 0
+        failing = {"3", "7"}
+        
+        async def enhance(text, enhancement_type, custom_prompt=None):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if text.split()[-1] in failing:
+                raise RuntimeError("API Error")
+            return EnhancementResponse(original_text=text, enhanced_text=text.upper(),
+                                       enhancement_type=enhancement_type)
+        
+        writer = ResultWriter(output_path)
+        await LocalBulkRunner(enhance, concurrency=4).run(read_items(input_path), writer)
+        writer.close()
+        
+        assert peak == 4
+        assert writer.written == 20 and writer.failed == 2
+        
+        # Повторный запуск обрабатывает только упавшие тексты
+        failing.clear()
+        done = load_checkpoint(output_path, retry_failed=True)
+        writer = ResultWriter(output_path)
+        await LocalBulkRunner(enhance, concurrency=4).run(
+            (item for item in read_items(input_path) if item.id not in done), writer
+        )
+        writer.close()
+        
+        assert writer.written == 2
+        assert load_checkpoint(output_path, retry_failed=True) == {str(i) for i in range(20)}
+
+
+class TestBatchBulkRunner:
+    """Тесты пакетного улучшения через Batch API"""
+    
+    @pytest_asyncio.fixture
+    async def fake_openai(self):
+        """Локальный стенд OpenAI с Batch API"""
+        server = FakeOpenAI()
+        await server.start()
+        
+        yield server
+        
+        await server.stop()
+    
+    def _runner(self, client, fake_openai, state_path: str, **kwargs) -> BatchBulkRunner:
+        return BatchBulkRunner(client, fake_openai.base_url, "sk-test", build_request,
+                               state_path=state_path, poll_interval=0.01, **kwargs)
+    
+    @pytest.mark.asyncio
+    async def test_batches(self, fake_openai, temp_dir):
+        """Тест отправки текстов несколькими пакетами"""
+        input_path = os.path.join(temp_dir, "input.jsonl")
+        output_path = os.path.join(temp_dir, "output.jsonl")
+        write_jsonl(input_path, [{"id": str(i), "text": f"текст {i}"} for i in range(5)])
+        
+        async with httpx.AsyncClient() as client:
+            writer = ResultWriter(output_path)
+            runner = self._runner(client, fake_openai, output_path + ".batches.json", batch_size=2)
+            await runner.run(read_items(input_path), writer)
+            writer.close()
+        
+        results = {record["id"]: record for record in read_jsonl(output_path)}
+        assert fake_openai.calls["batches"] == 3
+        assert results["4"]["enhanced_text"] == "Улучшенный вариант: текст 4"
+        assert results["4"]["type"] == "grammar"
+        assert runner.state == {}
+    
+    @pytest.mark.asyncio
+    async def test_long_text_split_into_parts(self, fake_openai, temp_dir):
+        """Тест: части длинного текста уходят отдельными строками пакета и склеиваются по порядку"""
+        input_path = os.path.join(temp_dir, "input.jsonl")
+        output_path = os.path.join(temp_dir, "output.jsonl")
+        write_jsonl(input_path, [
+            {"id": "long", "text": "первый\n\nвторой\n\nтретий"},
+            {"id": "short", "text": "текст"},
+        ])
+        
+        async with httpx.AsyncClient() as client:
+            writer = ResultWriter(output_path)
+            runner = self._runner(client, fake_openai, output_path + ".batches.json", batch_size=3)
+            await runner.run(read_items(input_path), writer)
+            writer.close()
+        
+        results = {record["id"]: record for record in read_jsonl(output_path)}
+        # Три части не помещаются в пакет вместе с четвертым запросом
+        assert fake_openai.calls["batches"] == 2
+        assert results["long"]["enhanced_text"] == (
+            "Улучшенный вариант: первый\n\nУлучшенный вариант: второй\n\nУлучшенный вариант: третий"
+        )
+        assert results["short"]["enhanced_text"] == "Улучшенный вариант: текст"
+    
+    @pytest.mark.asyncio
+    async def test_unknown_custom_id_skipped(self, fake_openai, temp_dir):
+        """Тест: строка результата с чужим custom_id пропускается, остальные записываются"""
+        input_path = os.path.join(temp_dir, "input.jsonl")
+        output_path = os.path.join(temp_dir, "output.jsonl")
+        write_jsonl(input_path, [{"id": str(i), "text": f"текст {i}"} for i in range(2)])
+        
+        async with httpx.AsyncClient() as client:
+            writer = ResultWriter(output_path)
+            runner = self._runner(client, fake_openai, output_path + ".batches.json")
+            file_lines = runner._file_lines
+            
+            async def with_stranger(file_id):
+                records = list(await file_lines(file_id))
+                return records + [{"custom_id": "чужой-0", "response": {"status_code": 500}}] if file_id else records
+            
+            runner._file_lines = with_stranger
+            await runner.run(read_items(input_path), writer)
+            writer.close()
+        
+        results = {record["id"]: record for record in read_jsonl(output_path)}
+        assert sorted(results) == ["0", "1"]
+        assert results["1"]["enhanced_text"] == "Улучшенный вариант: текст 1"
+    
+    @pytest.mark.asyncio
+    async def test_resume_submitted_batch(self, fake_openai, temp_dir):
+        """Тест: после перезапуска отправленный пакет дожидается, а не отправляется заново"""
+        input_path = os.path.join(temp_dir, "input.jsonl")
+        output_path = os.path.join(temp_dir, "output.jsonl")
+        state_path = output_path + ".batches.json"
+        write_jsonl(input_path, [{"id": str(i), "text": f"текст {i}"} for i in range(3)])
+        
+        async with httpx.AsyncClient() as client:
+            # Первый запуск прерван сразу после отправки пакета
+            items = [(item, build_request(item.text, item.enhancement_type)) for item in read_items(input_path)]
+            await self._runner(client, fake_openai, state_path)._submit(items)
+            
+            writer = ResultWriter(output_path)
+            await self._runner(client, fake_openai, state_path).run(read_items(input_path), writer)
+            writer.close()
+        
+        assert fake_openai.calls["batches"] == 1
+        assert load_checkpoint(output_path) == {"0", "1", "2"}
+        with open(state_path, "r", encoding="utf-8") as f:
+            assert json.load(f) == {}
@@ -0,0 +1,124 @@
+import pytest
+import asyncio
+import tempfile
+import os
+import sqlite3
+import time
+from unittest.mock import patch
+from src.services.cache_service import EnhancementCache
+from src.services.tiered_store import TieredStore
+
+
+class TestEnhancementCache:
+    """Тесты для кэша результатов"""
+    
+    @pytest.fixture
+    def disk_path(self):
+        """Путь к временной базе кэша"""
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, "cache.db")
+        
+        yield path
+        
+        # Очистка после тестов
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+        os.rmdir(temp_dir)
+    
+    def test_make_key_depends_on_parameters(self):
+        """Тест зависимости ключа от всех параметров запроса"""
+        key = EnhancementCache.make_key("gpt-4o", "system", "текст", 0.3, 2000)
+        
+        assert key == EnhancementCache.make_key("gpt-4o", "system", "текст", 0.3, 2000)
+        assert key != EnhancementCache.make_key("gpt-4o-mini", "system", "текст", 0.3, 2000)
+        assert key != EnhancementCache.make_key("gpt-4o", "other", "текст", 0.3, 2000)
+        assert key != EnhancementCache.make_key("gpt-4o", "system", "текст!", 0.3, 2000)
+        assert key != EnhancementCache.make_key("gpt-4o", "system", "текст", 0.1, 2000)
+        assert key != EnhancementCache.make_key("gpt-4o", "system", "текст", 0.3, 10)
+    
+    @pytest.mark.asyncio
+    async def test_get_set(self):
+        """Тест попадания и промаха"""
+        cache = EnhancementCache()
+        
+        assert await cache.get("key") is None
+        cache.set("key", "значение")
+        assert await cache.get("key") == "значение"
+        
+        stats = cache.stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Тест вытеснения самых старых записей"""
+        cache = EnhancementCache(max_entries=2)
+        
+        cache.set("a", "1")
+        cache.set("b", "2")
+        await cache.get("a")
+        cache.set("c", "3")
+        
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "1"
+        assert await cache.get("c") == "3"
+        assert cache.stats()["evictions"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """Тест истечения срока жизни записи"""
+        cache = EnhancementCache(ttl=0)
+        
+        cache.set("key", "значение")
+        time.sleep(0.01)
+        
+        assert await cache.get("key") is None
+    
+    @pytest.mark.asyncio
+    async def test_disk_tier(self, disk_path):
+        """Тест чтения с диска после перезапуска"""
+        cache1 = EnhancementCache(disk_path=disk_path)
+        cache1.set("key", "значение")
+        cache1.close()
+        
+        cache2 = EnhancementCache(disk_path=disk_path)
+        
+        assert await cache2.get("key") == "значение"
+        assert cache2.stats()["disk_hits"] == 1
+        
+        # Повторное чтение уже из памяти
+        assert await cache2.get("key") == "значение"
+        assert cache2.stats()["memory_hits"] == 1
+        cache2.close()
+    
+    @pytest.mark.asyncio
+    async def test_disk_size_bound(self, disk_path):
+        """Тест ограничения размера дискового уровня"""
+        cache = EnhancementCache(max_entries=1, disk_path=disk_path, disk_max_entries=10)
+        
+        for i in range(TieredStore.DISK_PURGE_INTERVAL):
+            cache.set(f"key{i}", str(i))
+        cache.close()
+        
+        with sqlite3.connect(disk_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        assert count == 10
+    
+    @pytest.mark.asyncio
+    async def test_disk_hit_does_not_write(self, disk_path):
+        """Тест: чтение с диска не пишет в базу, время доступа сохраняется пачкой"""
+        cache1 = EnhancementCache(disk_path=disk_path)
+        cache1.set("key", "значение")
+        cache1.close()
+        
+        cache2 = EnhancementCache(disk_path=disk_path)
+        store = cache2._store
+        with patch.object(store, "_write_touched", wraps=store._write_touched) as write_touched:
+            assert await cache2.get("key") == "значение"
+            await asyncio.sleep(0.01)
+            write_touched.assert_not_called()
+            
+            await cache2.flush()
+            write_touched.assert_called_once()
+        cache2.close()
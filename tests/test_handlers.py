@@ -0,0 +1,140 @@
+import pytest
+import asyncio
+import os
+import tempfile
+from unittest.mock import AsyncMock, MagicMock
+from telegram.error import BadRequest
+from src.bot.handlers import BotHandlers
+from src.models.enhancement import EnhancementResponse, EnhancementType
+from src.services.openai_service import OpenAIService
+from src.services.pending_store import PendingTextStore
+from src.services.speculation import SpeculativeEnhancer
+from src.services.user_service import AsyncUserService, UserService
+
+
+class TestEnhanceAll:
+    """Тесты для режима «Применить все»"""
+    
+    @pytest.fixture
+    def handlers(self):
+        """Хендлеры с фейковым OpenAI и временным хранилищем пользователей"""
+        handlers = BotHandlers.__new__(BotHandlers)
+        handlers.pending_store = PendingTextStore()
+        handlers.speculator = None
+        handlers.user_service = AsyncUserService(
+            UserService(storage_file=os.path.join(tempfile.mkdtemp(), "users.db"))
+        )
+        handlers.calls = []
+        
+        async def enhance_text(text, enhancement_type, custom_prompt=None):
+            handlers.calls.append((enhancement_type, custom_prompt))
+            await asyncio.sleep(0.05)
+            return EnhancementResponse(
+                original_text=text,
+                enhanced_text=f"{enhancement_type.value}: {custom_prompt or text}",
+                enhancement_type=enhancement_type
+            )
+        
+        handlers.openai_service = MagicMock()
+        handlers.openai_service.enhance_text = enhance_text
+        handlers.openai_service.system_prompt = OpenAIService.system_prompt
+        return handlers
+    
+    def _query(self, handlers, token: str, custom_enhancers=()):
+        """Нажатие кнопки под сообщением с клавиатурой вариантов"""
+        query = MagicMock()
+        query.message.reply_markup = handlers._build_enhancement_keyboard(token, "prompt", list(custom_enhancers))
+        processing_msg = MagicMock()
+        processing_msg.edit_text = AsyncMock()
+        query.message.reply_text = AsyncMock(return_value=processing_msg)
+        return query, processing_msg
+    
+    @pytest.mark.asyncio
+    async def test_fan_out_in_one_message(self, handlers):
+        """Тест параллельного выполнения и вывода одним сообщением"""
+        await handlers.user_service.add_custom_enhancer(1, "Коротко", "Сделай короче")
+        await handlers.user_service.add_custom_enhancer(1, "Кратко", "Сделай короче")
+        enhancers = await handlers.user_service.list_custom_enhancers(1)
+        token = await handlers.pending_store.put("напиши код", 1)
+        query, processing_msg = self._query(handlers, token, enhancers)
+        all_started = asyncio.Event()
+        
+        async def enhance_text(text, enhancement_type, custom_prompt=None):
+            handlers.calls.append((enhancement_type, custom_prompt))
+            if len(handlers.calls) == 3:
+                all_started.set()
+            # Ответ приходит, только когда отправлены все запросы: последовательный вызов не дождется
+            await asyncio.wait_for(all_started.wait(), timeout=1)
+            return EnhancementResponse(
+                original_text=text,
+                enhanced_text=f"{enhancement_type.value}: {custom_prompt or text}",
+                enhancement_type=enhancement_type
+            )
+        
+        handlers.openai_service.enhance_text = enhance_text
+        await handlers._handle_enhance_all_callback(query, f"enhance_all:{token}")
+        
+        # Одинаковые промпты кастомных улучшателей запрашиваются один раз
+        assert len(handlers.calls) == 3
+        processing_msg.edit_text.assert_awaited_once()
+        text = processing_msg.edit_text.await_args.args[0]
+        assert "prompt_enhancement: напиши код" in text
+        assert "grammar: напиши код" in text
+        assert "⚙️ Коротко, ⚙️ Кратко" in text
+        await handlers.user_service.close()
+    
+    @pytest.mark.asyncio
+    async def test_speculated_result_is_reused(self, handlers):
+        """Тест использования упреждающего результата"""
+        handlers.speculator = SpeculativeEnhancer(handlers.openai_service.enhance_text)
+        token = await handlers.pending_store.put("напиши код", 1)
+        handlers.speculator.start(token, "напиши код", 1, "prompt")
+        query, processing_msg = self._query(handlers, token)
+        
+        await handlers._handle_enhance_all_callback(query, f"enhance_all:{token}")
+        
+        assert [call[0] for call in handlers.calls].count(EnhancementType.PROMPT_ENHANCEMENT) == 1
+        assert len(handlers.calls) == 2
+        await handlers.user_service.close()
+    
+    @pytest.mark.asyncio
+    async def test_broken_markdown_sent_as_plain_text(self, handlers):
+        """Тест: при сломанной разметке итог отправляется без форматирования, а не застревает"""
+        token = await handlers.pending_store.put("напиши код", 1)
+        query, processing_msg = self._query(handlers, token)
+        processing_msg.edit_text.side_effect = [BadRequest("Can't parse entities: unclosed tag"), None]
+        
+        await handlers._handle_enhance_all_callback(query, f"enhance_all:{token}")
+        
+        assert processing_msg.edit_text.await_count == 2
+        assert processing_msg.edit_text.await_args.kwargs["parse_mode"] is None
+        assert "grammar: напиши код" in processing_msg.edit_text.await_args.args[0]
+        await handlers.user_service.close()
+    
+    @pytest.mark.asyncio
+    async def test_render_failure_reports_error(self, handlers):
+        """Тест: ошибка итоговой правки показывается пользователю"""
+        token = await handlers.pending_store.put("напиши код", 1)
+        query, processing_msg = self._query(handlers, token)
+        processing_msg.edit_text.side_effect = [BadRequest("Message to edit not found"), None]
+        
+        await handlers._handle_enhance_all_callback(query, f"enhance_all:{token}")
+        
+        assert processing_msg.edit_text.await_args.args[0].startswith("❌ Ошибка улучшения")
+        await handlers.user_service.close()
+    
+    def test_render_all_fits_message_limit(self, handlers):
+        """Тест: длинные результаты обрезаются до лимита сообщения"""
+        text = handlers._render_all("исходный", [("A", "x" * 5000), ("B", "короткий"), ("C", "y" * 3000)])
+        
+        assert len(text) <= 4096
+        assert "короткий" in text
+        assert "…" in text
+    
+    def test_keyboard_has_apply_all(self, handlers):
+        """Тест кнопки «Применить все» только при нескольких вариантах"""
+        single = handlers._build_enhancement_keyboard("t", "text", [])
+        several = handlers._build_enhancement_keyboard("t", "prompt", [])
+        
+        assert single.inline_keyboard[-1][0].callback_data == "enhance:grammar:t"
+        assert several.inline_keyboard[-1][0].callback_data == "enhance_all:t"
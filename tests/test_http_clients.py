@@ -0,0 +1,95 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from src.bot.http_server import HTTPResponse, HTTPServer
+from src.services.http_clients import HTTPClients, OPEN_CLIENTS
+
+
+class TestHTTPClients:
+    """Тесты для общих HTTP-клиентов"""
+    
+    @pytest_asyncio.fixture
+    async def server(self):
+        """Сервер, считающий входящие соединения"""
+        server = HTTPServer("127.0.0.1", 0)
+        
+        async def ping(request):
+            return HTTPResponse(200, b"")
+        
+        server.add_route("HEAD", "/v1", ping)
+        server.add_route("GET", "/v1/ping", ping)
+        await server.start()
+        
+        yield server
+        
+        await server.stop()
+    
+    @pytest.mark.asyncio
+    async def test_shared_client(self):
+        """Тест: клиент с одним именем создается один раз и закрывается вместе со всеми"""
+        clients = HTTPClients()
+        client = clients.client("openai")
+        
+        assert clients.client("openai") is client
+        assert OPEN_CLIENTS.value() == 1
+        
+        await clients.close()
+        assert client.is_closed
+        assert OPEN_CLIENTS.value() == 0
+    
+    @pytest.mark.asyncio
+    async def test_options_mismatch(self):
+        """Тест: то же имя с другими параметрами не возвращает молча чужой клиент"""
+        clients = HTTPClients()
+        
+        async def hook(response):
+            pass
+        
+        client = clients.client("openai", read_timeout=30, event_hooks={"response": [hook]})
+        assert clients.client("openai", read_timeout=30, event_hooks={"response": [hook]}) is client
+        with pytest.raises(ValueError):
+            clients.client("openai", read_timeout=300)
+        with pytest.raises(ValueError):
+            clients.client("openai", read_timeout=30)
+        
+        await clients.close()
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_opens_connections(self, server):
+        """Тест прогрева: запросы идут по уже открытым соединениям"""
+        base_url = f"http://127.0.0.1:{server.bound_port}/v1"
+        clients = HTTPClients(warmup_connections=2)
+        client = clients.client("openai", warmup_url=base_url)
+        
+        await clients.warm_up()
+        assert len(server._connections) == 2
+        
+        response = await client.get(f"{base_url}/ping")
+        assert response.status_code == 200
+        assert len(server._connections) == 2
+        await clients.close()
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_failure_is_ignored(self):
+        """Тест: недоступный сервер не мешает запуску"""
+        clients = HTTPClients(connect_timeout=0.5)
+        clients.client("openai", warmup_url="http://127.0.0.1:9/v1")
+        
+        await clients.warm_up()
+        await clients.close()
+    
+    def test_http2_requires_h2(self):
+        """Тест: HTTP/2 включается, только если установлен h2"""
+        with patch("src.services.http_clients.http2_available", return_value=False):
+            assert HTTPClients(http2=True).http2 is False
+        with patch("src.services.http_clients.http2_available", return_value=True):
+            assert HTTPClients(http2=False).http2 is False
+    
+    def test_telegram_request(self):
+        """Тест настроек запросов к Bot API"""
+        clients = HTTPClients(telegram_pool_size=64)
+        
+        request = clients.telegram_request()
+        assert request._client_kwargs["limits"].max_connections == 64
+        assert request._client_kwargs["timeout"].connect == 5.0
+        assert clients.telegram_request(get_updates=True)._client_kwargs["limits"].max_connections == 1
@@ -0,0 +1,131 @@
+import pytest
+import pytest_asyncio
+import json
+import httpx
+from unittest.mock import MagicMock, patch
+from src.bot.http_server import HTTPRequest, HTTPResponse, HTTPServer
+
+
+class TestHTTPServer:
+    """Тесты для встроенного HTTP-сервера"""
+    
+    @pytest_asyncio.fixture
+    async def server(self):
+        """Сервер на свободном порту с тестовыми маршрутами"""
+        server = HTTPServer("127.0.0.1", 0)
+        
+        async def echo(request):
+            return HTTPResponse(200, request.body, headers={"X-Secret": request.headers.get("x-secret", "")})
+        
+        async def fail(request):
+            raise RuntimeError("boom")
+        
+        server.add_route("POST", "/echo", echo)
+        server.add_route("GET", "/fail", fail)
+        await server.start()
+        
+        yield server
+        
+        await server.stop()
+    
+    @pytest.mark.asyncio
+    async def test_routes(self, server):
+        """Тест маршрутизации и keep-alive"""
+        base_url = f"http://127.0.0.1:{server.bound_port}"
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            response = await client.post("/echo", content=b"hello", headers={"X-Secret": "s"})
+            assert response.status_code == 200
+            assert response.content == b"hello"
+            assert response.headers["x-secret"] == "s"
+            
+            assert (await client.get("/missing")).status_code == 404
+            assert (await client.get("/echo")).status_code == 405
+            assert (await client.get("/fail")).status_code == 500
+    
+    @pytest.mark.asyncio
+    async def test_percent_encoded_path(self, server):
+        """Тест декодирования пути (например, токен с двоеточием)"""
+        async def ok(request):
+            return HTTPResponse(200, b"ok")
+        
+        server.add_route("GET", "/file/bot1:ABC/voice.ogg", ok)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.bound_port}") as client:
+            response = await client.get("/file/bot1%3AABC/voice.ogg")
+        
+        assert response.status_code == 200
+    
+    @pytest.mark.asyncio
+    async def test_body_size_limit(self, server):
+        """Тест ограничения размера тела запроса"""
+        server.max_body_size = 4
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.bound_port}") as client:
+            response = await client.post("/echo", content=b"too large")
+        
+        assert response.status_code == 413
+
+
+class TestWebhook:
+    """Тесты для приема обновлений через вебхук"""
+    
+    @pytest.fixture
+    def bot(self):
+        """Бот без реального подключения к Telegram"""
+        from src.bot.bot import PromptEnhancerBot
+        
+        bot = PromptEnhancerBot.__new__(PromptEnhancerBot)
+        bot.application = MagicMock()
+        bot.application.update_queue.put = MagicMock(side_effect=self._put)
+        self.queued = []
+        return bot
+    
+    async def _put(self, update):
+        self.queued.append(update)
+    
+    def _request(self, secret: str, body: bytes):
+        from src.bot.http_server import HTTPRequest
+        
+        return HTTPRequest("POST", "/telegram", {"x-telegram-bot-api-secret-token": secret}, body)
+    
+    @pytest.mark.asyncio
+    async def test_valid_update_is_queued(self, bot):
+        """Тест постановки обновления в очередь"""
+        body = json.dumps({"update_id": 1}).encode()
+        with patch("src.bot.bot.settings") as mock_settings:
+            mock_settings.webhook_secret = "secret"
+            response = await bot._handle_webhook(self._request("secret", body))
+        
+        assert response.status == 200
+        assert len(self.queued) == 1
+        assert self.queued[0].update_id == 1
+    
+    @pytest.mark.asyncio
+    async def test_wrong_secret(self, bot):
+        """Тест отклонения запроса с неверным секретом"""
+        with patch("src.bot.bot.settings") as mock_settings:
+            mock_settings.webhook_secret = "secret"
+            response = await bot._handle_webhook(self._request("wrong", b"{}"))
+        
+        assert response.status == 403
+        assert self.queued == []
+    
+    @pytest.mark.asyncio
+    async def test_invalid_body(self, bot):
+        """Тест некорректного тела запроса"""
+        with patch("src.bot.bot.settings") as mock_settings:
+            mock_settings.webhook_secret = "secret"
+            response = await bot._handle_webhook(self._request("secret", b"not json"))
+        
+        assert response.status == 400
+    
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, bot):
+        """Тест эндпоинта метрик"""
+        bot.handlers = MagicMock()
+        bot.handlers.pending_store.__len__.return_value = 5
+        
+        response = await bot._handle_metrics(HTTPRequest("GET", "/metrics", {}))
+        
+        assert response.status == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        assert b"bot_pending_texts 5" in response.body
+        assert b"# TYPE bot_updates_processed_total counter" in response.body
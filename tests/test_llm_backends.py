@@ -0,0 +1,123 @@
+import pytest
+import openai
+from unittest.mock import patch
+from src.models.enhancement import EnhancementType
+from src.services.cache_service import EnhancementCache
+from src.services.http_clients import HTTPClients
+from src.services.llm_backends import (
+    OpenAIBackend, OpenAICompatibleBackend, StubBackend, backend_from_settings
+)
+from src.services.openai_service import OpenAIService, OpenAIServiceError
+from src.services.resilience import ResiliencePolicy
+
+
+class TestStubBackend:
+    """Тесты для заглушки LLM"""
+    
+    @pytest.mark.asyncio
+    async def test_chat_completion(self):
+        """Тест ответа в формате chat.completions"""
+        backend = StubBackend()
+        
+        response = await backend.chat_completion(
+            model="gpt-4o", messages=[{"role": "user", "content": "текст"}], max_tokens=256, temperature=0.3
+        )
+        
+        assert response.choices[0].message.content == "Улучшенный вариант: текст"
+        assert response.usage.total_tokens > 0
+        assert backend.calls["chat"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_stream(self):
+        """Тест потокового ответа"""
+        backend = StubBackend(stream_chunks=4)
+        
+        stream = await backend.stream_chat(
+            model="gpt-4o", messages=[{"role": "user", "content": "текст"}], max_tokens=256, temperature=0.3
+        )
+        parts = [chunk.choices[0].delta.content async for chunk in stream]
+        await stream.aclose()
+        
+        assert len(parts) > 1
+        assert "".join(parts) == "Улучшенный вариант: текст"
+    
+    @pytest.mark.asyncio
+    async def test_error_injection_is_deterministic(self):
+        """Тест: ошибки выпадают с заданной долей и повторяются при том же seed"""
+        async def outcomes(seed):
+            backend = StubBackend(error_rate=0.5, seed=seed)
+            result = []
+            for _ in range(20):
+                try:
+                    await backend.transcribe(b"", model="whisper-1", language="ru")
+                    result.append(True)
+                except openai.APIConnectionError:
+                    result.append(False)
+            return result
+        
+        first = await outcomes(7)
+        
+        assert first == await outcomes(7)
+        assert True in first and False in first
+    
+    @pytest.mark.asyncio
+    async def test_service_offline(self):
+        """Тест: сервис работает на заглушке без сети, повторяя сетевые ошибки"""
+        policy = ResiliencePolicy(max_retries=5, backoff_base=0.0)
+        with patch('src.services.openai_service.settings') as mock_settings:
+            mock_settings.openai_model = "gpt-4o"
+            service = OpenAIService(cache=EnhancementCache(), resilience=policy,
+                                    backend=StubBackend(error_rate=0.3, seed=1))
+        
+        result = await service.enhance_text("текст", EnhancementType.GRAMMAR)
+        transcript = await service.transcribe_audio(b"voice")
+        
+        assert result.enhanced_text == "Улучшенный вариант: текст"
+        assert transcript == "Тестовая расшифровка голосового сообщения"
+        assert await service.analyze_text_type("напиши рассказ") == "prompt"
+    
+    @pytest.mark.asyncio
+    async def test_service_error(self):
+        """Тест: без повторов ошибка заглушки доходит до вызывающего"""
+        with patch('src.services.openai_service.settings') as mock_settings:
+            mock_settings.openai_model = "gpt-4o"
+            service = OpenAIService(cache=None, resilience=ResiliencePolicy(max_retries=0),
+                                    backend=StubBackend(error_rate=1.0))
+        
+        with pytest.raises(OpenAIServiceError):
+            await service.enhance_text("текст", EnhancementType.GRAMMAR)
+
+
+class TestBackendSelection:
+    """Тесты выбора бэкенда по настройкам"""
+    
+    @pytest.mark.asyncio
+    async def test_select_by_settings(self):
+        """Тест: LLM_BACKEND выбирает реализацию"""
+        clients = HTTPClients()
+        with patch('config.settings.settings') as mock_settings:
+            mock_settings.openai_api_key = "test_key"
+            mock_settings.openai_base_url = "http://127.0.0.1:8000/v1"
+            mock_settings.llm_stub_latency = 0.0
+            mock_settings.llm_stub_latency_sigma = 0.0
+            mock_settings.llm_stub_error_rate = 0.0
+            mock_settings.llm_stub_seed = 0
+            
+            mock_settings.llm_backend = "openai"
+            assert isinstance(backend_from_settings(clients, 10.0), OpenAIBackend)
+            mock_settings.llm_backend = "compatible"
+            compatible = backend_from_settings(clients, 10.0)
+            mock_settings.llm_backend = "stub"
+            assert isinstance(backend_from_settings(clients, 10.0), StubBackend)
+            mock_settings.llm_backend = "other"
+            with pytest.raises(ValueError):
+                backend_from_settings(clients, 10.0)
+        
+        assert isinstance(compatible, OpenAICompatibleBackend)
+        assert str(compatible.client.base_url).startswith("http://127.0.0.1:8000/v1")
+        await clients.close()
+    
+    def test_compatible_requires_base_url(self):
+        """Тест: совместимому бэкенду нужен адрес сервера"""
+        with pytest.raises(ValueError):
+            OpenAICompatibleBackend(None, HTTPClients(), 10.0)
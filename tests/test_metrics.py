@@ -0,0 +1,95 @@
+import pytest
+from src.services.metrics import MetricsRegistry, timed
+
+
+class TestMetrics:
+    """Тесты для метрик"""
+    
+    @pytest.fixture
+    def registry(self):
+        """Отдельный реестр для каждого теста"""
+        return MetricsRegistry()
+    
+    def test_counter_labels(self, registry):
+        """Тест счетчика с метками"""
+        counter = registry.counter("requests_total", "Запросы")
+        
+        counter.inc(type="grammar")
+        counter.inc(2, type="grammar")
+        counter.inc(type="custom")
+        
+        assert counter.value(type="grammar") == 3
+        assert counter.value(type="custom") == 1
+        assert registry.counter("requests_total", "Запросы") is counter
+    
+    def test_gauge(self, registry):
+        """Тест изменяемого значения"""
+        gauge = registry.gauge("queue_depth", "Очередь")
+        
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        assert gauge.value() == 1
+        
+        gauge.set(10)
+        assert gauge.value() == 10
+    
+    def test_histogram(self, registry):
+        """Тест гистограммы и оценки квантилей"""
+        histogram = registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0, 10.0))
+        
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        
+        assert histogram.count() == 4
+        assert histogram.sum() == pytest.approx(5.6)
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.95) == 10.0
+        
+        buckets = [value for name, _, value in histogram.samples() if name.endswith("_bucket")]
+        assert buckets == [2, 3, 4, 4]
+    
+    def test_type_conflict(self, registry):
+        """Тест повторной регистрации с другим типом"""
+        registry.counter("metric", "Метрика")
+        
+        with pytest.raises(ValueError):
+            registry.gauge("metric", "Метрика")
+    
+    def test_render(self, registry):
+        """Тест текстового формата Prometheus"""
+        registry.counter("requests_total", "Запросы").inc(3, type='say "hi"')
+        registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0)).observe(0.5, method="enhance")
+        
+        text = registry.render()
+        
+        assert "# HELP requests_total Запросы" in text
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{type="say \\"hi\\""} 3' in text
+        assert 'latency_seconds_bucket{method="enhance",le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{method="enhance",le="+Inf"} 1' in text
+        assert 'latency_seconds_sum{method="enhance"} 0.5' in text
+        assert text.endswith("\n")
+    
+    @pytest.mark.asyncio
+    async def test_timed(self, registry):
+        """Тест декоратора замера длительности"""
+        histogram = registry.histogram("call_seconds", "Вызовы")
+        errors = registry.counter("call_errors_total", "Ошибки")
+        
+        @timed(histogram, errors, method="ok")
+        async def ok():
+            return 1
+        
+        @timed(histogram, errors, method="fail")
+        def fail():
+            raise ValueError("boom")
+        
+        assert await ok() == 1
+        with pytest.raises(ValueError):
+            fail()
+        
+        assert histogram.count(method="ok") == 1
+        assert histogram.count(method="fail") == 1
+        assert errors.value(method="fail") == 1
+        assert errors.value(method="ok") == 0
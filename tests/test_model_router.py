@@ -0,0 +1,191 @@
+import pytest
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+from src.models.enhancement import EnhancementType
+from src.services.cache_service import EnhancementCache
+from src.services.model_router import (
+    ModelRouter, Route, ROUTE_COST, ROUTE_FALLBACKS, parse_routes
+)
+from src.services.openai_service import OpenAIService
+
+
+class TestModelRouter:
+    """Тесты для выбора модели"""
+    
+    def test_parse_routes(self):
+        """Тест разбора таблицы маршрутов"""
+        routes = parse_routes("classify=gpt-4o-mini, grammar:400=gpt-4o-mini|gpt-4o@2.5; grammar=gpt-4o")
+        
+        assert routes[0] == Route(task="classify", model="gpt-4o-mini")
+        assert routes[1] == Route(task="grammar", model="gpt-4o-mini", max_input_tokens=400,
+                                  fallback="gpt-4o", latency_budget=2.5)
+        assert routes[2].name == "grammar"
+        assert parse_routes("") == []
+        with pytest.raises(ValueError):
+            parse_routes("grammar")
+    
+    def test_route_by_input_size(self):
+        """Тест выбора маршрута по размеру входа"""
+        router = ModelRouter(default_model="gpt-4o", routes=parse_routes(
+            "grammar=gpt-4o, grammar:400=gpt-4o-mini"
+        ))
+        
+        assert router.route("grammar", 100).model == "gpt-4o-mini"
+        assert router.route("grammar", 401).model == "gpt-4o"
+        assert router.route("custom", 10).model == "gpt-4o"
+    
+    @pytest.mark.asyncio
+    async def test_fallback_on_error(self):
+        """Тест перехода на запасную модель при ошибке"""
+        router = ModelRouter(fallback_model="gpt-4o-mini")
+        route = router.route("grammar", 10)
+        calls = []
+        
+        async def factory(model, budget):
+            calls.append(model)
+            if model == "gpt-4o":
+                raise RuntimeError("model unavailable")
+            return model
+        
+        before = ROUTE_FALLBACKS.value(route="grammar", model="gpt-4o", reason="error")
+        
+        assert await router.call(route, factory) == ("gpt-4o-mini", "gpt-4o-mini")
+        assert calls == ["gpt-4o", "gpt-4o-mini"]
+        assert ROUTE_FALLBACKS.value(route="grammar", model="gpt-4o", reason="error") == before + 1
+    
+    @pytest.mark.asyncio
+    async def test_fallback_on_latency_budget(self):
+        """Тест: бюджет передается попытке основной модели, ее таймаут ведет к запасной"""
+        router = ModelRouter(routes=parse_routes("classify=slow|fast@0.05"))
+        budgets = []
+        
+        async def factory(model, budget):
+            budgets.append(budget)
+            if model == "slow":
+                await asyncio.wait_for(asyncio.sleep(1), budget)
+            return model
+        
+        before = ROUTE_FALLBACKS.value(route="classify", model="slow", reason="latency")
+        
+        assert await router.call(router.route("classify", 5), factory) == ("fast", "fast")
+        assert budgets == [0.05, None]
+        assert ROUTE_FALLBACKS.value(route="classify", model="slow", reason="latency") == before + 1
+    
+    @pytest.mark.asyncio
+    async def test_error_without_fallback(self):
+        """Тест: без запасной модели ошибка пробрасывается"""
+        router = ModelRouter()
+        
+        with pytest.raises(RuntimeError):
+            await router.call(router.route("grammar", 10), AsyncMock(side_effect=RuntimeError("boom")))
+    
+    def test_record_cost(self):
+        """Тест учета стоимости по ценам модели"""
+        route = Route(task="classify", model="gpt-4o-mini")
+        before = ROUTE_COST.value(route="classify", model="gpt-4o-mini")
+        
+        ModelRouter.record_cost(route, "gpt-4o-mini", 1_000_000, 1_000_000)
+        ModelRouter.record_cost(route, "unknown-model", 1_000_000, 1_000_000)
+        
+        assert ROUTE_COST.value(route="classify", model="gpt-4o-mini") == pytest.approx(before + 0.75)
+
+
+class TestRoutedService:
+    """Тесты маршрутизации запросов OpenAIService"""
+    
+    @pytest.fixture
+    def service(self):
+        """Сервис с отдельной моделью для классификации и коротких правок"""
+        with patch('src.services.openai_service.settings') as mock_settings:
+            mock_settings.openai_api_key = "test_key"
+            mock_settings.openai_model = "gpt-4o"
+            mock_settings.openai_base_url = None
+            router = ModelRouter(default_model="gpt-4o", routes=parse_routes(
+                "classify=gpt-4o-mini, grammar:50=gpt-4o-mini|gpt-4o"
+            ))
+            return OpenAIService(cache=EnhancementCache(), router=router)
+    
+    @staticmethod
+    def response(content):
+        mock_response = AsyncMock()
+        mock_response.choices = [AsyncMock()]
+        mock_response.choices[0].message.content = content
+        return mock_response
+    
+    @pytest.mark.asyncio
+    async def test_models_by_task(self, service):
+        """Тест: классификация и короткая грамматика — на быстрой модели, промпт — на основной"""
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = self.response("text")
+            
+            await service.analyze_text_type("короткий текст")
+            await service.enhance_text("короткий текст", EnhancementType.GRAMMAR)
+            await service.enhance_text("короткий текст", EnhancementType.PROMPT_ENHANCEMENT)
+            await service.enhance_text("длинный текст " * 20, EnhancementType.GRAMMAR)
+        
+        models = [call.kwargs["model"] for call in mock_create.await_args_list]
+        assert models == ["gpt-4o-mini", "gpt-4o-mini", "gpt-4o", "gpt-4o"]
+    
+    @pytest.mark.asyncio
+    async def test_fallback_model(self, service):
+        """Тест: при ошибке быстрой модели ответ дает запасная"""
+        models = []
+        
+        async def create(**kwargs):
+            models.append(kwargs["model"])
+            if kwargs["model"] == "gpt-4o-mini":
+                raise ValueError("model not found")
+            return self.response("Исправленный текст")
+        
+        with patch.object(service.backend.client.chat.completions, 'create', side_effect=create):
+            result = await service.enhance_text("текст", EnhancementType.GRAMMAR)
+        
+        assert result.enhanced_text == "Исправленный текст"
+        
+        # Ответ запасной модели не выдается потом за ответ быстрой модели
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = self.response("Ответ быстрой модели")
+            result = await service.enhance_text("текст", EnhancementType.GRAMMAR)
+        
+        assert result.enhanced_text == "Ответ быстрой модели"
+        assert mock_create.await_args.kwargs["model"] == "gpt-4o-mini"
+    
+    @pytest.mark.asyncio
+    async def test_queue_time_not_counted_in_budget(self, service):
+        """Тест: ожидание ограничителя дольше бюджета не переключает на запасную модель"""
+        service.router = ModelRouter(default_model="gpt-4o", routes=parse_routes("grammar=gpt-4o-mini|gpt-4o@0.05"))
+        limit = service.rate_limiter.limit
+        
+        @asynccontextmanager
+        async def slow_admission(kind="chat", tokens=0):
+            await asyncio.sleep(0.1)
+            async with limit(kind, tokens) as permit:
+                yield permit
+        
+        service.rate_limiter.limit = slow_admission
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = self.response("Ответ быстрой модели")
+            result = await service.enhance_text("текст", EnhancementType.GRAMMAR)
+        
+        assert result.enhanced_text == "Ответ быстрой модели"
+        assert [call.kwargs["model"] for call in mock_create.await_args_list] == ["gpt-4o-mini"]
+    
+    @pytest.mark.asyncio
+    async def test_slow_model_falls_back_without_retry(self, service):
+        """Тест: модель, не уложившаяся в бюджет, не повторяется, а сменяется запасной"""
+        service.router = ModelRouter(default_model="gpt-4o", routes=parse_routes("grammar=gpt-4o-mini|gpt-4o@0.05"))
+        
+        models = []
+        
+        async def create(**kwargs):
+            models.append(kwargs["model"])
+            if kwargs["model"] == "gpt-4o-mini":
+                await asyncio.sleep(1)
+            return self.response("Ответ запасной модели")
+        
+        with patch.object(service.backend.client.chat.completions, 'create', side_effect=create):
+            result = await service.enhance_text("текст", EnhancementType.GRAMMAR)
+        
+        assert result.enhanced_text == "Ответ запасной модели"
+        assert models == ["gpt-4o-mini", "gpt-4o"]
@@ -1,8 +1,10 @@
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, patch
-from src.services.openai_service import OpenAIService
+import io
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.services.openai_service import OpenAIService, OPENAI_LATENCY, OPENAI_TOKENS
 from src.models.enhancement import EnhancementType, EnhancementResponse
+from src.services.cache_service import EnhancementCache
 
 
 class TestOpenAIService:
@@ -14,12 +16,13 @@ class TestOpenAIService:
         with patch('src.services.openai_service.settings') as mock_settings:
             mock_settings.openai_api_key = "test_key"
             mock_settings.openai_model = "gpt-4o"
-            return OpenAIService()
+            mock_settings.openai_base_url = None
+            return OpenAIService(cache=EnhancementCache())
     
     @pytest.mark.asyncio
     async def test_enhance_text_grammar(self, service):
         """Тест улучшения грамматики"""
-        with patch.object(service.client.chat.completions, 'create') as mock_create:
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
             mock_response = AsyncMock()
             mock_response.choices = [AsyncMock()]
             mock_response.choices[0].message.content = "Улучшенный текст"
@@ -38,7 +41,7 @@ class TestOpenAIService:
     @pytest.mark.asyncio
     async def test_enhance_text_prompt(self, service):
         """Тест усиления промпта"""
-        with patch.object(service.client.chat.completions, 'create') as mock_create:
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
             mock_response = AsyncMock()
             mock_response.choices = [AsyncMock()]
             mock_response.choices[0].message.content = "Улучшенный промпт"
@@ -56,7 +59,7 @@ class TestOpenAIService:
     @pytest.mark.asyncio
     async def test_analyze_text_type_prompt(self, service):
         """Тест анализа типа текста - промпт"""
-        with patch.object(service.client.chat.completions, 'create') as mock_create:
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
             mock_response = AsyncMock()
             mock_response.choices = [AsyncMock()]
             mock_response.choices[0].message.content = "prompt"
@@ -69,7 +72,7 @@ class TestOpenAIService:
     @pytest.mark.asyncio
     async def test_analyze_text_type_text(self, service):
         """Тест анализа типа текста - обычный текст"""
-        with patch.object(service.client.chat.completions, 'create') as mock_create:
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
             mock_response = AsyncMock()
             mock_response.choices = [AsyncMock()]
             mock_response.choices[0].message.content = "text"
@@ -82,9 +85,118 @@ class TestOpenAIService:
     @pytest.mark.asyncio
     async def test_analyze_text_type_error(self, service):
         """Тест анализа типа текста при ошибке"""
-        with patch.object(service.client.chat.completions, 'create') as mock_create:
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
             mock_create.side_effect = Exception("API Error")
             
             result = await service.analyze_text_type("тест")
             
-            assert result == "text"  # По умолчанию возвращает text 
\ No newline at end of file
+            assert result == "text"  # По умолчанию возвращает text 
+    
+    @pytest.mark.asyncio
+    async def test_enhance_text_cached(self, service):
+        """Тест повторного запроса из кэша"""
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_response = AsyncMock()
+            mock_response.choices = [AsyncMock()]
+            mock_response.choices[0].message.content = "Улучшенный текст"
+            mock_create.return_value = mock_response
+            
+            first = await service.enhance_text("тест текст", EnhancementType.GRAMMAR)
+            second = await service.enhance_text("тест текст", EnhancementType.GRAMMAR)
+            
+            assert first.enhanced_text == second.enhanced_text == "Улучшенный текст"
+            assert mock_create.call_count == 1
+            assert service.cache.stats()["memory_hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_enhance_text_stream(self, service):
+        """Тест потокового улучшения текста"""
+        async def fake_stream():
+            for content in ["Улучшенный", " ", "текст"]:
+                chunk = MagicMock()
+                chunk.choices = [MagicMock()]
+                chunk.choices[0].delta.content = content
+                yield chunk
+        
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = fake_stream()
+            
+            parts = [part async for part in service.enhance_text_stream("тест", EnhancementType.GRAMMAR)]
+            
+            assert "".join(parts) == "Улучшенный текст"
+            assert mock_create.call_args.kwargs["stream"] is True
+            
+            # Повторный запрос отдается из кэша одним фрагментом
+            cached = [part async for part in service.enhance_text_stream("тест", EnhancementType.GRAMMAR)]
+            assert cached == ["Улучшенный текст"]
+            assert mock_create.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_empty_result_not_cached(self, service):
+        """Тест: пустой ответ модели не попадает в кэш"""
+        async def empty_stream():
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = "  "
+            yield chunk
+        
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.side_effect = lambda **kwargs: empty_stream()
+            for _ in range(2):
+                [part async for part in service.enhance_text_stream("тест", EnhancementType.GRAMMAR)]
+            assert mock_create.call_count == 2
+        
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_response = AsyncMock()
+            mock_response.choices = [AsyncMock()]
+            mock_response.choices[0].message.content = ""
+            mock_create.return_value = mock_response
+            for _ in range(2):
+                await service.enhance_text("тест текст", EnhancementType.GRAMMAR)
+            assert mock_create.call_count == 2
+        
+        assert service.cache.stats()["memory_hits"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_transcribe_audio_bytes(self, service):
+        """Тест транскрибирования аудио из памяти"""
+        with patch.object(service.backend.client.audio.transcriptions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = MagicMock(text="Распознанный текст")
+            
+            result = await service.transcribe_audio(b"OggS-data")
+            
+            assert result == "Распознанный текст"
+            assert mock_create.call_args.kwargs["file"] == ("voice.ogg", b"OggS-data")
+    
+    @pytest.mark.asyncio
+    async def test_transcribe_audio_file_object(self, service):
+        """Тест транскрибирования из файлового объекта"""
+        buffer = io.BytesIO(b"OggS-data")
+        buffer.read()
+        
+        async def fake_create(**kwargs):
+            name, audio = kwargs["file"]
+            return MagicMock(text=audio.read().decode())
+        
+        with patch.object(service.backend.client.audio.transcriptions, 'create', side_effect=fake_create):
+            assert await service.transcribe_audio(buffer) == "OggS-data"
+    
+    @pytest.mark.asyncio
+    async def test_usage_metrics(self, service):
+        """Тест учета токенов и длительности в метриках"""
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_response = MagicMock()
+            mock_response.choices[0].message.content = "Улучшенный текст"
+            mock_response.usage.prompt_tokens = 120
+            mock_response.usage.completion_tokens = 30
+            mock_create.return_value = mock_response
+            
+            labels = dict(operation="enhance", model=service.model, source="usage")
+            prompt_before = OPENAI_TOKENS.value(kind="prompt", **labels)
+            calls_before = OPENAI_LATENCY.count(method="enhance_text")
+            
+            await service.enhance_text("метрики", EnhancementType.GRAMMAR)
+            
+            assert OPENAI_TOKENS.value(kind="prompt", **labels) == prompt_before + 120
+            assert OPENAI_TOKENS.value(kind="completion", **labels) >= 30
+            assert OPENAI_LATENCY.count(method="enhance_text") == calls_before + 1
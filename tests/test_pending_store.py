@@ -0,0 +1,117 @@
+import pytest
+import tempfile
+import os
+import threading
+import time
+from src.services.pending_store import PendingTextStore
+from src.models.enhancement import TextSource
+
+
+class TestPendingTextStore:
+    """Тесты для хранилища ожидающих текстов"""
+    
+    @pytest.fixture
+    def storage_path(self):
+        """Путь к временной базе хранилища"""
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, "pending.db")
+        
+        yield path
+        
+        # Очистка после тестов
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+        os.rmdir(temp_dir)
+    
+    @pytest.mark.asyncio
+    async def test_put_get(self):
+        """Тест сохранения и получения текста"""
+        store = PendingTextStore()
+        
+        token = await store.put("тестовый текст", 123, TextSource.VOICE)
+        pending = await store.get(token)
+        
+        assert len(f"enhance:custom:{token}:custom_1".encode()) <= 64
+        assert pending.text == "тестовый текст"
+        assert pending.user_id == 123
+        assert pending.source == TextSource.VOICE
+    
+    @pytest.mark.asyncio
+    async def test_get_unknown_token(self):
+        """Тест получения по неизвестному токену"""
+        store = PendingTextStore()
+        
+        assert await store.get("unknown") is None
+    
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """Тест истечения срока хранения"""
+        store = PendingTextStore(ttl=0)
+        
+        token = await store.put("текст", 123)
+        time.sleep(0.01)
+        
+        assert await store.get(token) is None
+        assert len(store) == 0
+    
+    @pytest.mark.asyncio
+    async def test_max_entries(self):
+        """Тест ограничения количества текстов"""
+        store = PendingTextStore(max_entries=2)
+        
+        first = await store.put("первый", 1)
+        second = await store.put("второй", 1)
+        third = await store.put("третий", 1)
+        
+        assert await store.get(first) is None
+        assert (await store.get(second)).text == "второй"
+        assert (await store.get(third)).text == "третий"
+    
+    @pytest.mark.asyncio
+    async def test_max_bytes(self):
+        """Тест ограничения объема памяти"""
+        store = PendingTextStore(max_bytes=10)
+        
+        first = await store.put("12345678", 1)
+        second = await store.put("abcdefgh", 1)
+        
+        assert await store.get(first) is None
+        assert (await store.get(second)).text == "abcdefgh"
+    
+    @pytest.mark.asyncio
+    async def test_shared_storage(self, storage_path):
+        """Тест общего хранилища для нескольких реплик"""
+        replica1 = PendingTextStore(storage_path=storage_path)
+        replica2 = PendingTextStore(storage_path=storage_path)
+        
+        token = await replica1.put("текст с первой реплики", 123)
+        pending = await replica2.get(token)
+        
+        assert pending is not None
+        assert pending.text == "текст с первой реплики"
+        assert pending.user_id == 123
+        
+        replica1.close()
+        replica2.close()
+    
+    @pytest.mark.asyncio
+    async def test_disk_io_off_event_loop(self, storage_path):
+        """Тест: запись и чтение SQLite выполняются не в потоке цикла событий"""
+        store = PendingTextStore(storage_path=storage_path)
+        threads = []
+        for name in ("_write", "_read"):
+            original = getattr(store._store, name)
+            
+            def record(*args, original=original):
+                threads.append(threading.get_ident())
+                return original(*args)
+            setattr(store._store, name, record)
+        
+        token = await store.put("текст", 123)
+        store._store._memory.clear()
+        
+        assert (await store.get(token)).text == "текст"
+        assert len(threads) == 2
+        assert threading.get_ident() not in threads
+        store.close()
@@ -0,0 +1,55 @@
+import pytest
+from src.models.enhancement import EnhancementType
+from src.services.openai_service import OpenAIService
+from src.services.prompt_templates import (
+    GRAMMAR, PromptRegistry, TEMPLATE_TOKENS, normalize_prompt, templates
+)
+
+
+class TestPromptTemplates:
+    """Тесты для реестра системных промптов"""
+    
+    def test_normalize_prompt(self):
+        """Тест удаления отступов и лишних пробелов"""
+        text = """
+            Первая строка   
+                - пункт
+
+
+            Последняя строка
+        """
+        
+        assert normalize_prompt(text) == "Первая строка\n    - пункт\n\nПоследняя строка"
+    
+    def test_builtin_templates_are_normalized(self):
+        """Тест: встроенные промпты без отступов и с оценкой токенов"""
+        for item in templates.report():
+            template = templates.get(item["name"])
+            assert template.text == template.text.strip()
+            assert not any(line.startswith(" ") for line in template.text.splitlines())
+            assert template.tokens > 0
+            assert TEMPLATE_TOKENS.value(template=template.name, version="1") == template.tokens
+    
+    def test_versions(self):
+        """Тест обновления промпта только с новой версией"""
+        registry = PromptRegistry()
+        registry.register("test", "Первый вариант")
+        
+        with pytest.raises(ValueError):
+            registry.register("test", "Второй вариант")
+        
+        template = registry.register("test", "Второй вариант", version=2)
+        assert registry.get("test") is template
+        assert template.fingerprint != PromptRegistry().register("test", "Первый вариант").fingerprint
+    
+    def test_unknown_template(self):
+        """Тест запроса незарегистрированного промпта"""
+        with pytest.raises(KeyError):
+            PromptRegistry().get("missing")
+    
+    def test_service_uses_registry(self):
+        """Тест: сервис отправляет нормализованные промпты"""
+        assert OpenAIService.system_prompt(EnhancementType.GRAMMAR) == templates.get(GRAMMAR).text
+        assert OpenAIService.system_prompt(
+            EnhancementType.CUSTOM, "\n    Сделай текст короче  \n"
+        ) == "Сделай текст короче"
@@ -0,0 +1,115 @@
+import pytest
+import asyncio
+import time
+from src.services.rate_limiter import OpenAIRateLimiter, TokenBucket, estimate_tokens, parse_reset
+
+
+class TestRateLimiter:
+    """Тесты для ограничителя запросов к OpenAI"""
+    
+    def test_parse_reset(self):
+        """Тест разбора длительностей из заголовков"""
+        assert parse_reset("1s") == 1.0
+        assert parse_reset("6m0s") == 360.0
+        assert parse_reset("20ms") == pytest.approx(0.02)
+        assert parse_reset("2") == 2.0
+        assert parse_reset("") is None
+    
+    def test_estimate_tokens(self):
+        """Тест оценки числа токенов"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("абвгде") == 2
+    
+    def test_token_bucket(self):
+        """Тест бюджета с пополнением"""
+        bucket = TokenBucket(60)
+        
+        bucket.take(60)
+        assert bucket.time_until(1) == pytest.approx(1.0, abs=0.05)
+        
+        bucket.refund(30)
+        assert bucket.time_until(30) == 0.0
+        
+        # Запрос больше емкости не должен ждать бесконечно
+        assert bucket.time_until(1000) < 60
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Тест ограничения параллельности"""
+        limiter = OpenAIRateLimiter(max_concurrent=2, requests_per_minute=0, tokens_per_minute=0)
+        running = 0
+        peak = 0
+        
+        async def request():
+            nonlocal running, peak
+            async with limiter.limit("chat"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+        
+        await asyncio.gather(*(request() for _ in range(6)))
+        
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_busy(self):
+        """Тест признака очереди: все слоты заняты"""
+        limiter = OpenAIRateLimiter(max_concurrent=1, requests_per_minute=0, tokens_per_minute=0)
+        assert not limiter.busy("chat")
+        async with limiter.limit("chat"):
+            assert limiter.busy("chat")
+        assert not limiter.busy("chat")
+    
+    @pytest.mark.asyncio
+    async def test_requests_per_minute_queue(self):
+        """Тест ожидания бюджета RPM в порядке очереди"""
+        limiter = OpenAIRateLimiter(requests_per_minute=600, tokens_per_minute=0)
+        limiter._requests["chat"].tokens = 0
+        order = []
+        
+        async def request(i):
+            async with limiter.limit("chat"):
+                order.append(i)
+        
+        started = time.monotonic()
+        await asyncio.gather(*(request(i) for i in range(3)))
+        
+        # 600 RPM — один запрос в 0.1 с
+        assert time.monotonic() - started >= 0.25
+        assert order == [0, 1, 2]
+    
+    @pytest.mark.asyncio
+    async def test_tokens_refund(self):
+        """Тест возврата неиспользованного бюджета токенов"""
+        limiter = OpenAIRateLimiter(requests_per_minute=0, tokens_per_minute=1000)
+        
+        async with limiter.limit("chat", tokens=800) as permit:
+            permit.actual_tokens = 100
+        
+        assert limiter._tokens.tokens == pytest.approx(900, abs=5)
+    
+    def test_observe_headers(self):
+        """Тест подстройки под заголовки ответа"""
+        limiter = OpenAIRateLimiter(requests_per_minute=500, tokens_per_minute=30000)
+        
+        limiter.observe_headers({
+            "x-ratelimit-limit-requests": "100",
+            "x-ratelimit-remaining-requests": "5",
+            "x-ratelimit-limit-tokens": "10000",
+            "x-ratelimit-remaining-tokens": "2000"
+        })
+        
+        assert limiter._requests["chat"].capacity == 100
+        assert limiter._requests["chat"].tokens <= 5.1
+        assert limiter._tokens.capacity == 10000
+        assert limiter._tokens.tokens <= 2010
+    
+    def test_retry_after_pauses_kind(self):
+        """Тест паузы после ответа 429"""
+        limiter = OpenAIRateLimiter()
+        
+        limiter.observe_headers({"retry-after": "2"}, kind="chat", status=429)
+        
+        assert limiter._wait_time("chat", 0) > 1.5
+        assert limiter._wait_time("audio", 0) == 0.0
@@ -0,0 +1,172 @@
+import pytest
+import asyncio
+import httpx
+import openai
+from contextlib import asynccontextmanager
+from src.services.resilience import CALL_LATENCY, HEDGES_SKIPPED, HEDGE_WINS, RETRIES, ResiliencePolicy
+
+
+class TestResiliencePolicy:
+    """Тесты для политики таймаутов, повторов и дублирования"""
+
+    @pytest.fixture
+    def policy(self):
+        """Политика с короткими задержками"""
+        return ResiliencePolicy(timeout=0.5, deadline=2.0, max_retries=2,
+                                backoff_base=0.01, backoff_max=0.02)
+
+    @pytest.mark.asyncio
+    async def test_retry_on_retryable_error(self, policy):
+        """Тест повтора после временной ошибки"""
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            if calls < 3:
+                raise asyncio.TimeoutError()
+            return "ok"
+
+        retries_before = RETRIES.value(operation="test_retry")
+        assert await policy.call("test_retry", request) == "ok"
+        assert calls == 3
+        assert RETRIES.value(operation="test_retry") == retries_before + 2
+
+    @pytest.mark.asyncio
+    async def test_no_retry_on_client_error(self, policy):
+        """Тест отсутствия повторов для неповторяемых ошибок"""
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await policy.call("test_client_error", request)
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted(self, policy):
+        """Тест исчерпания повторов"""
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            raise asyncio.TimeoutError()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await policy.call("test_exhausted", request)
+        assert calls == 3
+
+    @pytest.mark.asyncio
+    async def test_timeout_per_attempt(self):
+        """Тест таймаута зависшей попытки"""
+        policy = ResiliencePolicy(timeout=0.05, deadline=1.0, max_retries=0)
+
+        async def request():
+            await asyncio.sleep(10)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await policy.call("test_timeout", request)
+
+    @pytest.mark.asyncio
+    async def test_deadline_limits_retries(self):
+        """Тест общего дедлайна запроса"""
+        policy = ResiliencePolicy(timeout=0.1, deadline=0.25, max_retries=10,
+                                  backoff_base=0.01, backoff_max=0.01)
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(10)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(asyncio.TimeoutError):
+            await policy.call("test_deadline", request)
+        assert loop.time() - started < 0.5
+        assert calls <= 3
+
+    def test_is_retryable(self):
+        """Тест классификации ошибок"""
+        request = httpx.Request("POST", "https://api.openai.com")
+        assert ResiliencePolicy.is_retryable(openai.APIConnectionError(request=request))
+        assert ResiliencePolicy.is_retryable(asyncio.TimeoutError())
+        assert not ResiliencePolicy.is_retryable(ValueError())
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins(self):
+        """Тест дублирующего запроса при медленном основном"""
+        policy = ResiliencePolicy(timeout=1.0, deadline=2.0, hedge_enabled=True, hedge_delay=0.05)
+        calls = 0
+        cancelled = asyncio.Event()
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            return "fast"
+
+        wins_before = HEDGE_WINS.value(operation="test_hedge", winner="hedge")
+        assert await policy.call("test_hedge", request, hedge=True) == "fast"
+        assert calls == 2
+        await asyncio.wait_for(cancelled.wait(), 1.0)
+        assert HEDGE_WINS.value(operation="test_hedge", winner="hedge") == wins_before + 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_for_fast_request(self):
+        """Тест отсутствия дублирования для быстрого ответа"""
+        policy = ResiliencePolicy(hedge_enabled=True, hedge_delay=0.5)
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            return "ok"
+
+        assert await policy.call("test_fast", request, hedge=True) == "ok"
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_admission_wait_not_timed(self):
+        """Тест: ожидание допуска ограничителя не входит в таймаут попытки и ее латентность"""
+        policy = ResiliencePolicy(timeout=0.05, deadline=1.0, max_retries=0)
+        permits = []
+
+        @asynccontextmanager
+        async def admit():
+            # Очередь ограничителя дольше таймаута попытки
+            await asyncio.sleep(0.1)
+            yield "permit"
+
+        async def request(permit):
+            permits.append(permit)
+            return "ok"
+
+        assert await policy.call("test_admission", request, admit=admit) == "ok"
+        assert permits == ["permit"]
+        assert CALL_LATENCY.quantile(1.0, operation="test_admission") < 0.05
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_while_limiter_busy(self):
+        """Тест: при очереди у ограничителя дублирующий запрос не запускается"""
+        policy = ResiliencePolicy(timeout=1.0, deadline=2.0, hedge_enabled=True, hedge_delay=0.01)
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        assert await policy.call("test_busy", request, hedge=True, busy=lambda: True) == "ok"
+        assert calls == 1
+        assert HEDGES_SKIPPED.value(operation="test_busy") == 1
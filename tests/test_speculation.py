@@ -0,0 +1,107 @@
+import pytest
+import asyncio
+from src.models.enhancement import EnhancementResponse, EnhancementType
+from src.services.speculation import SpeculativeEnhancer, SPECULATIONS, SPECULATION_TOKENS
+
+
+def make_enhance(delay: float = 0.0, calls: list = None, fail: bool = False):
+    """Фейковое улучшение с задержкой"""
+    async def enhance(text: str, enhancement_type: EnhancementType) -> EnhancementResponse:
+        if calls is not None:
+            calls.append(enhancement_type)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("API Error")
+        return EnhancementResponse(
+            original_text=text,
+            enhanced_text=f"{enhancement_type.value}: {text}",
+            enhancement_type=enhancement_type
+        )
+    return enhance
+
+
+class TestSpeculativeEnhancer:
+    """Тесты для упреждающего улучшения"""
+
+    @pytest.mark.asyncio
+    async def test_hit(self):
+        """Тест угаданного выбора"""
+        calls = []
+        speculator = SpeculativeEnhancer(make_enhance(calls=calls))
+        hits_before = SPECULATIONS.value(outcome="hit")
+
+        assert speculator.start("t1", "напиши код", 1, "prompt")
+        await asyncio.sleep(0)
+
+        response = await speculator.take("t1", EnhancementType.PROMPT_ENHANCEMENT)
+        assert response.enhanced_text == "prompt_enhancement: напиши код"
+        assert calls == [EnhancementType.PROMPT_ENHANCEMENT]
+        assert SPECULATIONS.value(outcome="hit") == hits_before + 1
+
+        # Повторно результат не выдается
+        assert await speculator.take("t1", EnhancementType.PROMPT_ENHANCEMENT) is None
+
+    @pytest.mark.asyncio
+    async def test_take_waits_for_in_flight(self):
+        """Тест ожидания незавершенного упреждающего запроса"""
+        calls = []
+        speculator = SpeculativeEnhancer(make_enhance(delay=0.05, calls=calls))
+        speculator.start("t1", "текст", 1, "text")
+
+        response = await speculator.take("t1", EnhancementType.GRAMMAR)
+        assert response.enhancement_type == EnhancementType.GRAMMAR
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_miss_cancels(self):
+        """Тест отмены при другом выборе пользователя"""
+        speculator = SpeculativeEnhancer(make_enhance(delay=10))
+        wasted_before = SPECULATION_TOKENS.value(outcome="wasted")
+        speculator.start("t1", "текст", 1, "text")
+        task = speculator._speculations["t1"].task
+
+        assert await speculator.take("t1", EnhancementType.CUSTOM) is None
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        assert SPECULATION_TOKENS.value(outcome="wasted") > wasted_before
+
+    @pytest.mark.asyncio
+    async def test_expiry(self):
+        """Тест отмены неиспользованного улучшения по TTL"""
+        speculator = SpeculativeEnhancer(make_enhance(delay=10), ttl=0.01)
+        speculator.start("t1", "текст", 1, "text")
+
+        await asyncio.sleep(0.05)
+        assert speculator.in_flight() == 0
+        assert await speculator.take("t1", EnhancementType.GRAMMAR) is None
+
+    @pytest.mark.asyncio
+    async def test_budget(self):
+        """Тест ограничения числа упреждающих запросов"""
+        speculator = SpeculativeEnhancer(make_enhance(delay=10), max_in_flight=2, max_text_length=10)
+
+        assert speculator.start("t1", "текст", 1, "text")
+        assert speculator.start("t2", "текст", 2, "text")
+        assert not speculator.start("t3", "текст", 3, "text")
+        assert not speculator.start("t4", "очень длинный текст", 4, "text")
+        speculator.close()
+        assert speculator.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_new_text_replaces_previous(self):
+        """Тест отмены прежней спекуляции пользователя при новом тексте"""
+        speculator = SpeculativeEnhancer(make_enhance(delay=10))
+        speculator.start("t1", "первый", 1, "text")
+        speculator.start("t2", "второй", 1, "text")
+
+        assert "t1" not in speculator._speculations
+        assert speculator.in_flight() == 1
+        speculator.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_speculation(self):
+        """Тест ошибки упреждающего запроса"""
+        speculator = SpeculativeEnhancer(make_enhance(fail=True))
+        speculator.start("t1", "текст", 1, "text")
+
+        assert await speculator.take("t1", EnhancementType.GRAMMAR) is None
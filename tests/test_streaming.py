@@ -0,0 +1,92 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from telegram.error import BadRequest, RetryAfter
+from src.bot.streaming import ProgressiveMessageEditor
+
+
+class TestProgressiveMessageEditor:
+    """Тесты для постепенного обновления сообщения"""
+    
+    @pytest.fixture
+    def message(self):
+        """Сообщение Telegram с заглушкой edit_text"""
+        message = MagicMock()
+        message.edit_text = AsyncMock()
+        return message
+    
+    @pytest.mark.asyncio
+    async def test_updates_are_coalesced(self, message):
+        """Тест объединения частых обновлений в одну правку"""
+        editor = ProgressiveMessageEditor(message, min_interval=0.05, min_delta=1)
+        editor.start()
+        
+        text = ""
+        for i in range(50):
+            text += f"{i} "
+            editor.update(text)
+        await asyncio.sleep(0.1)
+        await editor.finish("финальный текст")
+        
+        assert message.edit_text.await_count < 10
+        assert editor.coalesced > 0
+        assert message.edit_text.await_args.args[0] == "финальный текст"
+    
+    @pytest.mark.asyncio
+    async def test_min_delta(self, message):
+        """Тест пропуска правок с небольшим приростом текста"""
+        editor = ProgressiveMessageEditor(message, min_interval=0, min_delta=100)
+        editor.start()
+        
+        editor.update("коротко")
+        await asyncio.sleep(0.01)
+        await editor.stop()
+        
+        message.edit_text.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_finish_retries_after_flood_control(self, message):
+        """Тест повторной финальной правки после RetryAfter"""
+        message.edit_text.side_effect = [RetryAfter(0), None]
+        editor = ProgressiveMessageEditor(message, min_interval=0)
+        
+        await editor.finish("текст", parse_mode="Markdown")
+        
+        assert message.edit_text.await_count == 2
+        assert editor.edits == 1
+    
+    @pytest.mark.asyncio
+    async def test_long_text_is_truncated(self, message):
+        """Тест обрезки текста до лимита Telegram"""
+        editor = ProgressiveMessageEditor(message, min_interval=0)
+        
+        await editor.finish("а" * 5000)
+        
+        assert len(message.edit_text.await_args.args[0]) == ProgressiveMessageEditor.MAX_LENGTH
+    
+    @pytest.mark.asyncio
+    async def test_finish_gives_up_after_attempts(self, message):
+        """Тест: при постоянном RetryAfter финальная правка не зацикливается"""
+        message.edit_text.side_effect = RetryAfter(0)
+        editor = ProgressiveMessageEditor(message, min_interval=0)
+        
+        assert await editor.finish("текст") is False
+        assert message.edit_text.await_count == ProgressiveMessageEditor.FINISH_ATTEMPTS
+    
+    @pytest.mark.asyncio
+    async def test_finish_respects_deadline(self, message):
+        """Тест: ожидание дольше дедлайна не начинается"""
+        message.edit_text.side_effect = RetryAfter(3600)
+        editor = ProgressiveMessageEditor(message, min_interval=0)
+        
+        assert await asyncio.wait_for(editor.finish("текст"), 1) is False
+        assert message.edit_text.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_finish_without_markup_on_broken_entities(self, message):
+        """Тест: разметка, разорванная обрезкой, отправляется без parse_mode"""
+        message.edit_text.side_effect = [BadRequest("Can't parse entities: can't find end of bold entity"), None]
+        editor = ProgressiveMessageEditor(message, min_interval=0)
+        
+        assert await editor.finish("*жирный " + "а" * 5000, parse_mode="Markdown") is True
+        assert message.edit_text.await_args.kwargs["parse_mode"] is None
@@ -0,0 +1,91 @@
+import pytest
+import json
+import os
+from unittest.mock import AsyncMock
+from src.services.text_classifier import LocalTextClassifier, TextTypeClassifier, extract_features
+
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "text_type_corpus.jsonl")
+
+
+class TestLocalTextClassifier:
+    """Тесты для локального классификатора"""
+    
+    @pytest.fixture
+    def classifier(self):
+        """Создание классификатора с моделью по умолчанию"""
+        return LocalTextClassifier()
+    
+    def test_extract_features(self):
+        """Тест извлечения признаков"""
+        features = extract_features("Создай функцию на python\n- с тестами\n- с `docstring`")
+        
+        assert features["starts_imperative"] == 1.0
+        assert features["code"] >= 1.0
+        assert features["code_block"] == 1.0
+        assert features["list_lines"] == 2.0
+        assert features["multiline"] == 1.0
+    
+    def test_classify_prompt(self, classifier):
+        """Тест распознавания промпта"""
+        label, confidence = classifier.classify("Напиши функцию на python, которая парсит JSON")
+        
+        assert label == "prompt"
+        assert 0.5 <= confidence <= 1.0
+    
+    def test_classify_text(self, classifier):
+        """Тест распознавания обычного текста"""
+        label, _ = classifier.classify("привет, вчера ходили в кино, было здорово")
+        
+        assert label == "text"
+    
+    def test_corpus_agreement(self, classifier):
+        """Тест согласия с разметкой LLM на корпусе"""
+        with open(CORPUS_PATH, encoding="utf-8") as f:
+            corpus = [json.loads(line) for line in f if line.strip()]
+        
+        agree = sum(1 for item in corpus if classifier.classify(item["text"])[0] == item["label"])
+        
+        assert agree / len(corpus) >= 0.9
+
+
+class TestTextTypeClassifier:
+    """Тесты для стадии классификации"""
+    
+    @pytest.mark.asyncio
+    async def test_confident_local_decision(self):
+        """Тест ответа без обращения к LLM при высокой уверенности"""
+        llm_classify = AsyncMock(return_value="text")
+        classifier = TextTypeClassifier(llm_classify=llm_classify, confidence_threshold=0.6)
+        
+        result = await classifier.classify("Создай REST API на FastAPI и напиши тесты на pytest")
+        
+        assert result == "prompt"
+        llm_classify.assert_not_called()
+        assert classifier.local_decisions == 1
+    
+    @pytest.mark.asyncio
+    async def test_low_confidence_fallback(self):
+        """Тест отката к LLM при низкой уверенности"""
+        llm_classify = AsyncMock(return_value="prompt")
+        classifier = TextTypeClassifier(llm_classify=llm_classify, confidence_threshold=1.0)
+        
+        result = await classifier.classify("что-то непонятное")
+        
+        assert result == "prompt"
+        llm_classify.assert_awaited_once_with("что-то непонятное")
+        assert classifier.llm_decisions == 1
+    
+    @pytest.mark.asyncio
+    async def test_local_mode_never_calls_llm(self):
+        """Тест локального режима"""
+        classifier = TextTypeClassifier(mode="local", confidence_threshold=1.0)
+        
+        result = await classifier.classify("что-то непонятное")
+        
+        assert result in ("prompt", "text")
+    
+    def test_invalid_mode(self):
+        """Тест неизвестного режима"""
+        with pytest.raises(ValueError):
+            TextTypeClassifier(mode="unknown")
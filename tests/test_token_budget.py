@@ -0,0 +1,143 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, patch
+from src.models.enhancement import EnhancementType
+from src.services.cache_service import EnhancementCache
+from src.services.openai_service import OpenAIService
+from src.services.rate_limiter import estimate_tokens
+from src.services.token_budget import TokenBudget
+
+
+def paragraph(index: int, sentences: int = 10) -> str:
+    return " ".join(f"Предложение {index}.{n} про важные детали отчета." for n in range(sentences))
+
+
+class TestTokenBudget:
+    """Тесты для бюджета токенов"""
+    
+    def test_max_tokens_by_type(self):
+        """Тест бюджета ответа: грамматика экономнее усиления промпта"""
+        budget = TokenBudget(min_output_tokens=100, max_output_tokens=4000)
+        
+        grammar = budget.max_tokens(EnhancementType.GRAMMAR, 300)
+        prompt = budget.max_tokens(EnhancementType.PROMPT_ENHANCEMENT, 300)
+        
+        assert 300 < grammar < prompt
+        assert budget.max_tokens(EnhancementType.GRAMMAR, 5) == 100
+        assert budget.max_tokens(EnhancementType.PROMPT_ENHANCEMENT, 5000) == 4000
+    
+    def test_should_split(self):
+        """Тест: по частям делится только длинная грамматика"""
+        budget = TokenBudget(chunk_threshold_tokens=1000)
+        
+        assert budget.should_split(EnhancementType.GRAMMAR, 1001)
+        assert not budget.should_split(EnhancementType.GRAMMAR, 1000)
+        assert not budget.should_split(EnhancementType.PROMPT_ENHANCEMENT, 5000)
+    
+    def test_split_by_paragraphs(self):
+        """Тест разбиения по абзацам с сохранением разделителей"""
+        budget = TokenBudget(chunk_target_tokens=200)
+        text = "\n\n".join(paragraph(i) for i in range(6))
+        
+        chunks = budget.split(text)
+        
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 200 for chunk, _ in chunks)
+        assert TokenBudget.join(chunks) == text
+    
+    def test_split_long_paragraph(self):
+        """Тест разбиения абзаца длиннее части по предложениям"""
+        budget = TokenBudget(chunk_target_tokens=100)
+        text = paragraph(1, sentences=30) + "\n\n" + paragraph(2, sentences=2)
+        
+        chunks = budget.split(text)
+        
+        assert all(estimate_tokens(chunk) <= 100 for chunk, _ in chunks)
+        assert TokenBudget.join(chunks) == text
+        assert chunks[0][1] == " "
+    
+    def test_split_keeps_line_breaks(self):
+        """Тест: переносы строк внутри длинного абзаца сохраняются"""
+        budget = TokenBudget(chunk_target_tokens=100)
+        text = "\n".join(f"- Пункт {n}: проверить раздел отчета и поправить цифры." for n in range(30))
+        
+        chunks = budget.split(text)
+        
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 100 for chunk, _ in chunks)
+        assert all(separator == "\n" for _, separator in chunks[:-1])
+        assert TokenBudget.join(chunks) == text
+    
+    def test_split_without_spaces(self):
+        """Тест жесткого разреза текста без пробелов"""
+        budget = TokenBudget(chunk_target_tokens=10)
+        
+        chunks = budget.split("я" * 100)
+        
+        assert "".join(chunk for chunk, _ in chunks) == "я" * 100
+
+
+class TestChunkedEnhancement:
+    """Тесты улучшения длинных текстов по частям"""
+    
+    @pytest.fixture
+    def service(self):
+        """Сервис с низким порогом разбиения"""
+        with patch('src.services.openai_service.settings') as mock_settings:
+            mock_settings.openai_api_key = "test_key"
+            mock_settings.openai_model = "gpt-4o"
+            mock_settings.openai_base_url = None
+            budget = TokenBudget(chunk_threshold_tokens=100, chunk_target_tokens=60, chunk_max_parallel=2)
+            return OpenAIService(cache=EnhancementCache(), token_budget=budget)
+    
+    @pytest.mark.asyncio
+    async def test_long_text_is_enhanced_in_parts(self, service):
+        """Тест: части улучшаются параллельно и собираются по порядку"""
+        text = "\n\n".join(paragraph(i, sentences=2) for i in range(6))
+        active = 0
+        peak = 0
+        max_tokens = []
+        
+        async def create(**kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            max_tokens.append(kwargs["max_tokens"])
+            response = AsyncMock()
+            response.choices = [AsyncMock()]
+            response.choices[0].message.content = kwargs["messages"][-1]["content"].upper()
+            return response
+        
+        with patch.object(service.backend.client.chat.completions, 'create', side_effect=create):
+            result = await service.enhance_text(text, EnhancementType.GRAMMAR)
+        
+        assert result.enhanced_text == text.upper()
+        assert len(max_tokens) > 1
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_short_text_budget(self, service):
+        """Тест: короткий текст уходит одним запросом с малым max_tokens"""
+        with patch.object(service.backend.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_response = AsyncMock()
+            mock_response.choices = [AsyncMock()]
+            mock_response.choices[0].message.content = "Текст"
+            mock_create.return_value = mock_response
+            
+            await service.enhance_text("короткий текст", EnhancementType.GRAMMAR)
+        
+        mock_create.assert_awaited_once()
+        assert mock_create.await_args.kwargs["max_tokens"] == 256
+    
+    def test_batch_requests_split_like_local(self, service):
+        """Тест: для Batch API длинный текст делится на те же части, что и локально"""
+        text = "\n\n".join(paragraph(i, sentences=2) for i in range(6))
+        requests = service.enhancement_requests(text, EnhancementType.GRAMMAR)
+        
+        assert len(requests) > 1
+        parts = [(body["messages"][-1]["content"], separator) for body, separator in requests]
+        assert TokenBudget.join(parts) == text
+        assert len(service.enhancement_requests("короткий текст", EnhancementType.GRAMMAR)) == 1
+        assert len(service.enhancement_requests(text, EnhancementType.PROMPT_ENHANCEMENT)) == 1
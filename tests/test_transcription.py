@@ -0,0 +1,108 @@
+import pytest
+import asyncio
+import io
+from src.services.transcription import ChunkedTranscriber
+from tests.test_audio_splitter import make_voice
+
+
+class TestChunkedTranscriber:
+    """Тесты для распознавания длинных голосовых частями"""
+    
+    @pytest.mark.asyncio
+    async def test_parallel_chunks_in_order(self):
+        """Тест параллельного распознавания с сохранением порядка"""
+        data, _ = make_voice([(40, True), (1, False), (40, True), (1, False), (40, True)])
+        running = 0
+        max_running = 0
+        calls = []
+        
+        async def transcribe(chunk: bytes) -> str:
+            nonlocal running, max_running
+            index = len(calls)
+            calls.append(chunk)
+            running += 1
+            max_running = max(max_running, running)
+            # Первая часть отвечает дольше остальных
+            await asyncio.sleep(0.05 if index == 0 else 0.01)
+            running -= 1
+            return f" часть{index} "
+        
+        transcriber = ChunkedTranscriber(transcribe, chunk_duration=30, max_chunk_duration=45, max_parallel=2)
+        text = await transcriber.transcribe(data)
+        
+        assert text == "часть0 часть1 часть2"
+        assert len(calls) == 3
+        assert max_running == 2
+    
+    @pytest.mark.asyncio
+    async def test_short_audio_single_request(self):
+        """Тест короткого голосового одним запросом"""
+        data, _ = make_voice([(5, True)])
+        calls = []
+        
+        async def transcribe(chunk: bytes) -> str:
+            calls.append(chunk)
+            return "текст"
+        
+        audio = io.BytesIO(data)
+        transcriber = ChunkedTranscriber(transcribe)
+        assert await transcriber.transcribe(audio) == "текст"
+        # Файл уходит в API как есть, без чтения в память
+        assert calls == [audio]
+    
+    @pytest.mark.asyncio
+    async def test_file_read_by_pages(self):
+        """Тест разбиения файла без чтения его в память целиком"""
+        data, _ = make_voice([(100, True)])
+        reads = []
+        
+        class TrackedFile(io.BytesIO):
+            def read(self, size=-1):
+                chunk = super().read(size)
+                reads.append(len(chunk))
+                return chunk
+        
+        calls = []
+        
+        async def transcribe(chunk: bytes) -> str:
+            calls.append(chunk)
+            return "текст"
+        
+        transcriber = ChunkedTranscriber(transcribe, chunk_duration=30, max_chunk_duration=45)
+        assert await transcriber.transcribe(TrackedFile(data)) == "текст текст текст"
+        assert len(calls) == 3
+        assert max(reads) < len(calls[0])
+    
+    @pytest.mark.asyncio
+    async def test_unknown_format_fallback(self):
+        """Тест аудио не в формате Ogg/Opus"""
+        async def transcribe(chunk: bytes) -> str:
+            return "текст"
+        
+        transcriber = ChunkedTranscriber(transcribe)
+        assert await transcriber.transcribe(b"RIFF....WAVE") == "текст"
+    
+    @pytest.mark.asyncio
+    async def test_failed_chunk_cancels_others(self):
+        """Тест отмены остальных частей при ошибке"""
+        data, _ = make_voice([(100, True)])
+        cancelled = []
+        
+        async def transcribe(chunk: bytes) -> str:
+            if not cancelled:
+                cancelled.append(False)
+                # Ошибка приходит, когда остальные части уже отправлены
+                await asyncio.sleep(0.05)
+                raise RuntimeError("API Error")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return "текст"
+        
+        transcriber = ChunkedTranscriber(transcribe, max_parallel=4)
+        with pytest.raises(RuntimeError):
+            await transcriber.transcribe(data)
+        await asyncio.sleep(0)
+        assert cancelled.count(True) == 2
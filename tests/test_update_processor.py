@@ -0,0 +1,156 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from telegram import Update
+from src.bot.bot import BUSY_MESSAGE, PerUserUpdateProcessor
+
+
+def make_update(user_id: int) -> Update:
+    """Обновление от указанного пользователя"""
+    update = MagicMock(spec=Update)
+    update.effective_user.id = user_id
+    return update
+
+
+class TestPerUserUpdateProcessor:
+    """Тесты для планировщика обновлений"""
+    
+    @pytest.mark.asyncio
+    async def test_same_user_is_ordered(self):
+        """Тест строгого порядка обновлений одного пользователя"""
+        processor = PerUserUpdateProcessor(max_concurrent=10, max_pending_per_user=10)
+        order = []
+        
+        async def handle(i, delay):
+            await asyncio.sleep(delay)
+            order.append(i)
+        
+        await asyncio.gather(*(
+            processor.process_update(make_update(1), handle(i, 0.03 - i * 0.01))
+            for i in range(3)
+        ))
+        
+        assert order == [0, 1, 2]
+    
+    @pytest.mark.asyncio
+    async def test_users_run_concurrently(self):
+        """Тест параллельной обработки разных пользователей"""
+        processor = PerUserUpdateProcessor(max_concurrent=10)
+        running = 0
+        peak = 0
+        
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        await asyncio.gather(*(processor.process_update(make_update(i), handle()) for i in range(5)))
+        
+        assert peak == 5
+    
+    @pytest.mark.asyncio
+    async def test_global_limit(self):
+        """Тест глобального ограничения числа выполняемых обновлений"""
+        processor = PerUserUpdateProcessor(max_concurrent=2)
+        running = 0
+        peak = 0
+        
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        await asyncio.gather(*(processor.process_update(make_update(i), handle()) for i in range(6)))
+        
+        assert peak == 2
+        assert processor.stats()["queued"] == 0
+        assert processor.stats()["in_flight"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_per_user_cap(self):
+        """Тест отбрасывания обновлений сверх лимита пользователя с ответом на кнопку"""
+        processor = PerUserUpdateProcessor(max_concurrent=10, max_pending_per_user=2, overflow_wait=0)
+        handled = []
+        dropped_before = processor.stats()["dropped"]
+        updates = [make_update(1) for _ in range(4)]
+        for update in updates:
+            update.callback_query.answer = AsyncMock()
+        
+        async def handle(i):
+            await asyncio.sleep(0.01)
+            handled.append(i)
+        
+        await asyncio.gather(*(processor.process_update(update, handle(i)) for i, update in enumerate(updates)))
+        
+        assert handled == [0, 1]
+        assert processor.stats()["dropped"] - dropped_before == 2
+        assert processor.stats()["active_users"] == 0
+        for update in updates[2:]:
+            update.callback_query.answer.assert_awaited_once_with(BUSY_MESSAGE)
+        updates[0].callback_query.answer.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_overflow_waits_for_room(self):
+        """Тест: обновления сверх лимита ждут места и выполняются по порядку"""
+        processor = PerUserUpdateProcessor(max_concurrent=10, max_pending_per_user=2, overflow_wait=1)
+        handled = []
+        dropped_before = processor.stats()["dropped"]
+        
+        async def handle(i):
+            await asyncio.sleep(0.01)
+            handled.append(i)
+        
+        await asyncio.gather(*(processor.process_update(make_update(1), handle(i)) for i in range(5)))
+        
+        assert handled == [0, 1, 2, 3, 4]
+        assert processor.stats()["dropped"] == dropped_before
+        assert processor.stats()["active_users"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_dropped_message_is_answered(self):
+        """Тест ответа на сообщение, отброшенное после ожидания места"""
+        processor = PerUserUpdateProcessor(max_concurrent=10, max_pending_per_user=1, overflow_wait=0.01)
+        blocker = asyncio.Event()
+        update = make_update(1)
+        update.callback_query = None
+        update.effective_message.reply_text = AsyncMock()
+        
+        async def handle():
+            await blocker.wait()
+        
+        first = asyncio.create_task(processor.process_update(make_update(1), handle()))
+        await asyncio.sleep(0)
+        await processor.process_update(update, handle())
+        blocker.set()
+        await first
+        
+        update.effective_message.reply_text.assert_awaited_once()
+        assert BUSY_MESSAGE in update.effective_message.reply_text.await_args.args[0]
+    
+    @pytest.mark.asyncio
+    async def test_waiting_update_keeps_its_place(self):
+        """Тест: обновление, пришедшее после ждущего места, не обгоняет его"""
+        processor = PerUserUpdateProcessor(max_concurrent=10, max_pending_per_user=1, overflow_wait=1)
+        blocker = asyncio.Event()
+        order = []
+        
+        async def handle(name):
+            if name == "A":
+                await blocker.wait()
+            order.append(name)
+        
+        first = asyncio.create_task(processor.process_update(make_update(1), handle("A")))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(processor.process_update(make_update(1), handle("B")))
+        await asyncio.sleep(0)
+        blocker.set()
+        # C приходит, пока место A передается ждущему B
+        third = asyncio.create_task(processor.process_update(make_update(1), handle("C")))
+        await asyncio.gather(first, second, third)
+        
+        assert order == ["A", "B", "C"]
+        assert processor.stats()["active_users"] == 0
@@ -1,8 +1,9 @@
 import pytest
+import asyncio
 import tempfile
 import os
 import json
-from src.services.user_service import UserService
+from src.services.user_service import AsyncUserService, UserService
 from src.models.enhancement import UserSettings, CustomEnhancer
 
 
@@ -154,4 +155,116 @@ class TestUserService:
         user_settings = service2.get_user_settings(123)
         
         assert len(user_settings.custom_enhancers) == 1
-        assert user_settings.custom_enhancers[0].name == "Тест" 
\ No newline at end of file
+        assert user_settings.custom_enhancers[0].name == "Тест" 
+
+
+class TestAsyncUserService:
+    """Тесты для асинхронного интерфейса сервиса пользователей"""
+    
+    @pytest.fixture
+    def storage_file(self):
+        """Путь к временной базе пользователей"""
+        temp_dir = tempfile.mkdtemp()
+        
+        yield os.path.join(temp_dir, "users.db")
+        
+        # Очистка после тестов
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+    
+    @pytest.mark.asyncio
+    async def test_burst_is_flushed_once(self, storage_file):
+        """Тест объединения серии изменений в одно сохранение"""
+        service = AsyncUserService(UserService(storage_file=storage_file), flush_delay=0.05)
+        
+        for i in range(3):
+            assert await service.add_custom_enhancer(123, f"Тест{i}", f"Промпт{i}") is True
+        await service.add_custom_enhancer(456, "Тест", "Промпт")
+        
+        assert service.flushes == 0
+        await asyncio.sleep(0.1)
+        assert service.flushes == 1
+        
+        await service.close()
+        
+        reloaded = UserService(storage_file=storage_file)
+        assert len(reloaded.list_custom_enhancers(123)) == 3
+        assert len(reloaded.list_custom_enhancers(456)) == 1
+        reloaded.close()
+    
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_changes(self, storage_file):
+        """Тест сохранения изменений при остановке"""
+        service = AsyncUserService(UserService(storage_file=storage_file), flush_delay=60)
+        
+        await service.add_custom_enhancer(123, "Тест", "Промпт")
+        enhancer = await service.get_custom_enhancer(123, "custom_1")
+        assert enhancer.name == "Тест"
+        
+        await service.close()
+        
+        reloaded = UserService(storage_file=storage_file)
+        assert reloaded.get_custom_enhancer(123, "custom_1").name == "Тест"
+        reloaded.close()
+
+
+class TestCompactUserStorage:
+    """Тесты компактного хранения пользователей в памяти"""
+    
+    @pytest.fixture
+    def storage_file(self):
+        """Путь к временной базе пользователей"""
+        temp_dir = tempfile.mkdtemp()
+        
+        yield os.path.join(temp_dir, "users.db")
+        
+        # Очистка после тестов
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+    
+    def test_new_user_is_not_persisted(self, storage_file):
+        """Тест: пользователь без настроек не записывается в хранилище"""
+        service = UserService(storage_file=storage_file)
+        
+        assert service.list_custom_enhancers(123) == []
+        assert service.get_user_settings(123).user_id == 123
+        assert service.storage.load(123) is None
+        service.close()
+    
+    def test_cold_users_are_paged_out(self, storage_file):
+        """Тест выгрузки давно не использованных пользователей"""
+        service = UserService(storage_file=storage_file, max_hot_users=2)
+        
+        for user_id in (1, 2, 3):
+            service.add_custom_enhancer(user_id, f"Тест{user_id}", "Промпт")
+        
+        assert list(service.users) == [2, 3]
+        assert service.get_custom_enhancer(1, "custom_1").name == "Тест1"
+        assert list(service.users) == [3, 1]
+        service.close()
+    
+    def test_dirty_users_stay_until_flush(self, storage_file):
+        """Тест: несохраненные пользователи не выгружаются до flush"""
+        service = UserService(storage_file=storage_file, autosave=False, max_hot_users=1)
+        
+        service.add_custom_enhancer(1, "Тест1", "Промпт")
+        service.add_custom_enhancer(2, "Тест2", "Промпт")
+        assert list(service.users) == [1, 2]
+        
+        assert service.flush() == 2
+        assert list(service.users) == [2]
+        assert service.list_custom_enhancers(1)[0].name == "Тест1"
+        service.close()
+    
+    def test_prompts_are_shared(self, storage_file):
+        """Тест: одинаковые промпты разных пользователей хранятся одной строкой"""
+        service = UserService(storage_file=storage_file)
+        prompt = "".join(["Сделай текст ", "короче"])
+        
+        service.add_custom_enhancer(1, "Тест", prompt)
+        service.add_custom_enhancer(2, "Тест", "".join(["Сделай текст ", "короче"]))
+        
+        assert service.users[1].enhancers[0].prompt is service.users[2].enhancers[0].prompt
+        service.close()
@@ -0,0 +1,90 @@
+import pytest
+import tempfile
+import shutil
+import os
+import json
+from src.services.user_storage import JsonUserStorage, SQLiteUserStorage, create_user_storage
+from src.services.user_service import UserService
+from src.models.enhancement import UserSettings, CustomEnhancer
+
+
+class TestUserStorage:
+    """Тесты для хранилищ настроек пользователей"""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Временная директория для файлов хранилища"""
+        path = tempfile.mkdtemp()
+        
+        yield path
+        
+        # Очистка после тестов
+        shutil.rmtree(path)
+    
+    def _user(self, user_id: int, name: str = "Тест") -> UserSettings:
+        """Настройки пользователя с одним улучшателем"""
+        return UserSettings(
+            user_id=user_id,
+            custom_enhancers=[CustomEnhancer(id="custom_1", name=name, prompt="Промпт")]
+        )
+    
+    def test_sqlite_upsert(self, temp_dir):
+        """Тест построчного сохранения и обновления пользователя"""
+        storage = SQLiteUserStorage(os.path.join(temp_dir, "users.db"))
+        
+        storage.save(self._user(1, "Первый"))
+        storage.save(self._user(1, "Обновленный"))
+        storage.save(self._user(2))
+        
+        assert storage.load(1).custom_enhancers[0].name == "Обновленный"
+        assert storage.load(2).user_id == 2
+        assert storage.load(3) is None
+        storage.close()
+    
+    def test_sqlite_wal_mode(self, temp_dir):
+        """Тест включения режима WAL"""
+        storage = SQLiteUserStorage(os.path.join(temp_dir, "users.db"))
+        
+        mode = storage._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        
+        assert mode == "wal"
+        storage.close()
+    
+    def test_migration_from_json(self, temp_dir):
+        """Тест однократной миграции из JSON-файла"""
+        json_file = os.path.join(temp_dir, "users.json")
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump({"123": self._user(123).model_dump()}, f)
+        
+        storage = create_user_storage(os.path.join(temp_dir, "users.db"))
+        
+        assert isinstance(storage, SQLiteUserStorage)
+        assert storage.load(123).custom_enhancers[0].name == "Тест"
+        assert not os.path.exists(json_file)
+        assert os.path.exists(json_file + ".migrated")
+        storage.close()
+    
+    def test_json_storage_atomic_write(self, temp_dir):
+        """Тест сохранения в JSON без временных файлов"""
+        json_file = os.path.join(temp_dir, "users.json")
+        storage = create_user_storage(json_file)
+        
+        assert isinstance(storage, JsonUserStorage)
+        storage.save(self._user(1))
+        
+        assert os.listdir(temp_dir) == ["users.json"]
+        assert JsonUserStorage(json_file).load(1).user_id == 1
+    
+    def test_user_service_lazy_loading(self, temp_dir):
+        """Тест ленивой загрузки пользователей в сервисе"""
+        storage_file = os.path.join(temp_dir, "users.db")
+        service1 = UserService(storage_file=storage_file)
+        service1.add_custom_enhancer(123, "Тест", "Промпт")
+        service1.close()
+        
+        service2 = UserService(storage_file=storage_file)
+        
+        assert service2.users == {}
+        assert service2.list_custom_enhancers(123)[0].name == "Тест"
+        assert list(service2.users) == [123]
+        service2.close()